@@ -0,0 +1,397 @@
+import argparse
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+import numpy as np
+
+import flightlog
+from batch_model import DEFAULT_PARAMS
+from kepler import apsides
+
+DEFAULT_DB = os.path.join('flight_data', 'archive.sqlite')
+# Увеличить при изменении таблиц или расчёта сводок: архив пересоберётся при следующем проходе
+SCHEMA_VERSION = 1
+CHUNK_ROWS = 256
+# Атмосфера Кербина для оценки скоростного напора по высоте и скорости, если в журнале нет своего столбца
+RHO_0 = 1.225
+SCALE_HEIGHT = 5600.0
+H_ATM = DEFAULT_PARAMS['h_atm']
+DRY_MASS = DEFAULT_PARAMS['M2']
+STAGE_2_FUEL = DEFAULT_PARAMS['m2'] - DEFAULT_PARAMS['M2']
+TIMESTAMP = re.compile(r'(\d{8}_\d{6})')
+
+TABLES = '''
+CREATE TABLE flights (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    format TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    started TEXT NOT NULL,
+    ingested REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    duration REAL,
+    max_altitude REAL,
+    max_velocity REAL,
+    max_q REAL,
+    max_q_time REAL,
+    max_q_altitude REAL,
+    q_estimated INTEGER,
+    stage_changes INTEGER,
+    final_altitude REAL,
+    final_apoapsis REAL,
+    final_periapsis REAL,
+    final_mass REAL,
+    fuel_margin REAL,
+    fuel_margin_share REAL
+);
+CREATE INDEX flights_started ON flights(started);
+CREATE INDEX flights_max_q ON flights(max_q);
+CREATE TABLE stage_events (
+    flight_id INTEGER NOT NULL REFERENCES flights(id) ON DELETE CASCADE,
+    time REAL NOT NULL,
+    altitude REAL,
+    from_stage INTEGER,
+    to_stage INTEGER
+);
+CREATE INDEX stage_events_flight ON stage_events(flight_id, time);
+CREATE TABLE chunks (
+    flight_id INTEGER NOT NULL REFERENCES flights(id) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    time REAL NOT NULL,
+    offset INTEGER NOT NULL,
+    PRIMARY KEY (flight_id, row)
+);
+'''
+# Фильтр запроса: (условие SQL, преобразование значения)
+FILTERS = {
+    'since': ('started >= ?', str),
+    'until': ('started < ?', str),
+    'min_max_q': ('max_q >= ?', float),
+    'max_max_q': ('max_q <= ?', float),
+    'min_apoapsis': ('final_apoapsis >= ?', float),
+    'min_fuel_margin': ('fuel_margin >= ?', float),
+    'path': ('path LIKE ?', lambda v: f"%{v}%"),
+}
+SORT_COLUMNS = {'started', 'max_q', 'final_apoapsis', 'fuel_margin', 'duration', 'max_altitude'}
+
+
+def started_at(path, mtime):
+    # Время старта из имени файла DataLogger, иначе время последнего изменения
+    match = TIMESTAMP.search(os.path.basename(path))
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').isoformat(sep=' ')
+    return datetime.fromtimestamp(mtime).isoformat(sep=' ', timespec='seconds')
+
+
+def dynamic_pressure(columns):
+    if 'dynamic_pressure' in columns:
+        return np.asarray(columns['dynamic_pressure'], dtype=float), False
+    h = np.asarray(columns['altitude'], dtype=float)
+    v = np.asarray(columns['velocity'], dtype=float)
+    rho = np.where(h < H_ATM, RHO_0 * np.exp(-np.maximum(h, 0.0) / SCALE_HEIGHT), 0.0)
+    return rho * v ** 2 / 2, True
+
+
+def final_orbit(t, h, v, window=2.0):
+    # Вертикальная скорость по наклону высоты за последние секунды, остальное считается горизонтальной.
+    # Журнал пишет орбитальную скорость (невращающаяся система тела), её и требует формула энергии
+    sel = t >= t[-1] - window
+    vy = np.polyfit(t[sel], h[sel], 1)[0] if sel.sum() >= 2 and np.ptp(t[sel]) > 0 else 0.0
+    vx = np.sqrt(max(v[-1] ** 2 - vy ** 2, 0.0))
+    apoapsis, periapsis = apsides(h[-1], vx, vy)
+    return float(apoapsis), float(periapsis)
+
+
+def summarize(columns):
+    t = np.asarray(columns['time'], dtype=float)
+    n = len(t)
+    summary = {'samples': n}
+    if not n:
+        return summary, []
+
+    h = np.asarray(columns['altitude'], dtype=float)
+    v = np.asarray(columns['velocity'], dtype=float)
+    m = np.asarray(columns['mass'], dtype=float)
+    stage = np.asarray(columns['stage'])
+    q, estimated = dynamic_pressure(columns)
+    i_q = int(np.argmax(q))
+    apoapsis, periapsis = final_orbit(t, h, v)
+
+    changes = np.flatnonzero(np.diff(stage)) + 1
+    events = [(float(t[i]), float(h[i]), int(stage[i - 1]), int(stage[i])) for i in changes]
+    summary.update(
+        duration=float(t[-1] - t[0]),
+        max_altitude=float(h.max()),
+        max_velocity=float(v.max()),
+        max_q=float(q[i_q]),
+        max_q_time=float(t[i_q]),
+        max_q_altitude=float(h[i_q]),
+        q_estimated=int(estimated),
+        stage_changes=len(events),
+        final_altitude=float(h[-1]),
+        final_apoapsis=apoapsis,
+        final_periapsis=periapsis,
+        final_mass=float(m[-1]),
+        fuel_margin=float(m[-1] - DRY_MASS),
+        fuel_margin_share=float((m[-1] - DRY_MASS) / STAGE_2_FUEL),
+    )
+    return summary, events
+
+
+def csv_index(path):
+    # Байтовое смещение и время каждой полной строки данных, чтобы читать диапазон без разбора всего файла
+    offsets, times = [], []
+    with open(path, 'rb') as f:
+        position = len(f.readline())
+        for line in f:
+            fields = line.split(b',')
+            if line.endswith(b'\n') and len(fields) == len(flightlog.SCHEMA):
+                offsets.append(position)
+                times.append(float(fields[0]))
+            position += len(line)
+    return np.asarray(offsets, dtype=np.int64), np.asarray(times)
+
+
+def read_csv_range(path, offset, t_from, t_to):
+    rows = []
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            fields = line.decode('utf-8').rstrip('\r\n').split(',')
+            if len(fields) != len(flightlog.SCHEMA):
+                continue
+            row = tuple(float(x) if typ[1] == 'f' else int(float(x)) for x, (_, typ) in zip(fields, flightlog.SCHEMA))
+            if row[0] > t_to:
+                break
+            if row[0] >= t_from:
+                rows.append(row)
+    return np.array(rows, dtype=flightlog.DTYPE)
+
+
+class FlightArchive:
+    def __init__(self, path=DEFAULT_DB):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA foreign_keys = ON')
+        self.db.execute('PRAGMA journal_mode = WAL')
+        if self.db.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self.db:
+            for table in ('chunks', 'stage_events', 'flights'):
+                self.db.execute(f'DROP TABLE IF EXISTS {table}')
+            self.db.executescript(TABLES)
+            self.db.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest_file(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        binary = flightlog.is_binary(path)
+        columns = flightlog.load_columns(path)
+        summary, events = summarize(columns)
+
+        if binary:
+            dtype, offset = flightlog.read_header(path)
+            times = np.asarray(columns['time'], dtype=float)
+            rows = np.arange(0, len(times), CHUNK_ROWS)
+            offsets = offset + rows * dtype.itemsize
+        else:
+            offsets, times = csv_index(path)
+            rows = np.arange(0, len(times), CHUNK_ROWS)
+            offsets = offsets[rows]
+
+        record = dict(summary, path=path, format='binary' if binary else 'csv', mtime=stat.st_mtime,
+                      size=stat.st_size, started=started_at(path, stat.st_mtime), ingested=time.time())
+        names = ', '.join(record)
+        with self.db:
+            self.db.execute('DELETE FROM flights WHERE path = ?', (path,))
+            flight_id = self.db.execute(f'INSERT INTO flights ({names}) VALUES ({", ".join("?" * len(record))})',
+                                        list(record.values())).lastrowid
+            self.db.executemany('INSERT INTO stage_events VALUES (?, ?, ?, ?, ?)',
+                                [(flight_id, *event) for event in events])
+            self.db.executemany('INSERT INTO chunks VALUES (?, ?, ?, ?)',
+                                [(flight_id, int(r), float(times[r]), int(o)) for r, o in zip(rows, offsets)])
+        return flight_id
+
+    def ingest(self, data_dirs=('flight_data',), prune=True):
+        # Перечитываются только новые файлы и те, у которых изменились время или размер
+        known = {row['path']: (row['mtime'], row['size'])
+                 for row in self.db.execute('SELECT path, mtime, size FROM flights')}
+        seen = set()
+        added = updated = skipped = failed = 0
+        for data_dir in data_dirs:
+            if not os.path.isdir(data_dir):
+                print(f"Нет папки с журналами: {data_dir}")
+                continue
+            for name in sorted(os.listdir(data_dir)):
+                if not name.endswith(('.csv', '.bin')):
+                    continue
+                path = os.path.abspath(os.path.join(data_dir, name))
+                seen.add(path)
+                stat = os.stat(path)
+                if known.get(path) == (stat.st_mtime, stat.st_size):
+                    skipped += 1
+                    continue
+                try:
+                    self.ingest_file(path)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Журнал пропущен: {name}: {e}")
+                    failed += 1
+                    continue
+                if path in known:
+                    updated += 1
+                else:
+                    added += 1
+
+        removed = 0
+        if prune:
+            roots = [os.path.abspath(d) + os.sep for d in data_dirs]
+            gone = [path for path in known if path not in seen and path.startswith(tuple(roots))]
+            with self.db:
+                self.db.executemany('DELETE FROM flights WHERE path = ?', [(path,) for path in gone])
+            removed = len(gone)
+        return {'added': added, 'updated': updated, 'skipped': skipped, 'failed': failed, 'removed': removed}
+
+    def query(self, sort='started', descending=True, limit=None, **filters):
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Нельзя сортировать по {sort}")
+        where, args = [], []
+        for name, value in filters.items():
+            if value is None:
+                continue
+            condition, convert = FILTERS[name]
+            where.append(condition)
+            args.append(convert(value))
+        sql = 'SELECT * FROM flights'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f" ORDER BY {sort} {'DESC' if descending else 'ASC'}"
+        if limit:
+            sql += ' LIMIT ?'
+            args.append(int(limit))
+        return [dict(row) for row in self.db.execute(sql, args)]
+
+    def stage_events(self, flight_id):
+        return [dict(row) for row in self.db.execute(
+            'SELECT time, altitude, from_stage, to_stage FROM stage_events WHERE flight_id = ? ORDER BY time',
+            (flight_id,))]
+
+    def flight(self, key):
+        if isinstance(key, int) or str(key).isdigit():
+            row = self.db.execute('SELECT * FROM flights WHERE id = ?', (int(key),)).fetchone()
+        else:
+            row = self.db.execute('SELECT * FROM flights WHERE path = ?', (os.path.abspath(key),)).fetchone()
+        if row is None:
+            raise KeyError(f"Полёт не найден в архиве: {key}")
+        return dict(row)
+
+    def read_range(self, key, t_from=float('-inf'), t_to=float('inf')):
+        # Чтение начинается с ближайшего блока перед t_from, открывается только файл этого полёта
+        flight = self.flight(key)
+        chunk = self.db.execute('SELECT row, offset FROM chunks WHERE flight_id = ? AND time <= ? '
+                                'ORDER BY row DESC LIMIT 1', (flight['id'], t_from)).fetchone()
+        if chunk is None:
+            chunk = self.db.execute('SELECT row, offset FROM chunks WHERE flight_id = ? ORDER BY row LIMIT 1',
+                                    (flight['id'],)).fetchone()
+        if chunk is None:
+            return np.zeros(0, dtype=flightlog.DTYPE)
+
+        if flight['format'] == 'csv':
+            return read_csv_range(flight['path'], chunk['offset'], t_from, t_to)
+        data = flightlog.read_binary(flight['path'])
+        tail = data[chunk['row']:]
+        start = chunk['row'] + int(np.searchsorted(tail['time'], t_from, side='left'))
+        stop = chunk['row'] + int(np.searchsorted(tail['time'], t_to, side='right'))
+        return np.array(data[start:stop])
+
+
+def print_flights(flights):
+    print(f"{'id':>4}  {'старт':<19}{'длит., с':>9}{'max q, кПа':>11}{'t(max q)':>9}{'апоцентр, км':>13}"
+          f"{'запас, кг':>10}{'ступ.':>6}  файл")
+    for f in flights:
+        if not f['samples']:
+            print(f"{f['id']:>4}  {f['started']:<19}{'пустой журнал':>58}  {os.path.basename(f['path'])}")
+            continue
+        q_mark = '~' if f['q_estimated'] else ' '
+        print(f"{f['id']:>4}  {f['started']:<19}{f['duration']:>9.1f}{q_mark}{f['max_q'] / 1000:>10.1f}"
+              f"{f['max_q_time']:>9.1f}{f['final_apoapsis'] / 1000:>13.1f}{f['fuel_margin']:>10.0f}"
+              f"{f['stage_changes']:>6}  {os.path.basename(f['path'])}")
+    with_q = [f for f in flights if f['samples']]
+    if with_q:
+        peak = max(with_q, key=lambda f: f['max_q'])
+        print(f"Полётов {len(flights)}; наибольший скоростной напор {peak['max_q'] / 1000:.1f} кПа "
+              f"(полёт {peak['id']}, t = {peak['max_q_time']:.1f} с); ~ оценка по высоте и скорости")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Архив журналов полётов со сводками и выборками")
+    parser.add_argument('--db', default=DEFAULT_DB, help="файл архива SQLite")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('ingest', help="добавить новые и изменившиеся журналы")
+    p.add_argument('dirs', nargs='*', default=['flight_data'])
+
+    p = commands.add_parser('query', help="выборка полётов по сводкам")
+    p.add_argument('--since', help="начало периода, ГГГГ-ММ-ДД")
+    p.add_argument('--until', help="конец периода (не включая), ГГГГ-ММ-ДД")
+    p.add_argument('--min-max-q', type=float, help="скоростной напор не меньше, Па")
+    p.add_argument('--max-max-q', type=float)
+    p.add_argument('--min-apoapsis', type=float, help="апоцентр в конце журнала не меньше, м")
+    p.add_argument('--min-fuel-margin', type=float, help="остаток массы над сухой, кг")
+    p.add_argument('--path', help="часть имени файла")
+    p.add_argument('--sort', choices=sorted(SORT_COLUMNS), default='started')
+    p.add_argument('--asc', action='store_true')
+    p.add_argument('--limit', type=int)
+    p.add_argument('--stages', action='store_true', help="показать моменты смены ступеней")
+
+    p = commands.add_parser('series', help="участок сырого ряда одного полёта")
+    p.add_argument('flight', help="id полёта или путь к журналу")
+    p.add_argument('--from', dest='t_from', type=float, default=float('-inf'))
+    p.add_argument('--to', dest='t_to', type=float, default=float('inf'))
+    args = parser.parse_args(argv)
+
+    with FlightArchive(args.db) as archive:
+        if args.command == 'ingest':
+            counts = archive.ingest(args.dirs)
+            print(f"Архив {args.db}: добавлено {counts['added']}, обновлено {counts['updated']}, "
+                  f"без изменений {counts['skipped']}, удалено {counts['removed']}, ошибок {counts['failed']}")
+            return counts
+        if args.command == 'query':
+            flights = archive.query(args.sort, not args.asc, args.limit, since=args.since, until=args.until,
+                                    min_max_q=args.min_max_q, max_max_q=args.max_max_q,
+                                    min_apoapsis=args.min_apoapsis, min_fuel_margin=args.min_fuel_margin,
+                                    path=args.path)
+            print_flights(flights)
+            if args.stages:
+                for f in flights:
+                    events = archive.stage_events(f['id'])
+                    print(f"{f['id']}: " + ', '.join(f"{e['from_stage']}->{e['to_stage']} в {e['time']:.1f} с "
+                                                      f"({e['altitude'] / 1000:.1f} км)" for e in events))
+            return flights
+        data = archive.read_range(args.flight, args.t_from, args.t_to)
+        print(','.join(data.dtype.names))
+        for row in data.tolist():
+            print(','.join(f"{x:.2f}" if isinstance(x, float) else f"{x}" for x in row))
+        return data
+
+
+if __name__ == '__main__':
+    main()
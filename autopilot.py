@@ -1,70 +1,448 @@
-import krpc
+import asyncio
+import sys
 import time
 import math
-import matplotlib.pyplot as plt
 import csv
 import os
+import threading
+from collections import deque
 from datetime import datetime
 
+import flightlog
+from events import FlightEvents
+from latency import LoopInstruments
+from maneuver import plan_circularization
+from scheduler import FlightScheduler
+from telemetry import TelemetryHub
+from vehicle import RESOURCES, VEHICLE, compile_vehicle
 
 TARGET_ALTITUDE = 150000
 TURN_START_ALT = 1000
 TURN_END_ALT = 45000
+# Отсечка по прогнозу попадает в цель, а не перелетает её: апоцентр чуть ниже цели тоже годится для скругления
+APOAPSIS_TOLERANCE = 1000
+
+
+class FlightSession:
+    # Всё состояние одного полёта: несколько сеансов в одном процессе не делят ни соединение, ни журнал
+    def __init__(self, name='ksp', data_dir='flight_data', clock=time, prediction='thread'):
+        self.name = name
+        self.data_dir = data_dir
+        self.clock = clock
+        # 'thread' - прогноз в фоновом потоке, 'inline' - в цикле управления (модельные часы), None - без прогноза
+        self.prediction = prediction
+        self.predictor = None
+        self.launched_at = None
+        self.conn = None
+        self.vessel = None
+        self.ap = None
+        self.telemetry = None
+        self.events = None
+        self.stager = None
+        self.data_logger = None
+        self.live_view = None
+        self.error = None
+        self.instruments = LoopInstruments(clock.perf_counter, clock.sleep)
+
+    def setup_staging(self, connect=None):
+        print("Инициализация автопилота...")
 
-conn = None
-vessel = None
-ap = None
+        try:
+            if connect is None:
+                import krpc
+
+                connect = krpc.connect
+            self.conn = connect()
+            vessel = self.conn.space_center.active_vessel
+            ap = vessel.auto_pilot
+            self.telemetry = TelemetryHub(self.conn, vessel, self.clock)
+        except Exception as e:
+            print(f"Ошибка подключения к KSP: {e}")
+            return False
 
+        try:
+            self.events = FlightEvents(self.conn, vessel, TARGET_ALTITUDE)
+        except Exception as e:
+            print(f"События сервера недоступны, используется опрос: {e}")
+            self.events = None
+
+        # Потоки и события уже созданы на настоящих объектах; прямые вызовы дальше идут через замеры
+        instruments = self.instruments
+        self.vessel = vessel = instruments.wrap(vessel, 'vessel')
+        self.ap = ap = instruments.wrap(ap, 'auto_pilot')
+        self.telemetry.control = instruments.wrap(self.telemetry.control, 'control')
+
+        vessel.control.throttle = 1.0
+        vessel.control.sas = False
+        vessel.control.rcs = False
+        ap.reference_frame = vessel.surface_reference_frame
+        ap.target_pitch_and_heading(90, 90)
+        ap.engage()
+        self.clock.sleep(1)
+        return True
 
-def setup_staging():
-    global conn, vessel, ap
-    print("Инициализация автопилота...")
+    def manage_max_q(self, snap):
+        if self.vessel is None:
+            return
+        alt = snap.mean_altitude
+        if 5000 < alt < 15000:
+            dynamic_pressure = snap.dynamic_pressure
+            if dynamic_pressure > 20000:
+                self.telemetry.control.throttle = 0.85
+                return
+        self.telemetry.control.throttle = 1.0
+
+    def apoapsis_reached(self, snap):
+        if self.events is not None:
+            return self.events.fired('apoapsis_reached')
+        return snap.apoapsis_altitude >= TARGET_ALTITUDE
+
+    def arm_apoapsis_cutoff(self):
+        if self.events is not None:
+            self.events.arm('apoapsis_reached', lambda: setattr(self.telemetry.control, 'throttle', 0.0))
+
+    def check_circularization(self):
+        if self.vessel is None:
+            return False
+        snap = self.telemetry.snapshot()
+        apoapsis = snap.apoapsis_altitude
+        periapsis = snap.periapsis_altitude
 
-    try:
-        conn = krpc.connect()
-        vessel = conn.space_center.active_vessel
-        ap = vessel.auto_pilot
-    except Exception as e:
-        print(f"Ошибка подключения к KSP: {e}")
+        if apoapsis >= TARGET_ALTITUDE - APOAPSIS_TOLERANCE and periapsis < TARGET_ALTITUDE - 10000:
+            return True
         return False
 
-    vessel.control.throttle = 1.0
-    vessel.control.sas = False
-    vessel.control.rcs = False
-    ap.reference_frame = vessel.surface_reference_frame
-    ap.target_pitch_and_heading(90, 90)
-    ap.engage()
-    time.sleep(1)
-    return True
+    def start_predictor(self):
+        if not self.prediction:
+            return None
+        from predictor import AscentPredictor, PredictorRunner
 
+        predictor = AscentPredictor(TARGET_ALTITUDE, self.vessel.specific_impulse)
+        self.predictor = PredictorRunner(predictor, background=self.prediction == 'thread')
+        self._fuel_reported = False
+        return self.predictor
 
-def manage_max_q():
-    if vessel is None:
-        return
-    alt = vessel.flight().mean_altitude
-    if 5000 < alt < 15000:
-        dynamic_pressure = vessel.flight().dynamic_pressure
-        if dynamic_pressure > 20000:
-            vessel.control.throttle = 0.85
+    def cutoff_due(self, snap, period=0.1):
+        from predictor import state_from_snapshot
+
+        now = self.clock.monotonic() - self.launched_at
+        prediction = self.predictor.submit(state_from_snapshot(snap, now))
+        if prediction is None or not prediction['complete']:
+            return False
+        if not self._fuel_reported:
+            self._fuel_reported = True
+            if prediction['fuel_ok']:
+                print(f"Прогноз: отсечка через {prediction['cutoff_in']:.1f} с, "
+                      f"запас топлива после скругления {prediction['fuel_margin']:.0f} кг")
+            else:
+                print(f"Прогноз: топлива не хватит, наибольший апоцентр {prediction['apoapsis_max'] / 1000:.1f} км")
+        if prediction['cutoff_at'] is None:
+            return False
+
+        # Расчётный момент наступит раньше следующего такта: ждём точно до него, а не до конца такта
+        remaining = prediction['cutoff_at'] - now
+        if remaining > period:
+            return False
+        self.sleep_until(self.launched_at + prediction['cutoff_at'])
+        self.telemetry.control.throttle = 0.0
+        if self.events is not None:
+            # Иначе событие сработает при скруглении, когда апоцентр перейдёт цель, и заглушит двигатель
+            self.events.disarm('apoapsis_reached')
+        print(f"Отсечка по прогнозу на {prediction['cutoff_at']:.2f} с полёта")
+        return True
+
+    def stop_predictor(self):
+        if self.predictor is None:
+            return
+        self.predictor.stop()
+        stats = self.predictor.stats()
+        self.predictor = None
+        print(f"Прогноз: {stats['computed']} расчётов, p99 {stats['p99'] * 1000:.2f} мс при бюджете "
+              f"{stats['budget'] * 1000:.0f} мс, сверх бюджета {stats['over_budget']}, пропущено {stats['replaced']}")
+
+    def sleep_until(self, moment):
+        remaining = moment - self.clock.monotonic()
+        if remaining > 0:
+            self.clock.sleep(remaining)
+
+    def circularize_orbit(self):
+        if self.vessel is None or self.ap is None:
             return
-    vessel.control.throttle = 1.0
+        telemetry = self.telemetry
+        clock = self.clock
+
+
+        self.ap.target_pitch_and_heading(0, 90)
+        clock.sleep(2)
+
+        snap = telemetry.snapshot()
+        body = self.vessel.orbit.body
+        plan = plan_circularization(snap.apoapsis_altitude, snap.periapsis_altitude, snap.time_to_apoapsis,
+                                    snap.mass, snap.available_thrust, self.vessel.specific_impulse,
+                                    mu=body.gravitational_parameter, radius=body.equatorial_radius)
+        planned_at = clock.monotonic()
+        print(f"Манёвр: Δv {plan['dv']:.1f} м/с, работа двигателя {plan['burn_time']:.1f} с, "
+              f"включение через {plan['start_in']:.1f} с")
+
+        self.sleep_until(planned_at + plan['start_in'])
+        telemetry.control.throttle = 1.0
+        self.sleep_until(planned_at + plan['cutoff_in'])
+        telemetry.control.throttle = plan['trim_throttle']
+
+        deadline = clock.monotonic() + 3 * plan['trim_burn_time'] + 1
+        snap = telemetry.snapshot()
+        while snap.periapsis_altitude < TARGET_ALTITUDE - 1000 and clock.monotonic() < deadline:
+            clock.sleep(0.05)
+            snap = telemetry.snapshot()
+
+        telemetry.control.throttle = 0.0
+
+        snap = telemetry.snapshot()
+        apoapsis = snap.apoapsis_altitude
+        periapsis = snap.periapsis_altitude
+        print(f"Итоговая орбита: Апоцентр {apoapsis / 1000:.1f}км, Перицентр {periapsis / 1000:.1f}км")
+
+    def open_logger(self, live=False):
+        self.data_logger = DataLogger(buffered=True, data_dir=self.data_dir, clock=self.clock)
+        if live:
+            self.live_view = start_live_view(self.data_logger.data_file)
+        return self.data_logger
+
+    def launch_with_data_logging(self, live=False):
+        vessel = self.vessel
+        if vessel is None:
+            print("Ошибка: корабль не определен")
+            return
+        ap = self.ap
+        telemetry = self.telemetry
+        instruments = self.instruments
+
+        vessel.control.activate_next_stage()
+        self.launched_at = self.clock.monotonic()
+
+
+        data_logger = self.open_logger(live)
+
+
+        snap = telemetry.snapshot()
+        while snap.surface_altitude < 10:
+            instruments.tick()
+            data_logger.save_data(vessel, snap)
+            instruments.sleep(0.1)
+            snap = telemetry.snapshot()
+
+        self.stager = stager = RocketStager(vessel, events=self.events, instruments=instruments, clock=self.clock)
+
+        while snap.mean_altitude < TURN_START_ALT:
+            instruments.tick()
+            self.manage_max_q(snap)
+            data_logger.save_data(vessel, snap)
+            instruments.sleep(0.1)
+            snap = telemetry.snapshot()
+
+
+
+        while snap.mean_altitude < TURN_END_ALT:
+            instruments.tick()
+            alt = snap.mean_altitude
+            frac = (alt - TURN_START_ALT) / (TURN_END_ALT - TURN_START_ALT)
+            pitch = max(0, 90 * (1 - frac))
+            ap.target_pitch_and_heading(pitch, 90)
+
+            self.manage_max_q(snap)
+            stager.manage_all_stages(snap)
+            data_logger.save_data(vessel, snap)
+            instruments.sleep(0.1)
+            snap = telemetry.snapshot()
+
+        ap.target_pitch_and_heading(0, 90)
+        self.arm_apoapsis_cutoff()
+        predictor = self.start_predictor()
+
+
+        while not self.apoapsis_reached(snap):
+            instruments.tick()
+            stage_changed = stager.manage_all_stages(snap)
+
+            data_logger.save_data(vessel, snap)
+
+
+            if stager.current_stage == 3 and stager.stage_separated[2]:
+                print("Топливо полностью израсходовано до достижения орбиты")
+                break
+            if predictor is not None and self.cutoff_due(snap):
+                break
+
+            instruments.sleep(0.1)
+            snap = telemetry.snapshot()
+
+
+        return self.finish_ascent(snap)
+
+    def finish_ascent(self, snap):
+        telemetry = self.telemetry
+        data_logger = self.data_logger
+        telemetry.control.throttle = 0.0
+        self.stop_predictor()
+        print(f'Достигнута высота апоцентра: {snap.apoapsis_altitude / 1000:.1f} км')
+
+        if self.check_circularization():
+            self.circularize_orbit()
+        else:
+            snap = telemetry.snapshot()
+            apoapsis = snap.apoapsis_altitude
+            periapsis = snap.periapsis_altitude
+            print(f"Орбита: Апоцентр {apoapsis / 1000:.1f}км, Перицентр {periapsis / 1000:.1f}км")
+
+
+        data_logger.save_data(self.vessel, telemetry.snapshot())
+        data_logger.close()
+        print(f"Данные полета сохранены в файл: {data_logger.data_file}")
+        report = telemetry.report()
+        print(f"Телеметрия: {report['ticks']} тиков, сэкономлено ~{report['rpcs_saved_per_tick']:.1f} RPC на тик")
+        latency_file = self.instruments.save(os.path.splitext(data_logger.data_file)[0] + '_latency.json')
+        print(f"Задержки цикла управления сохранены в файл: {latency_file}")
+        self.instruments.print_summary()
+
+        return data_logger.data_file
+
+    async def launch_scheduled(self, guidance_hz=20, staging_hz=5, logging_hz=10, live=False):
+        vessel = self.vessel
+        if vessel is None:
+            print("Ошибка: корабль не определен")
+            return
+        ap = self.ap
+        telemetry = self.telemetry
+
+        vessel.control.activate_next_stage()
+
+        data_logger = self.open_logger(live)
+        self.stager = stager = RocketStager(vessel, blocking_settle=False, events=self.events,
+                                            instruments=self.instruments, clock=self.clock)
+        scheduler = FlightScheduler()
+        flight = {'phase': 'liftoff', 'snap': telemetry.snapshot()}
+
+        def guidance():
+            snap = telemetry.snapshot()
+            flight['snap'] = snap
+            phase = flight['phase']
+            if phase == 'liftoff' and snap.surface_altitude >= 10:
+                phase = 'vertical'
+            if phase == 'vertical':
+                if snap.mean_altitude < TURN_START_ALT:
+                    self.manage_max_q(snap)
+                else:
+                    phase = 'turn'
+            if phase == 'turn':
+                if snap.mean_altitude < TURN_END_ALT:
+                    frac = (snap.mean_altitude - TURN_START_ALT) / (TURN_END_ALT - TURN_START_ALT)
+                    ap.target_pitch_and_heading(max(0, 90 * (1 - frac)), 90)
+                    self.manage_max_q(snap)
+                else:
+                    ap.target_pitch_and_heading(0, 90)
+                    self.arm_apoapsis_cutoff()
+                    phase = 'burn'
+            if phase == 'burn' and self.apoapsis_reached(snap):
+                scheduler.stop()
+            flight['phase'] = phase
+
+        async def staging():
+            if flight['phase'] not in ('turn', 'burn'):
+                return
+            separations = stager.separations
+            stager.manage_all_stages(flight['snap'])
+            if flight['phase'] == 'burn' and stager.current_stage == 3 and stager.stage_separated[2]:
+                print("Топливо полностью израсходовано до достижения орбиты")
+                scheduler.stop()
+            if stager.separations > separations:
+                # Ожидание после разделения останавливает только задачу ступеней, наведение продолжает работать
+                await asyncio.sleep(stager.settle_time)
+
+        def logging():
+            data_logger.save_data(vessel, telemetry.snapshot())
+
+        scheduler.add('guidance', guidance_hz, guidance)
+        scheduler.add('staging', staging_hz, staging)
+        scheduler.add('logging', logging_hz, logging)
+        await scheduler.run()
+        scheduler.print_report()
+
+        return self.finish_ascent(telemetry.snapshot())
+
+    def run(self, scheduler=False, live=False):
+        vessel = self.vessel
+        ap = self.ap
+        try:
+            if scheduler and self.clock is not time:
+                # Планировщик asyncio ждёт настоящее время и не двигает модельные часы: полёт бы не начался
+                raise ValueError("Многочастотный планировщик работает только с настоящими часами")
+            if scheduler:
+                data_file = asyncio.run(self.launch_scheduled(live=live))
+            else:
+                data_file = self.launch_with_data_logging(live=live)
+
+            if ap and hasattr(ap, 'engaged'):
+                if ap.engaged:
+                    ap.disengage()
+            elif ap:
+                ap.disengage()
+
+            if vessel:
+                vessel.control.sas = True
+            return data_file
+
+        except Exception as e:
+            print(f"Ошибка во время выполнения: {e}")
+            self.error = e
+            if self.data_logger:
+                self.data_logger.close()
+            try:
+                if vessel:
+                    vessel.control.throttle = 0.0
+                if ap:
+                    ap.disengage()
+            except:
+
+                pass
+
+    def close(self):
+        # Потоки и события снимаются с сервера, чтобы соединение можно было отдать следующему сеансу
+        self.stop_predictor()
+        if self.live_view is not None:
+            process, stop = self.live_view
+            stop.set()
+            process.join(timeout=2)
+            self.live_view = None
+        if self.events is not None:
+            self.events.close()
+        if self.telemetry is not None:
+            self.telemetry.close()
 
 
 class RocketStager:
-    def __init__(self, vessel):
+    def __init__(self, vessel, blocking_settle=True, settle_time=3, events=None, instruments=None, clock=time,
+                 spec=VEHICLE):
         self.vessel = vessel
+        self.spec = compile_vehicle(spec)
+        self.events = events
+        if events is not None:
+            events.arm('solid_fuel_low')
+        self.blocking_settle = blocking_settle
+        self.settle_time = settle_time
+        self.clock = clock
+        self.instruments = instruments or LoopInstruments(clock.perf_counter, clock.sleep)
+        self.separations = 0
         self.current_stage = 1
-        self.stage_separated = [False, False, False]
-        self.stage_names = ["Твердотопливные ускорители", "Вторая ступень", "Третья ступень"]
+        self.stage_names = [stage['name'] for stage in self.spec['stages']] + [self.spec['payload']['name']]
+        self.stage_separated = [False] * len(self.stage_names)
 
-    def get_current_stage_resources(self):
+    def get_current_stage_resources(self, snap):
         try:
-            all_resources = self.vessel.resources
-            current_stage = self.vessel.control.current_stage
+            current_stage = snap.current_stage
 
-            liquid_fuel = all_resources.amount('LiquidFuel')
-            oxidizer = all_resources.amount('Oxidizer')
-            solid_fuel = all_resources.amount('SolidFuel')
+            liquid_fuel = snap.liquid_fuel
+            oxidizer = snap.oxidizer
+            solid_fuel = snap.solid_fuel
 
             print(
                 f"Стадия {current_stage}: Жидкое топливо: {liquid_fuel:.1f}, Окислитель: {oxidizer:.1f}, Твердое: {solid_fuel:.1f}")
@@ -75,33 +453,46 @@ class RocketStager:
             print(f"Ошибка получения ресурсов: {e}")
             return 0, 0, 0
 
-    def check_stage_1_separation(self):
+    def stage_spent(self, stage, snap):
+        # Условие из описания ракеты: все ресурсы ступени выработаны или тяга пропала
+        trigger = self.spec['stages'][stage]['trigger']
+        if all(getattr(snap, RESOURCES[name]) <= trigger['at_most'] for name in trigger['resources']):
+            return True
+        return 'thrust_below' in trigger and snap.available_thrust < trigger['thrust_below']
+
+    def check_stage_1_separation(self, snap):
         if self.stage_separated[0]:
             return False
+        if self.events is not None and not self.events.fired('solid_fuel_low'):
+            return False
 
-        solid_fuel, liquid_fuel, oxidizer = self.get_current_stage_resources()
+        solid_fuel, liquid_fuel, oxidizer = self.get_current_stage_resources(snap)
 
-        if solid_fuel <= 5.0:
+        if self.stage_spent(0, snap):
             print(f"СТУПЕНЬ 1: Твердое топливо израсходовано ({solid_fuel:.1f})! Отделение ускорителей.")
             self.separate_current_stage()
             self.stage_separated[0] = True
             self.current_stage = 2
+            if self.events is not None:
+                self.events.arm('liquid_depleted')
+                self.events.arm('thrust_lost')
             print("Переход к СТУПЕНИ 2")
             return True
 
         return False
 
-    def check_stage_2_separation(self):
+    def check_stage_2_separation(self, snap):
         if self.stage_separated[1] or self.current_stage != 2:
             return False
+        if self.events is not None and not (self.events.fired('liquid_depleted')
+                                            or self.events.fired('thrust_lost')):
+            return False
 
-        solid_fuel, liquid_fuel, oxidizer = self.get_current_stage_resources()
-        available_thrust = self.vessel.available_thrust
+        solid_fuel, liquid_fuel, oxidizer = self.get_current_stage_resources(snap)
+        available_thrust = snap.available_thrust
         print(f"СТУПЕНЬ 2: Тяга: {available_thrust:.1f}, Топливо: {liquid_fuel:.1f}")
 
-        solid_fuel, liquid_fuel, oxidizer = self.get_current_stage_resources()
-        available_thrust = self.vessel.available_thrust
-        if (liquid_fuel <= 0.1 and oxidizer <= 0.1) or available_thrust < 1:
+        if self.stage_spent(1, snap):
             print(f"СТУПЕНЬ 3: Топливо полностью израсходовано!")
             self.vessel.control.throttle = 0.0
             self.stage_separated[2] = True
@@ -110,333 +501,220 @@ class RocketStager:
         return False
 
     def separate_current_stage(self):
+        instruments = self.instruments
+        started = instruments.clock()
         print(f"Активация разделения ступени {self.vessel.control.current_stage}")
         self.vessel.control.activate_next_stage()
-        time.sleep(3)
+        self.separations += 1
+        if self.blocking_settle:
+            self.clock.sleep(self.settle_time)
 
         new_stage = self.vessel.control.current_stage
         print(f"Новая текущая ступень: {new_stage}")
+        instruments.record('staging.stall', instruments.clock() - started)
 
-    def manage_all_stages(self):
+    def manage_all_stages(self, snap):
         if self.current_stage == 1:
-            return self.check_stage_1_separation()
+            return self.check_stage_1_separation(snap)
         elif self.current_stage == 2:
-            return self.check_stage_2_separation()
+            return self.check_stage_2_separation(snap)
         elif self.current_stage == 3:
-            return self.check_stage_3_separation()
+            return self.check_stage_3_separation(snap)
         return False
 
 
-def check_circularization():
-    if vessel is None:
-        return False
-    apoapsis = vessel.orbit.apoapsis_altitude
-    periapsis = vessel.orbit.periapsis_altitude
-
-    if apoapsis >= TARGET_ALTITUDE and periapsis < TARGET_ALTITUDE - 10000:
-        return True
-    return False
-
-
-def circularize_orbit():
-    if vessel is None or ap is None:
-        return
-
-
-    ap.target_pitch_and_heading(0, 90)
-    time.sleep(2)
-
-    while vessel.orbit.time_to_apoapsis > 60:
-        time.sleep(1)
-
-    while vessel.orbit.time_to_apoapsis > 10:
-        time.sleep(0.1)
-
-    vessel.control.throttle = 1.0
 
-    start_time = time.time()
-    while vessel.orbit.periapsis_altitude < TARGET_ALTITUDE - 1000:
-        if time.time() - start_time > 180:
-            break
+class CsvLogWriter:
+    def __init__(self, path, format_row):
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.format_row = format_row
 
-        apoapsis = vessel.orbit.apoapsis_altitude
-        periapsis = vessel.orbit.periapsis_altitude
+    def append(self, rows):
+        self.writer.writerows(self.format_row(row) for row in rows)
 
-        if periapsis > TARGET_ALTITUDE - 5000:
-            vessel.control.throttle = 0.5
-        if periapsis > TARGET_ALTITUDE - 2000:
-            vessel.control.throttle = 0.2
+    def flush(self):
+        self.file.flush()
 
-        print(f"Апо: {apoapsis / 1000:.1f}км, Пери: {periapsis / 1000:.1f}км")
-        time.sleep(0.5)
-
-    vessel.control.throttle = 0.0
-
-    apoapsis = vessel.orbit.apoapsis_altitude
-    periapsis = vessel.orbit.periapsis_altitude
-    print(f"Итоговая орбита: Апоцентр {apoapsis / 1000:.1f}км, Перицентр {periapsis / 1000:.1f}км")
+    def close(self):
+        self.file.close()
 
 
 class DataLogger:
-    def __init__(self):
-        self.start_time = time.time()
-        self.data_dir = "flight_data"
+    def __init__(self, buffered=False, buffer_size=4096, batch_size=100, flush_interval=1.0, backend='csv',
+                 data_dir='flight_data', clock=time):
+        if backend not in ('csv', 'binary'):
+            raise ValueError(f"Неизвестный формат журнала: {backend}")
+        self.clock = clock
+        self.start_time = clock.time()
+        self.data_dir = data_dir
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
 
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        self.data_file = os.path.join(self.data_dir, f"flight_data_{timestamp}.csv")
-
-        with open(self.data_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(['time', 'velocity', 'mass', 'altitude', 'thrust', 'stage'])
+        self.backend = backend
+        extension = 'csv' if backend == 'csv' else 'bin'
+        self.data_file = os.path.join(self.data_dir, f"flight_data_{timestamp}.{extension}")
+        suffix = 1
+        while os.path.exists(self.data_file):
+            # Повторный полёт того же сеанса в ту же секунду
+            suffix += 1
+            self.data_file = os.path.join(self.data_dir, f"flight_data_{timestamp}_{suffix}.{extension}")
+
+        if backend == 'csv':
+            with open(self.data_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(flightlog.CSV_HEADER)
+        else:
+            with open(self.data_file, 'wb') as f:
+                f.write(flightlog.encode_header())
 
         print(f"Файл для записи данных создан: {self.data_file}")
 
-    def save_data(self, vessel):
-        if vessel is None:
+        self.buffered = buffered
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.written = 0
+        self.max_depth = 0
+        self.closed = False
+        self._condition = threading.Condition()
+        self._writer_thread = None
+        if buffered:
+            self._writer_thread = threading.Thread(target=self._writer_loop, name="DataLogger", daemon=True)
+            self._writer_thread.start()
+
+    def _row(self, snap):
+        return (
+            # Время кадра телеметрии, к которому относятся значения, на тех же часах, что и start_time
+            snap.time - self.start_time,
+            snap.speed,
+            snap.mass,
+            snap.mean_altitude,
+            snap.available_thrust,
+            snap.current_stage,
+        )
+
+    @staticmethod
+    def _format(row):
+        return [f"{x:.2f}" for x in row[:-1]] + [f"{row[-1]}"]
+
+    def _open_writer(self):
+        if self.backend == 'binary':
+            return flightlog.BinaryLogWriter(self.data_file)
+        return CsvLogWriter(self.data_file, self._format)
+
+    def save_data(self, vessel, snap):
+        if vessel is None or self.closed:
             return
 
-        current_time = time.time() - self.start_time
-        current_velocity = vessel.flight(vessel.orbit.body.reference_frame).speed
-        current_mass = vessel.mass
-        current_altitude = vessel.flight().mean_altitude
-        current_thrust = vessel.available_thrust
-        current_stage = vessel.control.current_stage
-
-        with open(self.data_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                f"{current_time:.2f}",
-                f"{current_velocity:.2f}",
-                f"{current_mass:.2f}",
-                f"{current_altitude:.2f}",
-                f"{current_thrust:.2f}",
-                f"{current_stage}"
-            ])
-
-
-def launch_with_data_logging():
-    if vessel is None:
-        print("Ошибка: корабль не определен")
-        return
-
-    vessel.control.activate_next_stage()
-
-
-    data_logger = DataLogger()
-
-
-    while vessel.flight().surface_altitude < 10:
-        data_logger.save_data(vessel)
-        time.sleep(0.1)
-
-    stager = RocketStager(vessel)
-
-    while vessel.flight().mean_altitude < TURN_START_ALT:
-        manage_max_q()
-        data_logger.save_data(vessel)
-        time.sleep(0.1)
-
-
-
-    while vessel.flight().mean_altitude < TURN_END_ALT:
-        alt = vessel.flight().mean_altitude
-        frac = (alt - TURN_START_ALT) / (TURN_END_ALT - TURN_START_ALT)
-        pitch = max(0, 90 * (1 - frac))
-        ap.target_pitch_and_heading(pitch, 90)
-
-        manage_max_q()
-        stager.manage_all_stages()
-        data_logger.save_data(vessel)
-        time.sleep(0.1)
-
-    ap.target_pitch_and_heading(0, 90)
-
-
-    while vessel.orbit.apoapsis_altitude < TARGET_ALTITUDE:
-        stage_changed = stager.manage_all_stages()
-
-        data_logger.save_data(vessel)
-
-
-        if stager.current_stage == 3 and stager.stage_separated[2]:
-            print("Топливо полностью израсходовано до достижения орбиты")
-            break
-
-        time.sleep(0.1)
-
-
-    vessel.control.throttle = 0.0
-    print(f'Достигнута высота апоцентра: {vessel.orbit.apoapsis_altitude / 1000:.1f} км')
+        row = self._row(snap)
+        if not self.buffered:
+            writer = self._open_writer()
+            writer.append([row])
+            writer.close()
+            self.written += 1
+            return
 
-    if check_circularization():
-        circularize_orbit()
-    else:
-        apoapsis = vessel.orbit.apoapsis_altitude
-        periapsis = vessel.orbit.periapsis_altitude
-        print(f"Орбита: Апоцентр {apoapsis / 1000:.1f}км, Перицентр {periapsis / 1000:.1f}км")
+        # Поток управления никогда не ждёт диск: при переполнении кольцо вытесняет старейший отсчёт
+        with self._condition:
+            if len(self.buffer) == self.buffer.maxlen:
+                self.dropped += 1
+            self.buffer.append(row)
+            self.max_depth = max(self.max_depth, len(self.buffer))
+            if len(self.buffer) >= self.batch_size:
+                self._condition.notify()
+
+    def queue_depth(self):
+        return len(self.buffer)
+
+    def _take_batch(self):
+        with self._condition:
+            batch = list(self.buffer)
+            self.buffer.clear()
+        return batch
+
+    def _writer_loop(self):
+        writer = self._open_writer()
+        try:
+            while True:
+                with self._condition:
+                    if not self.closed and len(self.buffer) < self.batch_size:
+                        self._condition.wait(self.flush_interval)
+                    stopping = self.closed
+                batch = self._take_batch()
+                if batch:
+                    writer.append(batch)
+                    writer.flush()
+                    # Счётчики читаются из потока управления, поэтому меняются под тем же замком
+                    with self._condition:
+                        self.written += len(batch)
+                if stopping:
+                    return
+        finally:
+            writer.close()
+
+    def close(self):
+        if self.closed:
+            return
+        with self._condition:
+            self.closed = True
+            self._condition.notify()
+        if self._writer_thread is not None:
+            self._writer_thread.join()
+        if self.buffered:
+            print(f"Журнал: записано {self.written}, потеряно {self.dropped}, "
+                  f"максимальная очередь {self.max_depth}")
 
 
-    data_logger.save_data(vessel)
-    print(f"Данные полета сохранены в файл: {data_logger.data_file}")
+def start_live_view(data_file):
+    import dashboard
+    import plots
 
+    if not plots.has_display():
+        print("Нет дисплея, живые графики отключены")
+        return None
+    process, stop = dashboard.start(data_file)
+    print(f"Живые графики запущены в отдельном процессе (pid {process.pid})")
+    return process, stop
 
-    return data_logger.data_file
 
 
 
 def plot_from_data_file(data_file_path):
+    import plots
+
     print(f"Строим графики из файла: {os.path.basename(data_file_path)}")
 
-    times = []
-    velocities = []
-    masses = []
-    altitudes = []
-    thrusts = []
-
-    with open(data_file_path, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        next(reader)  
-
-        for row in reader:
-            if len(row) == 6:
-                times.append(float(row[0]))
-                velocities.append(float(row[1]))
-                masses.append(float(row[2]))
-                altitudes.append(float(row[3]))
-                thrusts.append(float(row[4]))
-
-    if not times:
+    paths = plots.render_flight(data_file_path)
+    if not paths:
         print("Нет данных для построения графиков!")
         return
 
-    plots_dir = "flight_plots"
-    if not os.path.exists(plots_dir):
-        os.makedirs(plots_dir)
-
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-
-
-    plt.figure(figsize=(12, 8))
-
-    plt.subplot(2, 1, 1)
-    plt.plot(times, velocities, 'b-', linewidth=2, label='Общая скорость')
-    plt.xlabel('Время (с)')
-    plt.ylabel('Скорость (м/с)', color='b')
-    plt.tick_params(axis='y', labelcolor='b')
-    plt.grid(True, alpha=0.3)
-    plt.legend(loc='upper left')
-
-    ax2 = plt.gca().twinx()
-    ax2.plot(times, [h / 1000 for h in altitudes], 'r-', linewidth=2, label='Высота')
-    ax2.set_ylabel('Высота (км)', color='r')
-    ax2.tick_params(axis='y', labelcolor='r')
-    ax2.legend(loc='upper right')
-    plt.title('Общая скорость и Высота')
-
-
-    plt.subplot(2, 1, 2)
-    plt.plot(times, masses, 'g-', linewidth=2, label='Масса')
-    plt.xlabel('Время (с)')
-    plt.ylabel('Масса (т)', color='g')
-    plt.tick_params(axis='y', labelcolor='g')
-    plt.grid(True, alpha=0.3)
-    plt.legend(loc='upper left')
-
-    ax4 = plt.gca().twinx()
-    ax4.plot(times, [t / 1000 for t in thrusts], 'orange', linewidth=2, label='Тяга')
-    ax4.set_ylabel('Тяга (кН)', color='orange')
-    ax4.tick_params(axis='y', labelcolor='orange')
-    ax4.legend(loc='upper right')
-    plt.title('Масса и Тяга')
-
-    plt.tight_layout()
-
-    combined_filename = os.path.join(plots_dir, f"combined_plot_{timestamp}.png")
-    plt.savefig(combined_filename, dpi=300, bbox_inches='tight')
-    print(f"Комбинированный график сохранен: {combined_filename}")
-
-
-    plot_individual_graphs(times, velocities, masses, altitudes, thrusts, plots_dir, timestamp)
-
-    plt.show()
-
-
-def plot_individual_graphs(times, velocities, masses, altitudes, thrusts, plots_dir, timestamp):
-    plt.figure(figsize=(10, 6))
-    plt.plot(times, velocities, 'b-', linewidth=2)
-    plt.xlabel('Время (с)')
-    plt.ylabel('Общая скорость (м/с)')
-    plt.title('Общая скорость ракеты')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(os.path.join(plots_dir, f"velocity_{timestamp}.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-
-    plt.figure(figsize=(10, 6))
-    plt.plot(times, [h / 1000 for h in altitudes], 'r-', linewidth=2)
-    plt.xlabel('Время (с)')
-    plt.ylabel('Высота (км)')
-    plt.title('Высота полета')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(os.path.join(plots_dir, f"altitude_{timestamp}.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-
-    plt.figure(figsize=(10, 6))
-    plt.plot(times, masses, 'g-', linewidth=2)
-    plt.xlabel('Время (с)')
-    plt.ylabel('Масса (кг)')
-    plt.title('Масса ракеты')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(os.path.join(plots_dir, f"mass_{timestamp}.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-
-    plt.figure(figsize=(10, 6))
-    plt.plot(times, [t / 1000 for t in thrusts], 'orange', linewidth=2)
-    plt.xlabel('Время (с)')
-    plt.ylabel('Тяга (кН)')
-    plt.title('Тяга двигателей')
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(os.path.join(plots_dir, f"thrust_{timestamp}.png"), dpi=300, bbox_inches='tight')
-    plt.close()
-
+    print(f"Комбинированный график сохранен: {paths['combined']}")
     print("Отдельные графики сохранены")
 
+    if plots.has_display():
+        import matplotlib.pyplot as plt
 
-if __name__ == '__main__':
-    try:
-
-
-        if not setup_staging():
-            print("Не удалось инициализировать автопилот")
-            exit(1)
-
-        data_file = launch_with_data_logging()
-
-        if ap and hasattr(ap, 'engaged'):
-            if ap.engaged:
-                ap.disengage()
-        elif ap:
-            ap.disengage()
-
-        if vessel:
-            vessel.control.sas = True
+        fig = plt.figure(figsize=plots.COMBINED_SIZE)
+        plots.draw_combined(fig, plots.prepare(data_file_path, fig.dpi)['combined'])
+        plt.show()
 
 
+def fly(scheduler=False, plot=True, live=False):
+    session = FlightSession()
+    if not session.setup_staging():
+        print("Не удалось инициализировать автопилот")
+        exit(1)
 
+    data_file = session.run(scheduler, live)
+    session.close()
+    if plot and data_file:
         plot_from_data_file(data_file)
+    return data_file
 
-    except Exception as e:
-        print(f"Ошибка во время выполнения: {e}")
-        try:
-            if vessel:
-                vessel.control.throttle = 0.0
-            if ap:
-                ap.disengage()
-        except:
 
-            pass
+if __name__ == '__main__':
+    fly('--scheduler' in sys.argv, live='--live' in sys.argv)
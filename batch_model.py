@@ -0,0 +1,220 @@
+from math import pi
+
+import numpy as np
+
+from vehicle import model_params as vehicle_params
+
+
+G = 6.67408 * 10 ** -11
+M = 5.2915793 * 10 ** 22
+R = 600_000
+
+PHASE_CLIMB = 1
+PHASE_TURN_1 = 2
+PHASE_TURN_2 = 3
+PHASE_ORBIT = 4
+PHASE_DONE = 5
+
+# Масса, тяга и мидель ступеней берутся из описания ракеты в vehicle.py
+VEHICLE_PARAMS = vehicle_params()
+DEFAULT_PARAMS = {
+    'Mr': VEHICLE_PARAMS['Mr'],
+    'M0': VEHICLE_PARAMS['M0'],
+    'T1': VEHICLE_PARAMS['T1'],
+    's1': VEHICLE_PARAMS['s1'],
+    'Ft1': VEHICLE_PARAMS['Ft1'],
+    'alpha1': 85,
+    'tpov': 20,
+    'm2': VEHICLE_PARAMS['m2'],
+    'M2': VEHICLE_PARAMS['M2'],
+    'T2': VEHICLE_PARAMS['T2'],
+    's2': VEHICLE_PARAMS['s2'],
+    'Ft2': VEHICLE_PARAMS['Ft2'],
+    'alpha2': 0,
+    'tpov2': 34,
+    'cf': 0.48,
+    'pa': 1.225,
+    'T': 75,
+    'h_turn_1': 2800,
+    'h_turn_2': 16_500,
+    'h_orbit': 50_000,
+    'h_window_1': 2995,
+    'h_window_2': 16_800,
+    'h_atm': 70_000,
+    't_coast': 75,
+    't_burn': 268,
+    't_end': 293,
+    'throttle': 1.0,
+    'q_limit': 20_000,
+    'h_q_min': 5000,
+    'h_q_max': 15_000,
+}
+
+
+def g(h):
+    return G * M / (R + h) ** 2
+
+
+def F_sopr(h, v, cf, p, s, h_atm=70_000):
+    return np.where(h >= h_atm, 0.0, (cf * (p * s) * v ** 2) / 2)
+
+
+def broadcast_params(params=None):
+    merged = dict(DEFAULT_PARAMS)
+    if params:
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise KeyError(f"Неизвестные параметры модели: {', '.join(sorted(unknown))}")
+        merged.update(params)
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(merged[name], dtype=float)).ravel()
+                                   for name in DEFAULT_PARAMS])
+    return {name: np.array(a) for name, a in zip(DEFAULT_PARAMS, arrays)}
+
+
+def initial_state(prm):
+    n = prm['Mr'].size
+    zeros = np.zeros(n)
+    return {
+        'phase': np.full(n, PHASE_CLIMB, dtype=np.int8),
+        'h': zeros.copy(),
+        'vx': zeros.copy(),
+        'vy': zeros.copy(),
+        'v': zeros.copy(),
+        'm': prm['Mr'].copy(),
+        'k': (prm['Mr'] - prm['M0']) / prm['T1'],
+        's': prm['s1'].copy(),
+        'Ft': prm['Ft1'].copy(),
+        'alpha': np.full(n, 90.0),
+        'alpha0': np.full(n, 90.0),
+        'alpha1': prm['alpha1'].copy(),
+        'tpov': prm['tpov'].copy(),
+        't_start': zeros.copy(),
+    }
+
+
+def advance_phases(state, prm, t):
+    phase = state['phase']
+    h = state['h']
+
+    # Начало первого поворота засчитывается, только если шаг попал в окно по высоте
+    sel = (phase == PHASE_CLIMB) & (h >= prm['h_turn_1'])
+    if sel.any():
+        in_window = h <= prm['h_window_1']
+        state['t_start'] = np.where(sel, np.where(in_window, t, 0.0), state['t_start'])
+        state['alpha0'] = np.where(sel, state['alpha'], state['alpha0'])
+        state['alpha1'] = np.where(sel, prm['alpha1'], state['alpha1'])
+        state['tpov'] = np.where(sel, prm['tpov'], state['tpov'])
+        phase[sel] = PHASE_TURN_1
+
+    sel = (phase == PHASE_TURN_1) & ~((prm['h_turn_1'] <= h) & (h < prm['h_turn_2']))
+    if sel.any():
+        state['m'] = np.where(sel, prm['m2'], state['m'])
+        state['k'] = np.where(sel, (prm['m2'] - prm['M2']) / prm['T2'], state['k'])
+        state['s'] = np.where(sel, prm['s2'], state['s'])
+        state['Ft'] = np.where(sel, prm['Ft2'], state['Ft'])
+        in_window = sel & (prm['h_turn_2'] <= h) & (h <= prm['h_window_2'])
+        state['t_start'] = np.where(in_window, t, state['t_start'])
+        state['tpov'] = np.where(in_window, prm['tpov2'], state['tpov'])
+        state['alpha0'] = np.where(sel, state['alpha'], state['alpha0'])
+        state['alpha1'] = np.where(sel, prm['alpha2'], state['alpha1'])
+        phase[sel] = PHASE_TURN_2
+
+    sel = (phase == PHASE_TURN_2) & ~((prm['h_turn_2'] <= h) & (h < prm['h_orbit']))
+    phase[sel] = PHASE_ORBIT
+
+    sel = (phase == PHASE_ORBIT) & ~((h >= prm['h_orbit']) & (t < prm['t_end']))
+    phase[sel] = PHASE_DONE
+
+
+def step(state, prm, t):
+    phase = state['phase']
+    h, vx, vy, v, m = state['h'], state['vx'], state['vy'], state['v'], state['m']
+    Ft, k = state['Ft'], state['k']
+    active = phase < PHASE_DONE
+    turning = (phase == PHASE_TURN_1) | (phase == PHASE_TURN_2)
+
+    b = (state['alpha0'] - state['alpha1']) / state['tpov']
+    alpha = np.where(turning, state['alpha0'] - (b * (t - state['t_start'])), state['alpha'])
+    t += 1
+    p = prm['pa'] - t * prm['pa'] / prm['T']
+    # Ограничение тяги на участке max Q, как в manage_max_q автопилота
+    limited = ((phase == PHASE_CLIMB) | turning) & (prm['h_q_min'] < h) & (h < prm['h_q_max']) \
+        & (p * v ** 2 / 2 > prm['q_limit'])
+    thr = np.where(limited, prm['throttle'], 1.0)
+    Ft = Ft * thr
+    k = k * thr
+    drag = F_sopr(h, v, prm['cf'], p, state['s'], prm['h_atm'])
+    gh = g(h)
+    rad = alpha / 180 * pi
+    cos_a = np.cos(rad)
+    sin_a = np.sin(rad)
+
+    ax = np.where(phase == PHASE_TURN_1, np.abs((Ft - drag) * cos_a / m), 0.0)
+    ax = np.where(phase == PHASE_TURN_2, np.abs((Ft * cos_a - drag) / m), ax)
+    ay = np.where(turning,
+                  np.abs((Ft - drag - m * gh) * sin_a / m),
+                  np.abs((Ft - drag) * 1 - m * gh) / m)
+
+    orbit = phase == PHASE_ORBIT
+    coasting = (t >= prm['t_coast']) & (t <= prm['t_burn'])
+    ax = np.where(orbit & (t > prm['t_burn']), Ft / m, np.where(orbit, 0.0, ax))
+    ay = np.where(orbit, -gh, ay)
+
+    new_vx = vx + ax
+    new_vy = vy + ay
+    new_h = h + new_vy + ay / 2
+    new_v = (new_vx ** 2 + new_vy ** 2) ** 0.5
+    new_m = np.where(orbit & coasting, m, m - k)
+
+    state['alpha'] = np.where(active, alpha, state['alpha'])
+    state['vx'] = np.where(active, new_vx, vx)
+    state['vy'] = np.where(active, new_vy, vy)
+    state['h'] = np.where(active, new_h, h)
+    state['v'] = np.where(active, new_v, v)
+    state['m'] = np.where(active, new_m, m)
+    return t
+
+
+def simulate_batch(params=None, max_steps=1000, record=True):
+    prm = broadcast_params(params)
+    state = initial_state(prm)
+    n = prm['Mr'].size
+
+    h_cols, v_cols, m_cols, phase_cols = [], [], [], []
+    n_steps = np.zeros(n, dtype=np.int64)
+
+    t = 0
+    for _ in range(max_steps):
+        advance_phases(state, prm, t)
+        active = state['phase'] < PHASE_DONE
+        if not active.any():
+            break
+        phase = state['phase'].copy()
+        t = step(state, prm, t)
+        n_steps += active
+        if record:
+            h_cols.append(np.where(active, state['h'], np.nan))
+            v_cols.append(np.where(active, state['v'], np.nan))
+            m_cols.append(np.where(active, state['m'], np.nan))
+            phase_cols.append(np.where(active, phase, 0))
+    else:
+        advance_phases(state, prm, t)
+
+    result = {
+        't_res': np.arange(1, t + 1, dtype=float),
+        'n_steps': n_steps,
+        'phase': state['phase'],
+        'h': state['h'],
+        'vx': state['vx'],
+        'vy': state['vy'],
+        'v': state['v'],
+        'm': state['m'],
+        'alpha': state['alpha'],
+    }
+    if record:
+        empty = np.empty((n, 0))
+        result['h_res'] = np.stack(h_cols, axis=1) if h_cols else empty
+        result['v_res'] = np.stack(v_cols, axis=1) if v_cols else empty
+        result['m_res'] = np.stack(m_cols, axis=1) if m_cols else empty
+        result['phase_res'] = np.stack(phase_cols, axis=1) if phase_cols else empty.astype(np.int8)
+    return result
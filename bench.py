@@ -0,0 +1,343 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import matplotlib
+import numpy as np
+
+DEFAULT_REPEAT = 9
+# Допуск регрессии - несколько разбросов замера, но не меньше MIN_THRESHOLD: шумные замеры (запись на диск,
+# отрисовка) получают допуск шире, стабильные вычисления - уже
+MIN_THRESHOLD = 0.05
+SPREAD_FACTOR = 2
+PLOT_ROWS = {'plot_10k': 10_000, 'plot_100k': 100_000, 'plot_1m': 1_000_000}
+
+
+@contextlib.contextmanager
+def workdir():
+    # DataLogger и графики пишут в относительные папки, поэтому каждый замер идёт во временном каталоге
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            yield tmp
+        finally:
+            os.chdir(cwd)
+
+
+def measure(func, repeat, warmup=1, min_time=0.1):
+    # Первые прогоны прогревают кэши, ленивые импорты и аллокатор и в замер не идут
+    for _ in range(warmup):
+        started = time.perf_counter()
+        func()
+        once = time.perf_counter() - started
+    # Короткий вызов повторяется, пока замер не займёт min_time: в замерах по несколько миллисекунд
+    # разовая задержка планировщика сравнима с самим замером. В runs - время одного вызова
+    loops = max(1, int(min_time / once) + 1) if warmup and once < min_time else 1
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        runs.append((time.perf_counter() - started) / loops)
+    return runs
+
+
+def spread(runs):
+    # Относительный размах: насколько худший прогон медленнее лучшего. Медиана его занижает, когда машина
+    # то ускоряется, то замедляется на время целой серии
+    best = min(runs)
+    return (max(runs) - best) / best if best > 0 else 0.0
+
+
+def rate(count, runs, unit):
+    # Лучший прогон: помехи (планировщик, другие процессы) только замедляют, поэтому минимум времени
+    # устойчивее медианы
+    return {'value': count / min(runs), 'unit': unit, 'higher_is_better': True, 'spread': spread(runs),
+            'runs': [count / r for r in runs]}
+
+
+def duration(runs, unit='с'):
+    return {'value': min(runs), 'unit': unit, 'higher_is_better': False, 'spread': spread(runs), 'runs': runs}
+
+
+def bench_model(repeat, runs=100):
+    from batch_model import simulate_batch
+    from mat_model import run_model
+
+    # Один прогон mat_model короче миллисекунды, поэтому замер идёт по серии прогонов
+    steps = len(run_model()['t_res'])
+    results = {'model_steps': rate(steps * runs, measure(lambda: [run_model() for _ in range(runs)], repeat),
+                                   'шаг/с')}
+
+    steps = int(simulate_batch()['n_steps'][0])
+    results['model_batch_steps'] = rate(steps, measure(simulate_batch, repeat), 'шаг/с')
+
+    params = {'cf': np.linspace(0.3, 0.6, 1000)}
+    total = int(simulate_batch(params, record=False)['n_steps'].sum())
+    runs = measure(lambda: simulate_batch(params, record=False), repeat)
+    results['model_batch_1000'] = rate(total, runs, 'шаг траектории/с')
+    results.update(bench_checkpoints(repeat))
+    return results
+
+
+def bench_checkpoints(repeat, n=50):
+    from mat_model import PhaseCheckpoints, run_model
+
+    # Перебор настроек второй ступени: с контрольными точками первая ступень считается один раз на серию
+    sweep = [{'tpov2': tpov2} for tpov2 in np.linspace(20, 60, n)]
+    def resumed_sweep():
+        checkpoints = PhaseCheckpoints()
+        return [run_model(params, checkpoints) for params in sweep]
+
+    full = measure(lambda: [run_model(params) for params in sweep], repeat)
+    resumed = measure(resumed_sweep, repeat)
+    return {'model_sweep_full': rate(n, full, 'прогон/с'), 'model_sweep_checkpoints': rate(n, resumed, 'прогон/с')}
+
+
+def fake_autopilot():
+    import autopilot
+    import fake_krpc
+    from telemetry import TelemetryHub
+
+    conn = fake_krpc.connect('bench')
+    vessel = conn.space_center.active_vessel
+    vessel.state.update(mean_altitude=20_000.0, surface_altitude=20_000.0, dynamic_pressure=15_000.0,
+                        speed=700.0, apoapsis_altitude=60_000.0)
+    session = autopilot.FlightSession('bench')
+    session.conn = conn
+    session.vessel = vessel
+    session.ap = vessel.auto_pilot
+    session.telemetry = TelemetryHub(conn, vessel)
+    return autopilot, session, conn, vessel
+
+
+def bench_control_tick(repeat, ticks=2000):
+    with workdir(), contextlib.redirect_stdout(io.StringIO()):
+        autopilot, session, conn, vessel = fake_autopilot()
+        telemetry = session.telemetry
+        # Очередь с запасом на прогрев и повторы коротких замеров, чтобы журнал не терял отсчёты
+        logger = autopilot.DataLogger(buffered=True, buffer_size=ticks * (repeat + 1) * 8)
+        stager = autopilot.RocketStager(vessel)
+        done = []
+
+        def loop():
+            # Тело цикла гравитационного разворота из launch_with_data_logging без time.sleep
+            done.append(ticks)
+            for _ in range(ticks):
+                snap = telemetry.snapshot()
+                alt = snap.mean_altitude
+                frac = (alt - autopilot.TURN_START_ALT) / (autopilot.TURN_END_ALT - autopilot.TURN_START_ALT)
+                session.ap.target_pitch_and_heading(max(0, 90 * (1 - frac)), 90)
+                session.manage_max_q(snap)
+                stager.manage_all_stages(snap)
+                logger.save_data(vessel, snap)
+
+        rpc_before = conn.rpc_count
+        runs = measure(loop, repeat)
+        rpcs = (conn.rpc_count - rpc_before) / sum(done)
+        logger.close()
+        telemetry.close()
+
+    result = duration([r / ticks * 1e6 for r in runs], 'мкс/такт')
+    result['rpc_per_tick'] = rpcs
+    return {'control_tick': result}
+
+
+def bench_logger(repeat, samples=20_000):
+    results = {}
+    cases = {
+        'logger_csv_unbuffered': dict(buffered=False, backend='csv'),
+        'logger_csv_buffered': dict(buffered=True, backend='csv'),
+        'logger_binary_buffered': dict(buffered=True, backend='binary'),
+    }
+    with workdir(), contextlib.redirect_stdout(io.StringIO()):
+        autopilot, session, conn, vessel = fake_autopilot()
+        snap = session.telemetry.snapshot()
+        for name, options in cases.items():
+            count = samples // 10 if not options['buffered'] else samples
+
+            def run():
+                # Замер до полного слива буфера на диск, а не только до постановки в очередь
+                os.makedirs('flight_data', exist_ok=True)
+                for path in os.listdir('flight_data'):
+                    os.remove(os.path.join('flight_data', path))
+                logger = autopilot.DataLogger(buffer_size=count + 1, **options)
+                for _ in range(count):
+                    logger.save_data(vessel, snap)
+                logger.close()
+
+            results[name] = rate(count, measure(run, repeat), 'отсчёт/с')
+        session.telemetry.close()
+    return results
+
+
+def predictor_states(n=200):
+    # Состояния разгона второй ступени от конца поворота до отсечки: апоцентр растёт от 60 до 149 км
+    k = np.linspace(0, 1, n)
+    mass = 6100 - 2300 * k
+    return [{
+        'time': 60 + 35 * x,
+        'altitude': 45_000 + 25_000 * x,
+        'apoapsis': 60_000 + 89_000 * x,
+        'periapsis': -500_000 + 200_000 * x,
+        'mass': m,
+        'thrust': 253_500.0,
+        'propellant': m - 2000,
+    } for x, m in zip(k, mass)]
+
+
+def bench_predictor(repeat, budget=0.01):
+    from predictor import AscentPredictor, PredictorRunner
+
+    states = predictor_states()
+    runner = PredictorRunner(AscentPredictor(budget=budget), background=False)
+    runs = measure(lambda: [runner.submit(state) for state in states], repeat)
+    stats = runner.stats()
+    result = rate(len(states), runs, 'прогноз/с')
+    result.update(p99_ms=stats['p99'] * 1000, budget_ms=budget * 1000,
+                  over_budget_share=stats['over_budget'] / stats['computed'])
+    return {'predictor': result}
+
+
+def synthetic_log(path, rows, backend='csv'):
+    import flightlog
+
+    t = np.linspace(0, 300, rows)
+    data = np.zeros(rows, dtype=flightlog.DTYPE)
+    data['time'] = t
+    data['velocity'] = 7 * t + np.sin(t)
+    data['mass'] = 33_165 - 90 * t
+    data['altitude'] = 1.7 * t ** 2
+    data['thrust'] = np.where(t < 42, 825_000, 253_500)
+    data['stage'] = np.where(t < 42, 3, 2)
+    with open(path, 'wb') as f:
+        f.write(flightlog.encode_header())
+        f.write(data.tobytes())
+    if backend == 'csv':
+        csv_path = flightlog.binary_to_csv(path)
+        os.remove(path)
+        return csv_path
+    return path
+
+
+def bench_plots(repeat, sizes=PLOT_ROWS, backend='csv'):
+    import autopilot
+    import plots
+
+    results = {}
+    has_display = plots.has_display
+    plots.has_display = lambda: False
+    try:
+        with workdir(), contextlib.redirect_stdout(io.StringIO()):
+            for name, rows in sizes.items():
+                path = synthetic_log(f"{name}.bin", rows, backend)
+                results[name] = duration(measure(lambda: autopilot.plot_from_data_file(path), repeat))
+                results[name]['rows'] = rows
+    finally:
+        plots.has_display = has_display
+    return results
+
+
+BENCHMARKS = {
+    'model': bench_model,
+    'control': bench_control_tick,
+    'logger': bench_logger,
+    'plots': bench_plots,
+    'predictor': bench_predictor,
+}
+
+
+def run(names=None, repeat=DEFAULT_REPEAT, quick=False):
+    results = {}
+    for name in names or BENCHMARKS:
+        if name == 'plots':
+            sizes = {'plot_10k': PLOT_ROWS['plot_10k']} if quick else PLOT_ROWS
+            results.update(bench_plots(max(1, repeat // 2), sizes))
+        else:
+            results.update(BENCHMARKS[name](repeat))
+    return {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def limit_for(res, base):
+    return max(MIN_THRESHOLD, SPREAD_FACTOR * max(res.get('spread', 0.0), base.get('spread', 0.0)))
+
+
+def check_regressions(report, baseline, threshold=None):
+    regressions = []
+    for name, res in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        limit = threshold if threshold is not None else limit_for(res, base)
+        change = res['value'] / base['value'] - 1
+        worse = -change if res['higher_is_better'] else change
+        if worse > limit:
+            regressions.append((name, base['value'], res['value'], worse, limit))
+    return regressions
+
+
+def print_report(report, baseline=None):
+    for name, res in report['results'].items():
+        line = f"{name:<26}{res['value']:>14.1f} {res['unit']}  ±{res.get('spread', 0.0):.0%}"
+        if baseline and name in baseline['results']:
+            line += f"   ({res['value'] / baseline['results'][name]['value'] - 1:+.1%} к базе)"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности модели, автопилота, журнала и графиков")
+    parser.add_argument('names', nargs='*', help=f"группы замеров: {', '.join(BENCHMARKS)} (по умолчанию все)")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--quick', action='store_true', help="только малый журнал для графиков")
+    parser.add_argument('--out', default=None, help="сохранить результаты в JSON")
+    parser.add_argument('--baseline', default=None, help="JSON предыдущего замера для сравнения")
+    parser.add_argument('--threshold', type=float, default=None,
+                        help="единый допуск регрессии вместо рассчитанного по разбросу замеров")
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"неизвестные замеры: {', '.join(sorted(unknown))}")
+
+    report = run(args.names or None, args.repeat, args.quick)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.out}")
+
+    if baseline:
+        regressions = check_regressions(report, baseline, args.threshold)
+        for name, old, new, worse, limit in regressions:
+            print(f"Регрессия {name}: {old:.1f} -> {new:.1f} (хуже на {worse:.0%}, допуск {limit:.0%})")
+        if regressions:
+            sys.exit(1)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_DIR = '.model_cache'
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+DEFAULT_MEMORY_ITEMS = 64
+
+_default = None
+
+
+def normalize(value):
+    # Одинаковые наборы параметров дают одинаковый ключ: 33165, 33165.0 и np.float64(33165) совпадают
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [normalize(v) for v in np.asarray(value).ravel().tolist()]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        value = float(value)
+        return 0.0 if value == 0 else value
+    return value
+
+
+def make_key(namespace, version, params):
+    payload = json.dumps({'namespace': namespace, 'version': version, 'params': normalize(params)},
+                         sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES, memory_items=DEFAULT_MEMORY_ITEMS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.memory = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], f"{key}.npz")
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_items:
+            self.memory.popitem(last=False)
+
+    @staticmethod
+    def _frozen(arrays):
+        # Один и тот же объект отдаётся всем вызывающим, поэтому массивы только для чтения
+        result = {}
+        for name, array in arrays.items():
+            array = np.array(array)
+            array.setflags(write=False)
+            result[name] = array
+        return result
+
+    def get(self, key):
+        with self._lock:
+            result = self.memory.get(key)
+            if result is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return result
+
+        path = self._file(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                result = self._frozen({name: data[name] for name in data.files})
+            # Время изменения файла служит отметкой последнего обращения для вытеснения
+            os.utime(path)
+        except FileNotFoundError:
+            result = None
+        except (OSError, ValueError, KeyError):
+            # Повреждённая или недописанная запись считается промахом
+            self._remove(path)
+            result = None
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        result = self._frozen(result)
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Запись во временный файл и атомарная замена: параллельные процессы не видят половину записи
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, **result)
+        try:
+            # Перезапись ключа заменяет файл: в счётчик идёт только разница размеров
+            replaced = os.path.getsize(path)
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp, path)
+        size = os.path.getsize(path) - replaced
+
+        with self._lock:
+            self.stores += 1
+            self._remember(key, result)
+            if self._disk_bytes is not None:
+                self._disk_bytes += size
+            over = self._disk_bytes is None or self._disk_bytes > self.max_bytes
+        if over:
+            self.evict()
+        return result
+
+    def cached(self, namespace, version, params, compute):
+        key = make_key(namespace, version, params)
+        result = self.get(key)
+        if result is None:
+            result = self.put(key, compute())
+        return result
+
+    def _entries(self):
+        entries = []
+        if not os.path.isdir(self.path):
+            return entries
+        for folder in os.scandir(self.path):
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith('.npz'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        # Самые давние по обращению записи удаляются, пока каталог не уложится в лимит
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            evicted += 1
+        with self._lock:
+            self.evictions += evicted
+            self._disk_bytes = total
+        return evicted
+
+    def disk_usage(self):
+        entries = self._entries()
+        return len(entries), sum(size for _, size, _ in entries)
+
+    def clear(self):
+        for _, _, path in self._entries():
+            self._remove(path)
+        with self._lock:
+            self.memory.clear()
+            self._disk_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            stats = {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                'stores': self.stores,
+                'evictions': self.evictions,
+                'memory_items': len(self.memory),
+            }
+        stats['disk_items'], stats['disk_bytes'] = self.disk_usage()
+        return stats
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"Кэш: попаданий в памяти {s['memory_hits']}, на диске {s['disk_hits']}, промахов {s['misses']} "
+              f"(доля попаданий {s['hit_rate']:.0%}); на диске {s['disk_items']} записей, "
+              f"{s['disk_bytes'] / 1024 ** 2:.1f} из {self.max_bytes / 1024 ** 2:.0f} МБ, вытеснено {s['evictions']}")
+
+
+def default_cache():
+    # Один кэш на процесс, чтобы уровень в памяти переживал повторные вызовы модели
+    global _default
+    if _default is None:
+        _default = ResultCache(os.environ.get('VARKT_CACHE_DIR', DEFAULT_DIR))
+    return _default
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Кэш результатов мат. модели")
+    parser.add_argument('--dir', default=os.environ.get('VARKT_CACHE_DIR', DEFAULT_DIR))
+    parser.add_argument('--max-mb', type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2, help="лимит каталога, МБ")
+    parser.add_argument('--clear', action='store_true', help="удалить все записи")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.dir, int(args.max_mb * 1024 ** 2))
+    if args.clear:
+        cache.clear()
+        print(f"Кэш очищен: {args.dir}")
+        return None
+    evicted = cache.evict()
+    items, size = cache.disk_usage()
+    print(f"Кэш {args.dir}: {items} записей, {size / 1024 ** 2:.1f} МБ, вытеснено {evicted}")
+    return items, size
+
+
+if __name__ == '__main__':
+    main()
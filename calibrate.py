@@ -0,0 +1,226 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch_model import DEFAULT_PARAMS, simulate_batch
+from compare import CHANNELS, find_logs, load_flights, resample
+
+# cf - коэффициент сопротивления, T - время спада плотности p = pa - t*pa/T,
+# T1/T2 - время работы ступеней (задают расходы k), tpov/tpov2 - длительность поворотов
+DEFAULT_BOUNDS = {
+    'cf': (0.05, 2.0),
+    'T': (30.0, 300.0),
+    'T1': (20.0, 80.0),
+    'T2': (30.0, 200.0),
+    'tpov': (5.0, 120.0),
+    'tpov2': (5.0, 120.0),
+}
+
+
+class FitProblem:
+    def __init__(self, flights, names, fixed=None):
+        self.names = list(names)
+        self.fixed = dict(fixed or {})
+        t_end = self.fixed.get('t_end', DEFAULT_PARAMS['t_end'])
+        self.t_grid = np.arange(1, int(t_end) + 1, dtype=float)
+        # Наблюдения интерполируются на сетку модели один раз, дальше сравниваются только массивы
+        self.observed = resample(flights, self.t_grid)
+        self.valid = ~np.isnan(self.observed)
+        self.channel = np.broadcast_to(np.arange(len(CHANNELS))[None, :, None], self.observed.shape)[self.valid]
+        # Каналы приводятся к одному масштабу, иначе масса в килограммах заглушит скорость
+        self.scale = np.array([np.nanstd(self.observed[:, c]) or 1.0 for c in range(len(CHANNELS))])
+        self.target = (self.observed / self.scale[None, :, None])[self.valid]
+
+    def predict(self, X):
+        # Та же пошаговая модель, что в mat_model и автопилоте: повороты по окнам из целых секунд.
+        # Подобранные tpov/tpov2 переносятся в них без пересчёта, а вся матрица параметров идёт одним прогоном
+        params = dict(self.fixed)
+        params.update({name: X[:, i] for i, name in enumerate(self.names)})
+        res = simulate_batch(params, max_steps=self.t_grid.size)
+        steps = res['h_res'].shape[1]
+        pred = np.zeros((X.shape[0], len(CHANNELS), self.t_grid.size))
+        for c, key in enumerate(CHANNELS.values()):
+            # Траектория, закончившаяся раньше сетки, даёт нулевой прогноз и большую невязку
+            pred[:, c, :steps] = np.nan_to_num(res[key])
+        return pred
+
+    def residuals_batch(self, X):
+        X = np.atleast_2d(X)
+        scaled = self.predict(X) / self.scale[None, :, None]
+        per_flight = np.broadcast_to(scaled[:, None], (X.shape[0],) + self.valid.shape)
+        return per_flight[:, self.valid] - self.target[None]
+
+    def residuals(self, x):
+        return self.residuals_batch(x[None])[0]
+
+    def cost_batch(self, X):
+        r = self.residuals_batch(X)
+        return 0.5 * np.einsum('ij,ij->i', r, r)
+
+
+def _fit(args):
+    from scipy.optimize import differential_evolution
+
+    problem, x0, lo, hi, seed = args
+    # Участки переключаются на целых секундах, поэтому невязка ступенчата по параметрам и градиентные методы
+    # на ней стоят. Дифференциальная эволюция обходится без производных и считает поколение одним прогоном
+    runs = []
+
+    def cost(XT):
+        # nfev векторизованной эволюции считает вызовы, а не прогоны модели
+        runs.append(XT.shape[1])
+        return problem.cost_batch(XT.T)
+
+    res = differential_evolution(cost, list(zip(lo, hi)), x0=x0, seed=seed, vectorized=True, updating='deferred',
+                                 polish=False, strategy='rand1bin', popsize=20, mutation=(0.5, 1.0), tol=1e-8,
+                                 maxiter=1000)
+    return res.x, float(res.fun), sum(runs)
+
+
+def confidence_intervals(problem, x, lo, hi, level=0.95, rounds=10, samples=1000, scan=25, seed=0):
+    from scipy.stats import chi2
+
+    # Интервал - проекция области, где сумма квадратов невязок выше минимальной не больше квантиля хи-квадрат.
+    # Область заполняется выборкой вокруг минимума: на ступенчатой невязке производные для ковариации не годятся
+    r = problem.residuals(x)
+    dof = max(1, r.size - x.size)
+    channels = np.unique(problem.channel)
+    # Шум у каналов разный, поэтому дисперсия оценивается по каждому каналу
+    base = np.array([r[problem.channel == c] @ r[problem.channel == c] for c in channels])
+    sigma2 = base / dof * r.size / np.array([np.sum(problem.channel == c) for c in channels])
+    threshold = chi2.ppf(level, 1)
+
+    def delta(X):
+        rs = problem.residuals_batch(X)
+        return sum((np.sum(rs[:, problem.channel == c] ** 2, axis=1) - b) / s2
+                   for c, b, s2 in zip(channels, base, sigma2))
+
+    # Сначала ширина области вдоль каждой оси по логарифмической сетке сдвигов: так начальная выборка
+    # сразу соразмерна чувствительности невязки к каждому параметру, от миллионных долей до всего диапазона
+    offsets = np.concatenate([-np.logspace(0, -6, scan), np.logspace(-6, 0, scan)])
+    width = np.zeros(x.size)
+    for i in range(x.size):
+        X = np.repeat(x[None], offsets.size, axis=0)
+        X[:, i] = np.clip(x[i] + offsets * (hi[i] - lo[i]), lo[i], hi[i])
+        accepted = delta(X) <= threshold
+        # Берутся только сдвиги, непрерывно примыкающие к минимуму с каждой стороны
+        left = np.cumprod(accepted[:scan][::-1])[::-1].astype(bool)
+        right = np.cumprod(accepted[scan:]).astype(bool)
+        reached = np.concatenate([X[:scan][left, i], X[scan:][right, i], [x[i]]])
+        width[i] = max(reached.max() - reached.min(), (hi[i] - lo[i]) * 1e-6)
+
+    rng = np.random.default_rng(seed)
+    cov = np.diag((width / 2) ** 2)
+    inside = x[None]
+    for _ in range(rounds):
+        X = np.clip(rng.multivariate_normal(x, cov, samples), lo, hi)
+        accepted = X[delta(X) <= threshold]
+        inside = np.vstack([inside, accepted])
+        if len(inside) > 4 * x.size:
+            # Следующая выборка шире найденной области, чтобы дойти до её границ; пока принимается больше
+            # половины точек, граница ещё далеко
+            grow = 16 if len(accepted) > samples / 2 else 4
+            cov = np.cov(inside.T) * grow + np.diag(((hi - lo) * 1e-9) ** 2)
+        else:
+            cov *= 0.1 if len(accepted) < 0.05 * samples else 4
+    # Случайные точки в многомерной области почти не доходят до её краёв по отдельной оси. Край по оси i
+    # лежит в направлении C·e_i, где C - ковариация принятых точек, туда и идёт поиск границы от минимума
+    shape = np.cov(inside.T).reshape(x.size, x.size) if len(inside) > x.size else np.diag((width / 2) ** 2)
+    reach = np.geomspace(1e-2, 1e2, scan * 8)
+    edges = []
+    for i in range(x.size):
+        direction = shape[:, i] / np.sqrt(shape[i, i]) if shape[i, i] > 0 else np.eye(x.size)[i] * width[i]
+        for sign in (-1, 1):
+            X = np.clip(x + sign * reach[:, None] * direction, lo, hi)
+            accepted = np.cumprod(delta(X) <= threshold).astype(bool)
+            edges.append(X[accepted])
+    inside = np.vstack([inside] + edges)
+    ci_lo, ci_hi = inside.min(axis=0), inside.max(axis=0)
+    # Параметр, область которого упирается в обе границы поиска, по данным не определяется
+    undetermined = (ci_lo <= lo) & (ci_hi >= hi)
+    ci_lo[undetermined], ci_hi[undetermined] = -np.inf, np.inf
+    return ci_lo, ci_hi, rounds * samples + x.size * 2 * scan * 9
+
+
+def residual_table(problem, x):
+    err = problem.predict(x[None])[0][None] - problem.observed
+    with np.errstate(invalid='ignore'):
+        rmse = np.sqrt(np.nanmean(err ** 2, axis=-1))
+    return err, rmse
+
+
+def calibrate(flights, bounds=None, starts=4, workers=None, seed=0, fixed=None, level=0.95):
+    bounds = dict(bounds or DEFAULT_BOUNDS)
+    names = list(bounds)
+    unknown = set(names) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise KeyError(f"Неизвестные параметры модели: {', '.join(sorted(unknown))}")
+    problem = FitProblem(flights, names, fixed)
+    lo = np.array([bounds[name][0] for name in names])
+    hi = np.array([bounds[name][1] for name in names])
+
+    # Первый старт включает в популяцию текущие ручные значения модели, остальные отличаются только seed
+    x0 = np.clip([DEFAULT_PARAMS[name] for name in names], lo, hi)
+    jobs = [(problem, x0 if i == 0 else None, lo, hi, seed + i) for i in range(starts)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [_fit(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_fit, jobs))
+
+    x, cost, _ = min(results, key=lambda r: r[1])
+    ci_lo, ci_hi, samples = confidence_intervals(problem, x, lo, hi, level, seed=seed)
+    residuals, rmse = residual_table(problem, x)
+    return {
+        'params': {name: float(v) for name, v in zip(names, x)},
+        'ci': {name: (float(a), float(b)) for name, a, b in zip(names, ci_lo, ci_hi)},
+        'level': level,
+        'cost': cost,
+        't_grid': problem.t_grid,
+        'residuals': residuals,
+        'rmse': rmse,
+        'starts': [(dict(zip(names, r[0])), r[1]) for r in results],
+        'evaluations': sum(r[2] for r in results) + samples,
+    }
+
+
+def print_fit(fit, names=None):
+    print(f"{'параметр':>10} {'исходное':>12} {'подобрано':>12}   доверительный интервал {fit['level'] * 100:.0f}%")
+    for name, value in fit['params'].items():
+        lo, hi = fit['ci'][name]
+        interval = f"[{lo:.4f}; {hi:.4f}]" if np.isfinite(hi - lo) else "не определяется по данным"
+        print(f"{name:>10} {DEFAULT_PARAMS[name]:>12.4f} {value:>12.4f}   {interval}")
+    print(f"Сумма квадратов невязок {2 * fit['cost']:.3f}, вычислений модели {fit['evaluations']}")
+    for i in range(fit['rmse'].shape[0]):
+        label = names[i] if names else f"полёт {i + 1}"
+        errors = ', '.join(f"{channel} {rmse:.1f}" for channel, rmse in zip(CHANNELS, fit['rmse'][i]))
+        print(f"{label}: RMSE {errors}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Подбор коэффициентов мат. модели по журналам полётов")
+    parser.add_argument('paths', nargs='*', default=["flight_data"], help="журналы или папки с журналами")
+    parser.add_argument('--params', nargs='*', default=None, help="параметры для подбора (по умолчанию все)")
+    parser.add_argument('--starts', type=int, default=4)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.paths:
+        paths.extend(find_logs(path) if os.path.isdir(path) else [path])
+    if not paths:
+        print("Журналы полётов не найдены")
+        return None
+
+    bounds = DEFAULT_BOUNDS if args.params is None else {name: DEFAULT_BOUNDS[name] for name in args.params}
+    fit = calibrate(load_flights(paths), bounds, args.starts, args.workers, args.seed)
+    print_fit(fit, [os.path.basename(path) for path in paths])
+    return fit
+
+
+if __name__ == '__main__':
+    main()
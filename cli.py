@@ -0,0 +1,148 @@
+import argparse
+import sys
+
+# Тяжёлые модули (numpy, matplotlib, krpc) импортируются только внутри команд, которым они нужны
+# Команды, которые целиком передают свои аргументы main() модуля
+FORWARDED = {'sessions', 'plot', 'archive', 'cache', 'compare'}
+
+
+def cmd_simulate(args):
+    spec = None
+    if args.vehicle:
+        from vehicle import load_vehicle
+
+        spec = load_vehicle(args.vehicle)
+    if args.model == 'script':
+        import mat_model
+
+        params = mat_model.vehicle_params(spec) if spec else None
+        result = mat_model.run_model(params) if args.no_cache else mat_model.cached_run_model(params)
+    elif args.model == 'batch':
+        from batch_model import simulate_batch
+        from vehicle import model_params
+
+        res = simulate_batch(model_params(spec) if spec else None)
+        result = {'t_res': res['t_res'], 'h_res': res['h_res'][0], 'v_res': res['v_res'][0],
+                  'm_res': res['m_res'][0]}
+    else:
+        from ode_model import simulate as simulate_ode
+        from vehicle import model_params
+
+        result = simulate_ode(model_params(spec) if spec else None, method=args.method, coast=args.coast)
+
+    print(f"Модель: {args.model}, шагов {len(result['t_res'])}")
+    print(f"t = {result['t_res'][-1]:.1f} с, высота {result['h_res'][-1] / 1000:.1f} км, "
+          f"скорость {result['v_res'][-1]:.1f} м/с, масса {result['m_res'][-1]:.1f} кг")
+    if args.model == 'script' and not args.no_cache:
+        from cache import default_cache
+
+        default_cache().print_stats()
+    if not args.no_plot:
+        import mat_model
+
+        mat_model.plot_comparison(result)
+    return result
+
+
+def cmd_fly(args):
+    import autopilot
+
+    if args.sil:
+        import sil
+
+        result = sil.main(['--live'] if args.live else [])
+        if result and result['data_file'] and not args.no_plot:
+            autopilot.plot_from_data_file(result['data_file'])
+        return result
+    return autopilot.fly(scheduler=args.scheduler, plot=not args.no_plot, live=args.live)
+
+
+def cmd_sessions(args):
+    import sessions
+
+    return sessions.main(args.args)
+
+
+def cmd_archive(args):
+    import archive
+
+    return archive.main(args.args)
+
+
+def cmd_cache(args):
+    import cache
+
+    return cache.main(args.args)
+
+
+def cmd_plot(args):
+    import plots
+
+    return plots.main(args.args)
+
+
+def cmd_compare(args):
+    import compare
+
+    return compare.main(args.args)
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog='cli.py', description="Эндюранс: мат. модель, автопилот kRPC и анализ полётов")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    p = commands.add_parser('simulate', help="расчёт мат. модели")
+    p.add_argument('--model', choices=['script', 'batch', 'ode'], default='script')
+    p.add_argument('--method', choices=['euler', 'rk4', 'dopri'], default='dopri', help="интегратор для --model ode")
+    p.add_argument('--coast', choices=['numeric', 'kepler'], default='numeric', help="пассивный участок для --model ode")
+    p.add_argument('--no-cache', action='store_true', help="пересчитать --model script без кэша результатов")
+    p.add_argument('--vehicle', help="JSON с описанием ракеты в формате vehicle.VEHICLE")
+    p.add_argument('--no-plot', action='store_true')
+    p.set_defaults(func=cmd_simulate)
+
+    p = commands.add_parser('fly', help="полёт через kRPC")
+    p.add_argument('--scheduler', action='store_true', help="многочастотный планировщик asyncio")
+    p.add_argument('--live', action='store_true', help="живые графики по журналу во время полёта")
+    p.add_argument('--sil', action='store_true', help="полёт против модели с виртуальными часами вместо KSP")
+    p.add_argument('--no-plot', action='store_true')
+    p.set_defaults(func=cmd_fly)
+
+    p = commands.add_parser('sessions', help="параллельные полёты на нескольких серверах kRPC")
+    p.add_argument('args', nargs=argparse.REMAINDER, help="аргументы sessions.py")
+    p.set_defaults(func=cmd_sessions)
+
+    p = commands.add_parser('plot', help="графики по журналам полётов")
+    p.add_argument('args', nargs=argparse.REMAINDER, help="аргументы plots.py")
+    p.set_defaults(func=cmd_plot)
+
+    p = commands.add_parser('archive', help="архив журналов полётов: сводки и выборки")
+    p.add_argument('args', nargs=argparse.REMAINDER, help="аргументы archive.py")
+    p.set_defaults(func=cmd_archive)
+
+    p = commands.add_parser('cache', help="размер и очистка кэша результатов модели")
+    p.add_argument('args', nargs=argparse.REMAINDER, help="аргументы cache.py")
+    p.set_defaults(func=cmd_cache)
+
+    p = commands.add_parser('compare', help="сравнение модели с журналами полётов")
+    p.add_argument('args', nargs=argparse.REMAINDER, help="аргументы compare.py")
+    p.set_defaults(func=cmd_compare)
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    parser = make_parser()
+    if argv and argv[0] in FORWARDED:
+        # REMAINDER не забирает аргументы, начинающиеся с '-', если они идут первыми; передаём всё как есть
+        args = parser.parse_args(argv[:1])
+        args.args = argv[1:]
+    else:
+        args = parser.parse_args(argv)
+    if args.command == 'fly' and args.sil and args.scheduler:
+        # Планировщик asyncio идёт по настоящим часам и с модельными часами SIL не работает
+        parser.error("--scheduler нельзя совмещать с --sil")
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
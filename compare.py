@@ -0,0 +1,145 @@
+import argparse
+import csv
+import glob
+import os
+
+import numpy as np
+
+import flightlog
+from batch_model import PHASE_CLIMB, PHASE_ORBIT, PHASE_TURN_1, PHASE_TURN_2, simulate_batch
+
+# канал журнала: ряд модели
+CHANNELS = {
+    'altitude': 'h_res',
+    'velocity': 'v_res',
+    'mass': 'm_res',
+}
+PHASES = {
+    PHASE_CLIMB: 'подъём',
+    PHASE_TURN_1: 'поворот 1',
+    PHASE_TURN_2: 'поворот 2',
+    PHASE_ORBIT: 'орбита',
+}
+
+
+def find_logs(data_dir="flight_data"):
+    return sorted(glob.glob(os.path.join(data_dir, '*.csv')) + glob.glob(os.path.join(data_dir, '*.bin')))
+
+
+def load_flights(paths):
+    return [flightlog.load_columns(path) for path in paths]
+
+
+def resample(flights, t_grid, channels=CHANNELS):
+    # Все полёты интерполируются одним вызовом np.interp: каждый сдвигается по времени на своё смещение,
+    # чтобы отрезки не перекрывались. Точки сетки вне интервала полёта получают NaN.
+    t_grid = np.asarray(t_grid, dtype=float)
+    result = np.full((len(flights), len(channels), t_grid.size), np.nan)
+    rows = [i for i, f in enumerate(flights) if len(f['time'])]
+    if not rows or not t_grid.size:
+        return result
+
+    times = [np.asarray(flights[i]['time'], dtype=float) for i in rows]
+    lo = min(t_grid.min(), min(t.min() for t in times))
+    hi = max(t_grid.max(), max(t.max() for t in times))
+    offsets = np.arange(len(rows)) * (hi - lo + 1.0)
+    xp = np.concatenate([t + off for t, off in zip(times, offsets)])
+    x = (t_grid[None, :] + offsets[:, None]).ravel()
+    start = np.array([t.min() for t in times])[:, None]
+    end = np.array([t.max() for t in times])[:, None]
+    outside = (t_grid[None, :] < start) | (t_grid[None, :] > end)
+
+    for c, name in enumerate(channels):
+        fp = np.concatenate([np.asarray(flights[i][name], dtype=float) for i in rows])
+        values = np.interp(x, xp, fp).reshape(len(rows), t_grid.size)
+        result[rows, c] = np.where(outside, np.nan, values)
+    return result
+
+
+def compare(flights, params=None, channels=CHANNELS):
+    model = simulate_batch(params)
+    t_res = model['t_res']
+    predicted = np.stack([model[key][0] for key in channels.values()])
+    observed = resample(flights, t_res, channels)
+
+    err = observed - predicted[None]
+    valid = ~np.isnan(err)
+    sq = np.where(valid, err ** 2, 0.0)
+    count = valid.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rmse = np.sqrt(sq.sum(axis=-1) / count)
+        max_err = np.where(count > 0, np.abs(np.where(valid, err, 0.0)).max(axis=-1), np.nan)
+
+        # Ошибка по фазам через матрицу принадлежности шагов фазам: (полёты, каналы, шаги) @ (шаги, фазы)
+        phase_res = model['phase_res'][0]
+        membership = (phase_res[:, None] == np.array(list(PHASES))[None, :]).astype(float)
+        phase_rmse = np.sqrt((sq @ membership) / (valid.astype(float) @ membership))
+
+    return {
+        't_res': t_res,
+        'channels': list(channels),
+        'phases': list(PHASES.values()),
+        'observed': observed,
+        'predicted': predicted,
+        'coverage': count / t_res.size,
+        'rmse': rmse,
+        'max_error': max_err,
+        'phase_rmse': phase_rmse,
+    }
+
+
+def summary_rows(result, names):
+    rows = []
+    for i, name in enumerate(names):
+        for c, channel in enumerate(result['channels']):
+            row = {
+                'flight': name,
+                'channel': channel,
+                'coverage': result['coverage'][i, c],
+                'rmse': result['rmse'][i, c],
+                'max_error': result['max_error'][i, c],
+            }
+            for p, phase in enumerate(result['phases']):
+                row[f'rmse {phase}'] = result['phase_rmse'][i, c, p]
+            rows.append(row)
+    return rows
+
+
+def write_summary(rows, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(rows[0]))
+        for row in rows:
+            writer.writerow([value if isinstance(value, str) else f"{value:.3f}" for value in row.values()])
+    return path
+
+
+def print_summary(rows):
+    print(f"{'полёт':<32}{'канал':<10}{'покрытие':>10}{'RMSE':>12}{'макс.':>12}")
+    for row in rows:
+        print(f"{row['flight']:<32}{row['channel']:<10}{row['coverage'] * 100:>9.0f}%"
+              f"{row['rmse']:>12.1f}{row['max_error']:>12.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение мат. модели с журналами полётов")
+    parser.add_argument('paths', nargs='*', default=["flight_data"], help="журналы или папки с журналами")
+    parser.add_argument('--out', default="model_comparison.csv")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for path in args.paths:
+        paths.extend(find_logs(path) if os.path.isdir(path) else [path])
+    if not paths:
+        print("Журналы полётов не найдены")
+        return None
+
+    result = compare(load_flights(paths))
+    rows = summary_rows(result, [os.path.basename(path) for path in paths])
+    print_summary(rows)
+    print(f"Сводка сохранена: {write_summary(rows, args.out)}")
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+import argparse
+import multiprocessing
+import os
+import struct
+import time
+
+import numpy as np
+
+import flightlog
+
+# колонка: (множитель, подпись, цвет)
+PANELS = {
+    'velocity': (1, 'Скорость (м/с)', 'b'),
+    'altitude': (1 / 1000, 'Высота (км)', 'r'),
+    'mass': (1, 'Масса (кг)', 'g'),
+    'thrust': (1 / 1000, 'Тяга (кН)', 'orange'),
+}
+
+
+class LogTail:
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.binary = None
+        self.dtype = flightlog.DTYPE
+        self._partial = b''
+
+    def _detect(self, f):
+        head = f.read(len(flightlog.MAGIC))
+        if len(head) < len(flightlog.MAGIC):
+            return False
+        self.binary = head == flightlog.MAGIC
+        if self.binary:
+            try:
+                self.dtype, self.offset = flightlog.read_header(self.path)
+            except (struct.error, ValueError, TypeError):
+                # Заголовок ещё дописывается: повторим на следующем кадре
+                self.binary = None
+                return False
+            if os.path.getsize(self.path) < self.offset:
+                self.binary = None
+                return False
+        else:
+            f.seek(0)
+            header = f.readline()
+            if not header.endswith(b'\n'):
+                return False
+            self.offset = len(header)
+        return True
+
+    def poll(self):
+        # Читаются только байты, дописанные с прошлого вызова; неполная запись ждёт следующего раза
+        if not os.path.exists(self.path):
+            return np.zeros(0, dtype=self.dtype)
+        with open(self.path, 'rb') as f:
+            if self.binary is None and not self._detect(f):
+                return np.zeros(0, dtype=self.dtype)
+            f.seek(self.offset)
+            chunk = self._partial + f.read()
+        self.offset += len(chunk) - len(self._partial)
+
+        if self.binary:
+            n = len(chunk) // self.dtype.itemsize
+            self._partial = chunk[n * self.dtype.itemsize:]
+            return np.frombuffer(chunk[:n * self.dtype.itemsize], dtype=self.dtype)
+
+        end = chunk.rfind(b'\n') + 1
+        self._partial = chunk[end:]
+        rows = []
+        for line in chunk[:end].decode('utf-8').splitlines():
+            fields = line.split(',')
+            if len(fields) == len(flightlog.SCHEMA):
+                rows.append(tuple(float(x) if typ[1] == 'f' else int(float(x))
+                                  for x, (_, typ) in zip(fields, flightlog.SCHEMA)))
+        return np.array(rows, dtype=self.dtype)
+
+
+class RingBuffer:
+    def __init__(self, capacity, names):
+        self.capacity = capacity
+        self.data = {name: np.zeros(capacity) for name in names}
+        self.size = 0
+        self.head = 0
+
+    def extend(self, rows):
+        n = len(rows)
+        if n == 0:
+            return
+        if n > self.capacity:
+            rows = rows[-self.capacity:]
+            n = self.capacity
+        idx = (self.head + np.arange(n)) % self.capacity
+        for name, column in self.data.items():
+            column[idx] = rows[name]
+        self.head = (self.head + n) % self.capacity
+        self.size = min(self.capacity, self.size + n)
+
+    def view(self, name):
+        column = self.data[name]
+        if self.size < self.capacity:
+            return column[:self.size]
+        return np.concatenate((column[self.head:], column[:self.head]))
+
+
+class Dashboard:
+    def __init__(self, path, capacity=3000, fps=10, window=120.0):
+        import matplotlib.pyplot as plt
+
+        self.plt = plt
+        self.tail = LogTail(path)
+        self.buffer = RingBuffer(capacity, ['time'] + list(PANELS))
+        self.frame_interval = 1.0 / fps
+        self.window = window
+        self.redraws = 0
+        self.frames = 0
+
+        self.fig, axes = plt.subplots(len(PANELS), 1, figsize=(10, 8), sharex=True)
+        self.fig.suptitle(f"Полёт: {os.path.basename(path)}")
+        self.axes = dict(zip(PANELS, axes))
+        self.lines = {}
+        for name, (_, label, color) in PANELS.items():
+            ax = self.axes[name]
+            ax.set_ylabel(label)
+            ax.grid(True, alpha=0.3)
+            ax.set_xlim(0, window)
+            ax.set_ylim(0, 1)
+            self.lines[name], = ax.plot([], [], color=color, linewidth=1.5, animated=True)
+        axes[-1].set_xlabel('Время (с)')
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+        self.background = None
+        plt.show(block=False)
+        plt.pause(0.1)
+
+    def _on_draw(self, event):
+        # Фон без линий запоминается после каждой полной перерисовки (изменение масштаба, размер окна)
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        for name, line in self.lines.items():
+            self.axes[name].draw_artist(line)
+
+    def _rescale(self, t, values):
+        changed = False
+        ax = next(iter(self.axes.values()))
+        lo, hi = ax.get_xlim()
+        if t[-1] > hi:
+            # Окно сдвигается скачком на половину ширины, а не на каждом кадре
+            ax.set_xlim(t[-1] - self.window / 2, t[-1] + self.window / 2)
+            changed = True
+        for name, y in values.items():
+            ax = self.axes[name]
+            lo, hi = ax.get_ylim()
+            y_min, y_max = float(y.min()), float(y.max())
+            if y_min < lo or y_max > hi:
+                # Диапазон растёт с запасом в свою ширину, так что полных перерисовок O(log) за полёт
+                span = max(hi - lo, y_max - y_min, 1e-9)
+                ax.set_ylim(y_min - span if y_min < lo else lo, y_max + span if y_max > hi else hi)
+                changed = True
+        return changed
+
+    def frame(self):
+        rows = self.tail.poll()
+        if len(rows):
+            self.buffer.extend(rows)
+        if not self.buffer.size:
+            return
+        t = self.buffer.view('time')
+        values = {name: self.buffer.view(name) * scale for name, (scale, _, _) in PANELS.items()}
+        for name, line in self.lines.items():
+            line.set_data(t, values[name])
+
+        canvas = self.fig.canvas
+        if self._rescale(t, values) or self.background is None:
+            self.redraws += 1
+            canvas.draw()
+        else:
+            canvas.restore_region(self.background)
+            for name, line in self.lines.items():
+                self.axes[name].draw_artist(line)
+            canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+        self.frames += 1
+
+    def run(self, stop=None):
+        while self.plt.fignum_exists(self.fig.number) and not (stop is not None and stop.is_set()):
+            started = time.perf_counter()
+            self.frame()
+            # Частота кадров ограничена, ожидание с обработкой событий окна
+            remaining = self.frame_interval - (time.perf_counter() - started)
+            self.fig.canvas.start_event_loop(max(remaining, 0.001))
+
+
+def run_dashboard(path, stop=None, capacity=3000, fps=10, window=120.0):
+    Dashboard(path, capacity, fps, window).run(stop)
+
+
+def start(path, capacity=3000, fps=10, window=120.0):
+    # Отдельный процесс (spawn, без копии потоков автопилота): отрисовка не делит GIL с циклом управления
+    ctx = multiprocessing.get_context('spawn')
+    stop = ctx.Event()
+    process = ctx.Process(target=run_dashboard, args=(path, stop, capacity, fps, window),
+                          name="dashboard", daemon=True)
+    process.start()
+    return process, stop
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Живые графики по растущему журналу полёта")
+    parser.add_argument('path', help="журнал DataLogger (CSV или бинарный)")
+    parser.add_argument('--fps', type=float, default=10)
+    parser.add_argument('--capacity', type=int, default=3000, help="число последних отсчётов на графиках")
+    parser.add_argument('--window', type=float, default=120.0, help="ширина окна по времени, с")
+    args = parser.parse_args(argv)
+    run_dashboard(args.path, None, args.capacity, args.fps, args.window)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+import threading
+from functools import reduce
+
+from vehicle import VEHICLE, compile_vehicle
+
+
+class FlightEvents:
+    def __init__(self, conn, vessel, target_altitude, spec=VEHICLE):
+        self.conn = conn
+        E = conn.krpc.Expression
+
+        def value(func, *args):
+            return E.call(conn.get_call(func, *args))
+
+        def spent(trigger):
+            return reduce(E.and_, [E.less_than_or_equal(value(amount, name), E.constant_float(trigger['at_most']))
+                                   for name in trigger['resources']])
+
+        amount = vessel.resources.amount
+        orbit = vessel.orbit
+        # Пороги отделения ступеней из описания ракеты: ускорители первой, жидкостная ступень последней
+        stages = compile_vehicle(spec)['stages']
+        boosters, core = stages[0]['trigger'], stages[-1]['trigger']
+        # Условия проверяются на сервере, клиент узнаёт только о срабатывании
+        self.expressions = {
+            'solid_fuel_low': spent(boosters),
+            'liquid_depleted': spent(core),
+            'thrust_lost': E.less_than(value(getattr, vessel, 'available_thrust'),
+                                       E.constant_float(core.get('thrust_below', 1.0))),
+            'apoapsis_reached': E.greater_than_or_equal(value(getattr, orbit, 'apoapsis_altitude'),
+                                                        E.constant_double(float(target_altitude))),
+        }
+        self.events = {}
+        self.flags = {}
+
+    def arm(self, name, action=None):
+        if name in self.events:
+            return self.events[name]
+        event = self.conn.krpc.add_event(self.expressions[name])
+        flag = threading.Event()
+        self.events[name] = event
+        self.flags[name] = flag
+
+        def on_fire():
+            if flag.is_set():
+                return
+            flag.set()
+            if action is not None:
+                # Действие выполняется в отдельном потоке, чтобы не занимать поток обновлений kRPC
+                threading.Thread(target=action, name=f"event-{name}", daemon=True).start()
+
+        event.add_callback(on_fire)
+        event.start()
+        return event
+
+    def fired(self, name):
+        return name in self.flags and self.flags[name].is_set()
+
+    def wait(self, name, timeout=None):
+        self.arm(name)
+        return self.flags[name].wait(timeout)
+
+    def disarm(self, name):
+        event = self.events.pop(name, None)
+        self.flags.pop(name, None)
+        if event is not None:
+            event.remove()
+
+    def close(self):
+        for name in list(self.events):
+            self.disarm(name)
@@ -0,0 +1,505 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+
+DEFAULT_STATE = {
+    'mean_altitude': 0.0,
+    'surface_altitude': 0.0,
+    'dynamic_pressure': 0.0,
+    'speed': 0.0,
+    'mass': 33165.0,
+    'available_thrust': 825_000.0,
+    'apoapsis_altitude': 0.0,
+    'periapsis_altitude': -600_000.0,
+    'time_to_apoapsis': 0.0,
+    'specific_impulse': 345.0,
+    'current_stage': 3,
+    'resources': {'SolidFuel': 1200.0, 'LiquidFuel': 360.0, 'Oxidizer': 440.0},
+}
+
+
+class Remote:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def _get(self, name, value):
+        self._conn.rpc(f"{type(self).__name__}.{name}")
+        return value
+
+    def _set(self, name):
+        self._conn.rpc(f"{type(self).__name__}.{name}=")
+
+
+class FakeFlight(Remote):
+    def __init__(self, conn, vessel, reference_frame=None):
+        super().__init__(conn)
+        self._vessel = vessel
+        self.reference_frame = reference_frame
+
+    def _state(self, name):
+        return self._get(name, self._vessel.state[name])
+
+    @property
+    def mean_altitude(self):
+        return self._state('mean_altitude')
+
+    @property
+    def surface_altitude(self):
+        return self._state('surface_altitude')
+
+    @property
+    def dynamic_pressure(self):
+        return self._state('dynamic_pressure')
+
+    @property
+    def speed(self):
+        return self._state('speed')
+
+
+class FakeBody(Remote):
+    @property
+    def reference_frame(self):
+        return self._get('reference_frame', 'body')
+
+    @property
+    def non_rotating_reference_frame(self):
+        # Тело в модели не вращается: скорость одна и та же в обеих системах
+        return self._get('non_rotating_reference_frame', 'body_non_rotating')
+
+    @property
+    def gravitational_parameter(self):
+        return self._get('gravitational_parameter', 3.5316e12)
+
+    @property
+    def equatorial_radius(self):
+        return self._get('equatorial_radius', 600_000.0)
+
+
+class FakeOrbit(Remote):
+    def __init__(self, conn, vessel):
+        super().__init__(conn)
+        self._vessel = vessel
+        self._body = FakeBody(conn)
+
+    @property
+    def body(self):
+        return self._get('body', self._body)
+
+    @property
+    def apoapsis_altitude(self):
+        return self._get('apoapsis_altitude', self._vessel.state['apoapsis_altitude'])
+
+    @property
+    def periapsis_altitude(self):
+        return self._get('periapsis_altitude', self._vessel.state['periapsis_altitude'])
+
+    @property
+    def time_to_apoapsis(self):
+        return self._get('time_to_apoapsis', self._vessel.state['time_to_apoapsis'])
+
+
+class FakeResources(Remote):
+    def __init__(self, conn, vessel):
+        super().__init__(conn)
+        self._vessel = vessel
+
+    def amount(self, name):
+        return self._get('amount', self._vessel.state['resources'].get(name, 0.0))
+
+
+class FakeControl(Remote):
+    def __init__(self, conn, vessel):
+        super().__init__(conn)
+        self._vessel = vessel
+        self._throttle = 0.0
+        self._sas = False
+        self._rcs = False
+
+    @property
+    def throttle(self):
+        return self._get('throttle', self._throttle)
+
+    @throttle.setter
+    def throttle(self, value):
+        self._set('throttle')
+        self._throttle = float(value)
+
+    @property
+    def sas(self):
+        return self._get('sas', self._sas)
+
+    @sas.setter
+    def sas(self, value):
+        self._set('sas')
+        self._sas = bool(value)
+
+    @property
+    def rcs(self):
+        return self._get('rcs', self._rcs)
+
+    @rcs.setter
+    def rcs(self, value):
+        self._set('rcs')
+        self._rcs = bool(value)
+
+    @property
+    def current_stage(self):
+        return self._get('current_stage', self._vessel.state['current_stage'])
+
+    def activate_next_stage(self):
+        self._set('activate_next_stage')
+        self._vessel.state['current_stage'] -= 1
+        if self._vessel.on_stage is not None:
+            self._vessel.on_stage(self._vessel)
+        return []
+
+
+class FakeAutoPilot(Remote):
+    def __init__(self, conn):
+        super().__init__(conn)
+        self.target_pitch = 90.0
+        self.target_heading = 90.0
+        self._reference_frame = None
+        self._engaged = False
+
+    @property
+    def reference_frame(self):
+        return self._get('reference_frame', self._reference_frame)
+
+    @reference_frame.setter
+    def reference_frame(self, value):
+        self._set('reference_frame')
+        self._reference_frame = value
+
+    @property
+    def engaged(self):
+        return self._get('engaged', self._engaged)
+
+    def target_pitch_and_heading(self, pitch, heading):
+        self._set('target_pitch_and_heading')
+        self.target_pitch = float(pitch)
+        self.target_heading = float(heading)
+
+    def engage(self):
+        self._set('engage')
+        self._engaged = True
+
+    def disengage(self):
+        self._set('disengage')
+        self._engaged = False
+
+
+class FakeVessel(Remote):
+    def __init__(self, conn, state=None):
+        super().__init__(conn)
+        self.state = {**DEFAULT_STATE, 'resources': dict(DEFAULT_STATE['resources'])}
+        if state:
+            self.state.update(state)
+        self.on_stage = None
+        self.on_revert = None
+        self._initial = {**self.state, 'resources': dict(self.state['resources'])}
+        self._control = FakeControl(conn, self)
+        self._auto_pilot = FakeAutoPilot(conn)
+        self._orbit = FakeOrbit(conn, self)
+        self._resources = FakeResources(conn, self)
+
+    def revert(self):
+        self.state.clear()
+        self.state.update(self._initial, resources=dict(self._initial['resources']))
+        self._control = FakeControl(self._conn, self)
+        self._auto_pilot = FakeAutoPilot(self._conn)
+        if self.on_revert is not None:
+            self.on_revert(self)
+
+    def flight(self, reference_frame=None):
+        return self._get('flight', FakeFlight(self._conn, self, reference_frame))
+
+    @property
+    def mass(self):
+        return self._get('mass', self.state['mass'])
+
+    @property
+    def available_thrust(self):
+        return self._get('available_thrust', self.state['available_thrust'])
+
+    @property
+    def specific_impulse(self):
+        return self._get('specific_impulse', self.state['specific_impulse'])
+
+    @property
+    def control(self):
+        return self._get('control', self._control)
+
+    @property
+    def auto_pilot(self):
+        return self._get('auto_pilot', self._auto_pilot)
+
+    @property
+    def orbit(self):
+        return self._get('orbit', self._orbit)
+
+    @property
+    def resources(self):
+        return self._get('resources', self._resources)
+
+    @property
+    def surface_reference_frame(self):
+        return self._get('surface_reference_frame', 'surface')
+
+
+class FakeSpaceCenter(Remote):
+    def __init__(self, conn, vessel):
+        super().__init__(conn)
+        self._vessel = vessel
+
+    @property
+    def active_vessel(self):
+        return self._get('active_vessel', self._vessel)
+
+    def revert_to_launch(self):
+        self._set('revert_to_launch')
+        self._vessel.revert()
+
+
+class FakeStream:
+    def __init__(self, conn, func, args, kwargs):
+        self._conn = conn
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._value = None
+        self._started = False
+        self._callbacks = []
+        self.condition = threading.Condition()
+        self.rate = 0.0
+
+    def start(self, wait=True):
+        if not self._started:
+            self._conn.rpc('KRPC.StartStream')
+            self._started = True
+            self.update()
+
+    def update(self):
+        with self._conn.server_side():
+            value = self._func(*self._args, **self._kwargs)
+        with self.condition:
+            self._value = value
+            self.condition.notify_all()
+        for callback in self._callbacks:
+            callback(value)
+
+    def __call__(self):
+        if not self._started:
+            self.start()
+        return self._value
+
+    def wait(self, timeout=None):
+        self.condition.wait(timeout)
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    def remove(self):
+        self._conn.rpc('KRPC.RemoveStream')
+        if self in self._conn.streams:
+            self._conn.streams.remove(self)
+
+
+class FakeCall:
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __call__(self):
+        return self.func(*self.args, **self.kwargs)
+
+
+class FakeExpression:
+    def __init__(self, evaluate):
+        self.evaluate = evaluate
+
+    @classmethod
+    def call(cls, call):
+        return cls(call)
+
+    @classmethod
+    def constant_float(cls, value):
+        return cls(lambda: value)
+
+    constant_double = constant_float
+    constant_int = constant_float
+    constant_bool = constant_float
+
+    @classmethod
+    def equal(cls, a, b):
+        return cls(lambda: a.evaluate() == b.evaluate())
+
+    @classmethod
+    def less_than(cls, a, b):
+        return cls(lambda: a.evaluate() < b.evaluate())
+
+    @classmethod
+    def less_than_or_equal(cls, a, b):
+        return cls(lambda: a.evaluate() <= b.evaluate())
+
+    @classmethod
+    def greater_than(cls, a, b):
+        return cls(lambda: a.evaluate() > b.evaluate())
+
+    @classmethod
+    def greater_than_or_equal(cls, a, b):
+        return cls(lambda: a.evaluate() >= b.evaluate())
+
+    @classmethod
+    def and_(cls, a, b):
+        return cls(lambda: a.evaluate() and b.evaluate())
+
+    @classmethod
+    def or_(cls, a, b):
+        return cls(lambda: a.evaluate() or b.evaluate())
+
+    @classmethod
+    def not_(cls, a):
+        return cls(lambda: not a.evaluate())
+
+
+class FakeEvent:
+    def __init__(self, conn, expression):
+        self._conn = conn
+        self._expression = expression
+        self._value = False
+        self._started = False
+        self._callbacks = []
+        self.condition = threading.Condition()
+
+    def start(self):
+        if not self._started:
+            self._conn.rpc('KRPC.StartStream')
+            self._started = True
+            self.update()
+
+    def update(self):
+        # Как на сервере kRPC: клиент получает обновление только когда условие выполнено
+        with self._conn.server_side():
+            triggered = bool(self._expression.evaluate())
+        if not triggered:
+            return
+        with self.condition:
+            self._value = True
+            self.condition.notify_all()
+        for callback in list(self._callbacks):
+            callback()
+
+    def wait(self, timeout=None):
+        if not self._started:
+            self.start()
+        self._value = False
+        while not self._value:
+            if not self.condition.wait(timeout) and timeout is not None:
+                return
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    def remove(self):
+        self._conn.rpc('KRPC.RemoveEvent')
+        if self in self._conn.events:
+            self._conn.events.remove(self)
+
+
+class FakeKRPC(Remote):
+    Expression = FakeExpression
+
+    def add_event(self, expression):
+        self._conn.rpc('KRPC.AddEvent')
+        event = FakeEvent(self._conn, expression)
+        self._conn.events.append(event)
+        return event
+
+
+class FakeConnection:
+    def __init__(self, address='127.0.0.1', rpc_port=50000, stream_port=50001, state=None):
+        self.address = address
+        self.rpc_port = rpc_port
+        self.stream_port = stream_port
+        self.rpc_count = 0
+        self.rpc_log = Counter()
+        self.streams = []
+        self.events = []
+        self.stream_update_condition = threading.Condition()
+        self._update_callbacks = []
+        self._server_depth = 0
+        self._lock = threading.RLock()
+        self.closed = False
+        self.vessel = FakeVessel(self, state)
+        self.space_center = FakeSpaceCenter(self, self.vessel)
+        self.krpc = FakeKRPC(self)
+
+    def rpc(self, name):
+        if self._server_depth == 0:
+            self.rpc_count += 1
+            self.rpc_log[name] += 1
+
+    @contextmanager
+    def server_side(self):
+        with self._lock:
+            self._server_depth += 1
+            try:
+                yield
+            finally:
+                self._server_depth -= 1
+
+    def add_stream(self, func, *args, **kwargs):
+        # Как в kRPC: вызов getattr(obj, 'attr') превращается в поток по свойству
+        self.rpc('KRPC.AddStream')
+        stream = FakeStream(self, func, args, kwargs)
+        self.streams.append(stream)
+        return stream
+
+    def get_call(self, func, *args, **kwargs):
+        return FakeCall(func, args, kwargs)
+
+    def add_stream_update_callback(self, callback):
+        self._update_callbacks.append(callback)
+
+    def remove_stream_update_callback(self, callback):
+        if callback in self._update_callbacks:
+            self._update_callbacks.remove(callback)
+
+    def wait_for_stream_update(self, timeout=None):
+        self.stream_update_condition.wait(timeout)
+
+    def update(self):
+        # Один кадр сервера: все запущенные потоки получают значения из одного состояния
+        with self._lock:
+            for stream in list(self.streams):
+                if stream._started:
+                    stream.update()
+            for event in list(self.events):
+                if event._started:
+                    event.update()
+        with self.stream_update_condition:
+            self.stream_update_condition.notify_all()
+        for callback in list(self._update_callbacks):
+            callback()
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def connect(name=None, address='127.0.0.1', rpc_port=50000, stream_port=50001, state=None):
+    return FakeConnection(address, rpc_port, stream_port, state)
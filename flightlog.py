@@ -0,0 +1,124 @@
+import csv
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'FLTLOG01'
+HEADER_ALIGN = 64
+NAME_SIZE = 16
+
+SCHEMA = (
+    ('time', '<f8'),
+    ('velocity', '<f8'),
+    ('mass', '<f8'),
+    ('altitude', '<f8'),
+    ('thrust', '<f8'),
+    ('stage', '<i8'),
+)
+DTYPE = np.dtype(list(SCHEMA))
+CSV_HEADER = [name for name, _ in SCHEMA]
+
+
+def encode_header(dtype=DTYPE):
+    # MAGIC | число полей | размер записи | (имя[16], тип[8]) * n | выравнивание до 64 байт
+    body = struct.pack('<II', len(dtype.names), dtype.itemsize)
+    for name in dtype.names:
+        body += struct.pack(f'<{NAME_SIZE}s8s', name.encode('ascii'), dtype[name].str.encode('ascii'))
+    size = len(MAGIC) + len(body)
+    size += -size % HEADER_ALIGN
+    return (MAGIC + body).ljust(size, b'\0')
+
+
+def read_header(path):
+    with open(path, 'rb') as f:
+        head = f.read(len(MAGIC) + 8)
+        if head[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: не бинарный журнал полёта")
+        n_fields, itemsize = struct.unpack('<II', head[len(MAGIC):])
+        fields = []
+        for _ in range(n_fields):
+            name, typ = struct.unpack(f'<{NAME_SIZE}s8s', f.read(NAME_SIZE + 8))
+            fields.append((name.rstrip(b'\0').decode('ascii'), typ.rstrip(b'\0').decode('ascii')))
+    dtype = np.dtype(fields)
+    if dtype.itemsize != itemsize:
+        raise ValueError(f"{path}: повреждён заголовок журнала")
+    offset = len(MAGIC) + 8 + n_fields * (NAME_SIZE + 8)
+    return dtype, offset + (-offset % HEADER_ALIGN)
+
+
+def is_binary(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class BinaryLogWriter:
+    def __init__(self, path, dtype=DTYPE):
+        self.path = path
+        self.dtype = dtype
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(encode_header(dtype))
+
+    def append(self, rows):
+        self.file.write(np.asarray(rows, dtype=self.dtype).tobytes())
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_binary(path):
+    dtype, offset = read_header(path)
+    n = (os.path.getsize(path) - offset) // dtype.itemsize
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    # Недописанная последняя запись (файл ещё растёт) отбрасывается
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(n,))
+
+
+def read_csv(path):
+    rows = []
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for row in reader:
+            if len(row) == len(SCHEMA):
+                rows.append(tuple(float(x) if typ[1] == 'f' else int(float(x))
+                                  for x, (_, typ) in zip(row, SCHEMA)))
+    return np.array(rows, dtype=DTYPE)
+
+
+def load_columns(path):
+    data = read_binary(path) if is_binary(path) else read_csv(path)
+    return {name: data[name] for name in data.dtype.names}
+
+
+def csv_to_binary(csv_path, bin_path=None):
+    bin_path = bin_path or os.path.splitext(csv_path)[0] + '.bin'
+    data = read_csv(csv_path)
+    with open(bin_path, 'wb') as f:
+        f.write(encode_header(DTYPE))
+        f.write(data.tobytes())
+    return bin_path
+
+
+def binary_to_csv(bin_path, csv_path=None):
+    csv_path = csv_path or os.path.splitext(bin_path)[0] + '.csv'
+    data = read_binary(bin_path)
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(data.dtype.names))
+        for row in data.tolist():
+            writer.writerow([f"{x:.2f}" if isinstance(x, float) else f"{x}" for x in row])
+    return csv_path
+
+
+if __name__ == '__main__':
+    import sys
+
+    for path in sys.argv[1:]:
+        out = binary_to_csv(path) if is_binary(path) else csv_to_binary(path)
+        print(f"{path} -> {out}")
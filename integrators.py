@@ -0,0 +1,187 @@
+import numpy as np
+
+
+DOPRI_C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+DOPRI_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+DOPRI_E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+METHODS = ('euler', 'rk4', 'dopri')
+
+
+class Event:
+    def __init__(self, name, func, terminal=True, direction=0):
+        self.name = name
+        self.func = func
+        self.terminal = terminal
+        self.direction = direction
+
+    def __call__(self, t, y):
+        return self.func(t, y)
+
+    def crossed(self, before, after):
+        if before == 0:
+            return False
+        if self.direction > 0:
+            return before < 0 <= after
+        if self.direction < 0:
+            return before > 0 >= after
+        return (before < 0) != (after < 0) or after == 0
+
+
+def euler_step(f, t, y, dt, pairs=()):
+    # Шаг как в mat_model.py: скорость обновляется первой, координата берёт уже новую скорость.
+    # Траекторию mat_model это не повторяет: переходы между участками ode_model находит внутри шага
+    dy = f(t, y)
+    y_new = y + dt * dy
+    for pos, vel in pairs:
+        y_new[pos] = y[pos] + (y_new[vel] + dy[vel] * dt / 2) * dt
+    return y_new
+
+
+def rk4_step(f, t, y, dt):
+    k1 = f(t, y)
+    k2 = f(t + dt / 2, y + dt / 2 * k1)
+    k3 = f(t + dt / 2, y + dt / 2 * k2)
+    k4 = f(t + dt, y + dt * k3)
+    return y + dt / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+
+
+def dopri_step(f, t, y, dt, k1=None):
+    k = [f(t, y) if k1 is None else k1]
+    for i in range(1, 7):
+        yi = y.copy()
+        for a, kj in zip(DOPRI_A[i], k):
+            if a:
+                yi += dt * a * kj
+        if i == 6:
+            y_new = yi
+        k.append(f(t + DOPRI_C[i] * dt, yi))
+    err = dt * sum(e * kj for e, kj in zip(DOPRI_E, k) if e)
+    return y_new, err, k[6]
+
+
+def _locate(g, dt, g0, g1, xtol):
+    # Метод Иллинойса: регула фальси без залипания одного из концов
+    a, b = 0.0, dt
+    fa, fb = g0, g1
+    side = 0
+    x, fx = b, fb
+    while b - a > xtol:
+        x = (a * fb - b * fa) / (fb - fa) if fb != fa else (a + b) / 2
+        if not a < x < b:
+            x = (a + b) / 2
+        fx = g(x)
+        if fx == 0:
+            return x
+        if (fx < 0) == (fb < 0):
+            b, fb = x, fx
+            if side == -1:
+                fa /= 2
+            side = -1
+        else:
+            a, fa = x, fx
+            if side == 1:
+                fb /= 2
+            side = 1
+    return b
+
+
+def integrate(f, t0, y0, t_end, method='dopri', dt=1.0, events=(), rtol=1e-8, atol=1e-6,
+              max_step=np.inf, pairs=(), xtol=1e-9):
+    if method not in METHODS:
+        raise ValueError(f"Неизвестный метод интегрирования: {method}")
+
+    counter = [0]
+
+    def rhs(t, y):
+        counter[0] += 1
+        return f(t, y)
+
+    t = float(t0)
+    y = np.array(y0, dtype=float)
+    ts = [t]
+    ys = [y.copy()]
+    found = []
+    n_steps = 0
+    n_rejected = 0
+    h = min(dt, max_step)
+    k1 = None
+    values = [ev(t, y) for ev in events]
+
+    while t < t_end:
+        h = min(h, t_end - t)
+        if method == 'dopri':
+            y_new, err, k_last = dopri_step(rhs, t, y, h, k1)
+            scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+            err_norm = float(np.sqrt(np.mean((err / scale) ** 2)))
+            factor = 5.0 if err_norm == 0 else min(5.0, max(0.2, 0.9 * err_norm ** -0.2))
+            if err_norm > 1:
+                n_rejected += 1
+                h *= factor
+                continue
+
+            def advance(step, t=t, y=y, k=k1):
+                return dopri_step(rhs, t, y, step, k)[0]
+        elif method == 'rk4':
+            y_new = rk4_step(rhs, t, y, h)
+
+            def advance(step, t=t, y=y):
+                return rk4_step(rhs, t, y, step)
+        else:
+            y_new = euler_step(rhs, t, y, h, pairs)
+
+            def advance(step, t=t, y=y):
+                return euler_step(rhs, t, y, step, pairs)
+
+        if not np.all(np.isfinite(y_new)):
+            # Иначе dopri бесконечно уменьшает шаг на NaN
+            raise ValueError(f"Решение разошлось при t = {t:.1f} с")
+
+        new_values = [ev(t + h, y_new) for ev in events]
+        hits = []
+        for i, ev in enumerate(events):
+            if ev.crossed(values[i], new_values[i]):
+                def g(step, ev=ev):
+                    return ev(t + step, advance(step))
+                hits.append((_locate(g, h, values[i], new_values[i], xtol), i))
+        hits.sort()
+
+        terminal = next(((step, i) for step, i in hits if events[i].terminal), None)
+        for step, i in hits:
+            if terminal is not None and step > terminal[0]:
+                break
+            found.append((events[i].name, float(t + step), advance(step)))
+
+        n_steps += 1
+        if terminal is not None:
+            step, i = terminal
+            t = t + step
+            y = advance(step)
+            ts.append(t)
+            ys.append(y.copy())
+            return {
+                't': np.array(ts), 'y': np.array(ys), 'event': events[i].name, 'events': found,
+                'n_steps': n_steps, 'n_rejected': n_rejected, 'n_rhs': counter[0],
+            }
+
+        t += h
+        y = y_new
+        values = new_values
+        ts.append(t)
+        ys.append(y.copy())
+        if method == 'dopri':
+            k1 = k_last
+            h = min(h * factor, max_step)
+
+    return {
+        't': np.array(ts), 'y': np.array(ys), 'event': None, 'events': found,
+        'n_steps': n_steps, 'n_rejected': n_rejected, 'n_rhs': counter[0],
+    }
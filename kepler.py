@@ -0,0 +1,114 @@
+from math import atan2, atanh, acos, cos, sin, sqrt, tan, pi, inf
+
+import numpy as np
+
+from batch_model import G, M, R
+
+MU = G * M
+
+
+class KeplerOrbit:
+    def __init__(self, h, vx, vy, mu=MU):
+        # vx - горизонтальная (трансверсальная) скорость, vy - радиальная
+        self.mu = mu
+        r = R + h
+        self.energy = (vx ** 2 + vy ** 2) / 2 - mu / r
+        self.hm = r * vx
+        if self.hm == 0:
+            raise ValueError("Вырожденная орбита: нет горизонтальной скорости")
+        self.p = self.hm ** 2 / mu
+        self.e = sqrt(max(0.0, 1 + 2 * self.energy * self.hm ** 2 / mu ** 2))
+        if abs(self.e - 1) < 1e-12:
+            raise ValueError("Параболическая орбита не поддерживается")
+        self.a = -mu / (2 * self.energy)
+        self.n = sqrt(mu / abs(self.a) ** 3)
+        self.nu0 = atan2(vy * self.hm / mu, self.p / r - 1)
+        self.M0 = self._mean_from_true(self.nu0)
+
+    @property
+    def elliptic(self):
+        return self.e < 1
+
+    @property
+    def apoapsis_altitude(self):
+        return self.a * (1 + self.e) - R if self.elliptic else inf
+
+    @property
+    def periapsis_altitude(self):
+        return self.p / (1 + self.e) - R
+
+    @property
+    def period(self):
+        return 2 * pi / self.n if self.elliptic else inf
+
+    def _mean_from_true(self, nu):
+        e = self.e
+        if self.elliptic:
+            E = 2 * atan2(sqrt(1 - e) * sin(nu / 2), sqrt(1 + e) * cos(nu / 2))
+            return E - e * sin(E)
+        H = 2 * atanh(sqrt((e - 1) / (e + 1)) * tan(nu / 2))
+        return e * np.sinh(H) - H
+
+    def _true_from_mean(self, mean):
+        e = self.e
+        mean = np.asarray(mean, dtype=float)
+        if self.elliptic:
+            mean = np.mod(mean + pi, 2 * pi) - pi
+            E = mean + e * np.sin(mean) if e < 0.8 else np.full_like(mean, pi) * np.sign(mean)
+            for _ in range(50):
+                delta = (E - e * np.sin(E) - mean) / (1 - e * np.cos(E))
+                E = E - delta
+                if np.all(np.abs(delta) < 1e-13):
+                    break
+            return 2 * np.arctan2(np.sqrt(1 + e) * np.sin(E / 2), np.sqrt(1 - e) * np.cos(E / 2))
+        H = np.arcsinh(mean / e)
+        for _ in range(50):
+            delta = (e * np.sinh(H) - H - mean) / (e * np.cosh(H) - 1)
+            H = H - delta
+            if np.all(np.abs(delta) < 1e-13):
+                break
+        return 2 * np.arctan(np.sqrt((e + 1) / (e - 1)) * np.tanh(H / 2))
+
+    def state_at(self, dt):
+        nu = self._true_from_mean(self.M0 + self.n * np.asarray(dt, dtype=float))
+        r = self.p / (1 + self.e * np.cos(nu))
+        vy = self.mu / self.hm * self.e * np.sin(nu)
+        vx = self.hm / r
+        return r - R, vx, vy
+
+    def _time_to_mean(self, mean):
+        dm = mean - self.M0
+        if self.elliptic:
+            dm = dm % (2 * pi)
+        elif dm < 0:
+            return inf
+        return dm / self.n
+
+    def time_to_apoapsis(self):
+        if not self.elliptic:
+            return inf
+        return self._time_to_mean(pi)
+
+    def time_to_periapsis(self):
+        return self._time_to_mean(0.0)
+
+    def time_to_altitude(self, h, descending=True):
+        c = (self.p / (R + h) - 1) / self.e if self.e > 0 else 2.0
+        if abs(c) > 1:
+            return inf
+        nu = acos(c)
+        if not self.elliptic and abs(nu) >= acos(-1 / self.e):
+            return inf
+        return self._time_to_mean(self._mean_from_true(-nu if descending else nu))
+
+
+def apsides(h, vx, vy, mu=MU):
+    h, vx, vy = (np.asarray(x, dtype=float) for x in (h, vx, vy))
+    r = R + h
+    energy = (vx ** 2 + vy ** 2) / 2 - mu / r
+    hm = r * vx
+    e = np.sqrt(np.maximum(0.0, 1 + 2 * energy * hm ** 2 / mu ** 2))
+    with np.errstate(divide='ignore'):
+        apoapsis = np.where(e < 1, -mu / (2 * energy) * (1 + e) - R, np.inf)
+    periapsis = hm ** 2 / mu / (1 + e) - R
+    return apoapsis, periapsis
@@ -0,0 +1,151 @@
+import json
+import time
+from math import log2
+
+# Логарифмические корзины: 8 на каждое удвоение, от 100 нс до ~1000 с
+MIN_VALUE = 1e-7
+SUB_BUCKETS = 8
+N_BUCKETS = int(log2(1e3 / MIN_VALUE) * SUB_BUCKETS) + 1
+# Чтение этих атрибутов возвращает новый удалённый объект, его вызовы относятся к своему месту
+NESTED = {'flight', 'orbit', 'resources', 'control', 'auto_pilot', 'body'}
+
+
+def bucket_edge(i):
+    return MIN_VALUE * 2 ** (i / SUB_BUCKETS)
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * N_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        i = int(log2(value / MIN_VALUE) * SUB_BUCKETS) if value > MIN_VALUE else 0
+        self.counts[i if i < N_BUCKETS else N_BUCKETS - 1] += 1
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if seen + c >= rank and c:
+                # Корзины логарифмические, поэтому позиция внутри корзины интерполируется по логарифму;
+                # результат не выходит за наблюдавшиеся минимум и максимум
+                value = bucket_edge(i) * 2 ** ((rank - seen) / c / SUB_BUCKETS)
+                return min(max(value, self.min), self.max)
+            seen += c
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min if self.count else 0.0,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max if self.count else 0.0,
+        }
+
+    def as_dict(self):
+        nonzero = {i: c for i, c in enumerate(self.counts) if c}
+        return dict(self.summary(), buckets=[[bucket_edge(i), bucket_edge(i + 1), c] for i, c in nonzero.items()])
+
+
+class Instrumented:
+    # Прокси удалённого объекта kRPC: каждое чтение, запись и вызов метода попадает в гистограмму своего места
+    __slots__ = ('_obj', '_site', '_instruments')
+
+    def __init__(self, obj, site, instruments):
+        object.__setattr__(self, '_obj', obj)
+        object.__setattr__(self, '_site', site)
+        object.__setattr__(self, '_instruments', instruments)
+
+    def __getattr__(self, name):
+        instruments = self._instruments
+        started = instruments.clock()
+        value = getattr(self._obj, name)
+        if callable(value):
+            return self._method(name, value)
+        instruments.record(f"{self._site}.{name}", instruments.clock() - started)
+        if name in NESTED:
+            return Instrumented(value, name, instruments)
+        return value
+
+    def _method(self, name, method):
+        instruments = self._instruments
+        key = f"{self._site}.{name}()"
+
+        def call(*args, **kwargs):
+            started = instruments.clock()
+            result = method(*args, **kwargs)
+            instruments.record(key, instruments.clock() - started)
+            if name in NESTED:
+                return Instrumented(result, f"{name}()", instruments)
+            return result
+
+        return call
+
+    def __setattr__(self, name, value):
+        instruments = self._instruments
+        started = instruments.clock()
+        setattr(self._obj, name, value)
+        instruments.record(f"{self._site}.{name}=", instruments.clock() - started)
+
+
+class LoopInstruments:
+    def __init__(self, clock=time.perf_counter, sleep=time.sleep):
+        self.clock = clock
+        self._sleep = sleep
+        self.histograms = {}
+        self._tick_start = None
+
+    def record(self, name, seconds):
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        hist.record(seconds)
+
+    def wrap(self, obj, site):
+        return Instrumented(obj, site, self)
+
+    def tick(self):
+        now = self.clock()
+        if self._tick_start is not None:
+            self.record('loop.period', now - self._tick_start)
+        self._tick_start = now
+
+    def sleep(self, seconds):
+        # Время работы такта до сна и перебор самого сна записываются отдельно
+        started = self.clock()
+        if self._tick_start is not None:
+            self.record('loop.tick', started - self._tick_start)
+        self._sleep(seconds)
+        self.record('loop.sleep_overshoot', self.clock() - started - seconds)
+
+    def summary(self):
+        return {name: hist.summary() for name, hist in sorted(self.histograms.items())}
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({name: hist.as_dict() for name, hist in sorted(self.histograms.items())}, f,
+                      ensure_ascii=False, indent=1)
+        return path
+
+    def print_summary(self):
+        print(f"{'замер':<36}{'число':>8}{'p50, мс':>10}{'p90, мс':>10}{'p99, мс':>10}{'макс, мс':>10}")
+        for name, s in self.summary().items():
+            print(f"{name:<36}{s['count']:>8}{s['p50'] * 1000:>10.3f}{s['p90'] * 1000:>10.3f}"
+                  f"{s['p99'] * 1000:>10.3f}{s['max'] * 1000:>10.3f}")
@@ -0,0 +1,43 @@
+from math import exp, sqrt
+
+from batch_model import R
+from kepler import MU
+
+G0 = 9.80665
+
+
+def burn_time(dv, mass, thrust, isp, g0=G0):
+    if thrust <= 0 or isp <= 0:
+        raise ValueError("Нет тяги для манёвра")
+    flow = thrust / (isp * g0)
+    m_final = mass * exp(-dv / (isp * g0))
+    return (mass - m_final) / flow, m_final
+
+
+def plan_circularization(apoapsis_altitude, periapsis_altitude, time_to_apoapsis, mass, thrust, isp,
+                         mu=MU, radius=R, trim_fraction=0.05, trim_throttle=0.2, g0=G0):
+    r_a = radius + apoapsis_altitude
+    r_p = radius + periapsis_altitude
+    a = (r_a + r_p) / 2
+    v_apoapsis = sqrt(mu * (2 / r_a - 1 / a))
+    v_circular = sqrt(mu / r_a)
+    dv = max(0.0, v_circular - v_apoapsis)
+
+    total, m_final = burn_time(dv, mass, thrust, isp, g0)
+    # Основная часть импульса на полной тяге по таймеру, остаток добирается на малой тяге по перицентру
+    main, m_main = burn_time(dv * (1 - trim_fraction), mass, thrust, isp, g0)
+    trim, _ = burn_time(dv * trim_fraction, m_main, thrust * trim_throttle, isp, g0)
+    start_in = time_to_apoapsis - total / 2
+
+    return {
+        'dv': dv,
+        'v_apoapsis': v_apoapsis,
+        'v_circular': v_circular,
+        'burn_time': total,
+        'main_burn_time': main,
+        'trim_burn_time': trim,
+        'trim_throttle': trim_throttle,
+        'start_in': start_in,
+        'cutoff_in': start_in + main,
+        'm_final': m_final,
+    }
@@ -0,0 +1,174 @@
+from math import cos, sin, pi
+
+import numpy as np
+
+from batch_model import (DEFAULT_PARAMS, PHASE_CLIMB, PHASE_TURN_1, PHASE_TURN_2, PHASE_ORBIT, PHASE_DONE,
+                         broadcast_params, g)
+from integrators import Event, integrate
+from kepler import KeplerOrbit
+
+H, VX, VY, M = range(4)
+
+
+def model_params(params=None):
+    prm = broadcast_params(params)
+    if prm['Mr'].size != 1:
+        raise ValueError("ode_model считает одну траекторию, для наборов параметров есть simulate_batch")
+    return {name: float(prm[name][0]) for name in DEFAULT_PARAMS}
+
+
+def pitch(turn, t):
+    return turn['alpha0'] - (turn['alpha0'] - turn['alpha1']) / turn['tpov'] * (t - turn['t_start'])
+
+
+def make_rhs(phase, prm, stage, turn, t0):
+    cf, pa, T, h_atm = prm['cf'], prm['pa'], prm['T'], prm['h_atm']
+    k, s = stage['k'], stage['s']
+    # Режим на орбитальном участке фиксируется на весь сегмент: границы t_coast/t_burn - события
+    burning = t0 >= prm['t_burn']
+    coasting = prm['t_coast'] <= t0 < prm['t_burn']
+
+    def drag(t, h, v):
+        if h >= h_atm:
+            return 0.0
+        p = pa - t * pa / T
+        return (cf * (p * s) * v ** 2) / 2
+
+    def throttle(t, h, v):
+        if prm['h_q_min'] < h < prm['h_q_max'] and (pa - t * pa / T) * v ** 2 / 2 > prm['q_limit']:
+            return prm['throttle']
+        return 1.0
+
+    def rhs(t, y):
+        h, vx, vy, m = y
+        gh = g(h)
+        v = (vx ** 2 + vy ** 2) ** 0.5
+        if phase == PHASE_ORBIT:
+            Ft, dm = stage['Ft'], -k
+        else:
+            thr = throttle(t, h, v)
+            Ft, dm = stage['Ft'] * thr, -k * thr
+        if phase == PHASE_CLIMB:
+            ax = 0.0
+            ay = abs((Ft - drag(t, h, v)) - m * gh) / m
+        elif phase == PHASE_ORBIT:
+            ax = Ft / m if burning else 0.0
+            ay = -gh
+            if coasting:
+                dm = 0.0
+        else:
+            rad = pitch(turn, t) / 180 * pi
+            F = drag(t, h, v)
+            if phase == PHASE_TURN_1:
+                ax = abs((Ft - F) * cos(rad) / m)
+            else:
+                ax = abs((Ft * cos(rad) - F) / m)
+            ay = abs((Ft - F - m * gh) * sin(rad) / m)
+        return np.array([vy, ax, ay, dm])
+
+    return rhs
+
+
+def make_events(phase, prm, stage, burnout_cutoff):
+    events = []
+    if stage['k'] > 0:
+        events.append(Event('burnout', lambda t, y: y[M] - stage['dry'], burnout_cutoff, -1))
+    if phase == PHASE_CLIMB:
+        events.append(Event('turn_1', lambda t, y: y[H] - prm['h_turn_1'], True, 1))
+    elif phase == PHASE_TURN_1:
+        events.append(Event('turn_2', lambda t, y: y[H] - prm['h_turn_2'], True, 1))
+    elif phase == PHASE_TURN_2:
+        events.append(Event('orbit', lambda t, y: y[H] - prm['h_orbit'], True, 1))
+    elif phase == PHASE_ORBIT:
+        events.append(Event('coast_start', lambda t, y: t - prm['t_coast'], True, 1))
+        events.append(Event('burn_start', lambda t, y: t - prm['t_burn'], True, 1))
+        events.append(Event('reentry', lambda t, y: y[H] - prm['h_orbit'], True, -1))
+    return events
+
+
+def kepler_coast(prm, stage, t, y, samples):
+    orbit = KeplerOrbit(y[H], y[VX], y[VY])
+    candidates = [(prm['t_end'] - t, None), (orbit.time_to_altitude(prm['h_orbit']), 'reentry')]
+    if t < prm['t_coast']:
+        candidates.append((prm['t_coast'] - t, 'coast_start'))
+    if t < prm['t_burn']:
+        candidates.append((prm['t_burn'] - t, 'burn_start'))
+    duration, name = min(candidates, key=lambda c: c[0])
+
+    dts = np.linspace(0.0, duration, samples + 1)[1:]
+    h, vx, vy = orbit.state_at(dts)
+    dm = 0.0 if prm['t_coast'] <= t < prm['t_burn'] else stage['k']
+    y_res = np.column_stack([h, vx, vy, y[M] - dm * dts])
+    return t + dts, y_res, name
+
+
+def simulate(params=None, method='dopri', dt=1.0, rtol=1e-8, atol=1e-6, max_step=np.inf,
+             burnout_cutoff=False, t_max=1000.0, coast='numeric', coast_samples=50):
+    if coast not in ('numeric', 'kepler'):
+        raise ValueError(f"Неизвестный режим пассивного участка: {coast}")
+    # Повороты, выгорание и выход на орбиту - события внутри шага, а не окна по высоте на целых секундах, как в
+    # mat_model/batch_model. Поэтому и method='euler' с dt=1 не совпадает с mat_model: при параметрах по
+    # умолчанию высота в конце 98 км против 149 км. С журналами и автопилотом сверяется mat_model/batch_model
+    prm = model_params(params)
+    stage = {'Ft': prm['Ft1'], 'k': (prm['Mr'] - prm['M0']) / prm['T1'], 's': prm['s1'], 'dry': prm['M0']}
+    turn = {'alpha0': 90.0, 'alpha1': 90.0, 'tpov': 1.0, 't_start': 0.0}
+    phase = PHASE_CLIMB
+    t = 0.0
+    y = np.array([0.0, 0.0, 0.0, prm['Mr']])
+
+    ts = [np.array([t])]
+    ys = [y[None, :]]
+    events = []
+    stats = {'n_steps': 0, 'n_rejected': 0, 'n_rhs': 0}
+
+    while phase != PHASE_DONE:
+        # На орбитальном участке без тяги движение двухтельное - переходим к событию сразу
+        if coast == 'kepler' and phase == PHASE_ORBIT and t < prm['t_burn'] and y[VX] > 0:
+            t_seg, y_seg, name = kepler_coast(prm, stage, t, y, coast_samples)
+            stats['n_steps'] += 1
+            if name is not None:
+                events.append((name, float(t_seg[-1]), y_seg[-1].copy()))
+        else:
+            t_stop = prm['t_end'] if phase == PHASE_ORBIT else t_max
+            sol = integrate(make_rhs(phase, prm, stage, turn, t), t, y, t_stop, method=method, dt=dt,
+                            events=make_events(phase, prm, stage, burnout_cutoff),
+                            rtol=rtol, atol=atol, max_step=max_step, pairs=((H, VY),))
+            for key in stats:
+                stats[key] += sol[key]
+            t_seg, y_seg, name = sol['t'][1:], sol['y'][1:], sol['event']
+            events.extend(sol['events'])
+        if len(t_seg):
+            ts.append(t_seg)
+            ys.append(y_seg)
+            t = float(t_seg[-1])
+            y = y_seg[-1].copy()
+        if name is None:
+            phase = PHASE_DONE
+        elif name == 'burnout':
+            stage = dict(stage, Ft=0.0, k=0.0)
+        elif name == 'turn_1':
+            turn = {'alpha0': 90.0, 'alpha1': prm['alpha1'], 'tpov': prm['tpov'], 't_start': t}
+            phase = PHASE_TURN_1
+        elif name == 'turn_2':
+            turn = {'alpha0': pitch(turn, t), 'alpha1': prm['alpha2'], 'tpov': prm['tpov2'], 't_start': t}
+            stage = {'Ft': prm['Ft2'], 'k': (prm['m2'] - prm['M2']) / prm['T2'], 's': prm['s2'],
+                     'dry': prm['M2']}
+            y[M] = prm['m2']
+            phase = PHASE_TURN_2
+        elif name == 'orbit':
+            phase = PHASE_ORBIT
+        elif name == 'reentry':
+            phase = PHASE_DONE
+
+    t_res = np.concatenate(ts)
+    y_res = np.concatenate(ys)
+    return dict(
+        stats,
+        t_res=t_res,
+        h_res=y_res[:, H],
+        v_res=np.hypot(y_res[:, VX], y_res[:, VY]),
+        m_res=y_res[:, M],
+        vx_res=y_res[:, VX],
+        vy_res=y_res[:, VY],
+        events=events,
+    )
@@ -0,0 +1,210 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import datetime
+
+import numpy as np
+from matplotlib.figure import Figure
+
+import flightlog
+
+DPI = 300
+COMBINED_SIZE = (12, 8)
+SINGLE_SIZE = (10, 6)
+
+# колонка: (множитель, стиль, подпись оси, заголовок отдельного графика)
+CHANNELS = {
+    'velocity': (1, 'b-', 'Общая скорость (м/с)', 'Общая скорость ракеты'),
+    'altitude': (1 / 1000, 'r-', 'Высота (км)', 'Высота полета'),
+    'mass': (1, 'g-', 'Масса (кг)', 'Масса ракеты'),
+    'thrust': (1 / 1000, 'orange', 'Тяга (кН)', 'Тяга двигателей'),
+}
+
+
+def has_display():
+    if sys.platform in ('win32', 'darwin'):
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: из каждой корзины берётся точка с наибольшей площадью треугольника
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    idx = np.empty(threshold, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < threshold - 1:
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+        else:
+            next_lo, next_hi = n - 1, n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return x[idx], y[idx]
+
+
+def max_points(figsize, dpi=DPI):
+    # Больше точек, чем пикселей по ширине, на графике всё равно не различить
+    return int(figsize[0] * dpi)
+
+
+def prepare(data_file, dpi=DPI):
+    columns = flightlog.load_columns(data_file)
+    times = np.asarray(columns['time'], dtype=float)
+    series = {'n': len(times), 'combined': {}, 'single': {}}
+    for name, (scale, _, _, _) in CHANNELS.items():
+        values = np.asarray(columns[name], dtype=float) * scale
+        series['combined'][name] = lttb(times, values, max_points(COMBINED_SIZE, dpi))
+        series['single'][name] = lttb(times, values, max_points(SINGLE_SIZE, dpi))
+    return series
+
+
+def draw_combined(fig, series):
+    ax1 = fig.add_subplot(2, 1, 1)
+    ax1.plot(*series['velocity'], 'b-', linewidth=2, label='Общая скорость')
+    ax1.set_xlabel('Время (с)')
+    ax1.set_ylabel('Скорость (м/с)', color='b')
+    ax1.tick_params(axis='y', labelcolor='b')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(loc='upper left')
+
+    ax2 = ax1.twinx()
+    ax2.plot(*series['altitude'], 'r-', linewidth=2, label='Высота')
+    ax2.set_ylabel('Высота (км)', color='r')
+    ax2.tick_params(axis='y', labelcolor='r')
+    ax2.legend(loc='upper right')
+    ax1.set_title('Общая скорость и Высота')
+
+    ax3 = fig.add_subplot(2, 1, 2)
+    ax3.plot(*series['mass'], 'g-', linewidth=2, label='Масса')
+    ax3.set_xlabel('Время (с)')
+    ax3.set_ylabel('Масса (т)', color='g')
+    ax3.tick_params(axis='y', labelcolor='g')
+    ax3.grid(True, alpha=0.3)
+    ax3.legend(loc='upper left')
+
+    ax4 = ax3.twinx()
+    ax4.plot(*series['thrust'], 'orange', linewidth=2, label='Тяга')
+    ax4.set_ylabel('Тяга (кН)', color='orange')
+    ax4.tick_params(axis='y', labelcolor='orange')
+    ax4.legend(loc='upper right')
+    ax3.set_title('Масса и Тяга')
+
+    fig.tight_layout()
+
+
+def draw_single(fig, name, times, values):
+    _, style, ylabel, title = CHANNELS[name]
+    ax = fig.add_subplot()
+    ax.plot(times, values, style, linewidth=2)
+    ax.set_xlabel('Время (с)')
+    ax.set_ylabel(ylabel)
+    ax.set_title(title)
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+
+
+def render(kind, series, path, dpi=DPI):
+    # Figure без pyplot рисуется через Agg и не трогает интерактивный бэкенд
+    if kind == 'combined':
+        fig = Figure(figsize=COMBINED_SIZE)
+        draw_combined(fig, series['combined'])
+    else:
+        fig = Figure(figsize=SINGLE_SIZE)
+        draw_single(fig, kind, *series['single'][kind])
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+
+def output_paths(plots_dir, tag):
+    paths = {'combined': os.path.join(plots_dir, f"combined_plot_{tag}.png")}
+    for name in CHANNELS:
+        paths[name] = os.path.join(plots_dir, f"{name}_{tag}.png")
+    return paths
+
+
+def _prepare_job(job):
+    data_file, dpi = job
+    return prepare(data_file, dpi)
+
+
+def _render_job(job):
+    return render(*job)
+
+
+def render_flights(data_files, plots_dir="flight_plots", dpi=DPI, workers=None, tags=None):
+    os.makedirs(plots_dir, exist_ok=True)
+    tags = tags or [os.path.splitext(os.path.basename(f))[0] for f in data_files]
+    results = {data_file: {} for data_file in data_files}
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for data_file, tag in zip(data_files, tags):
+            series = prepare(data_file, dpi)
+            if series['n']:
+                for kind, path in output_paths(plots_dir, tag).items():
+                    results[data_file][kind] = render(kind, series, path, dpi)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Сначала чтение и прореживание журналов, затем каждый рисунок отдельной задачей
+        prepared = {pool.submit(_prepare_job, (data_file, dpi)): (data_file, tag)
+                    for data_file, tag in zip(data_files, tags)}
+        rendering = {}
+        for future in prepared:
+            data_file, tag = prepared[future]
+            series = future.result()
+            if not series['n']:
+                continue
+            for kind, path in output_paths(plots_dir, tag).items():
+                rendering[pool.submit(_render_job, (kind, series, path, dpi))] = (data_file, kind)
+        wait(rendering)
+        for future, (data_file, kind) in rendering.items():
+            results[data_file][kind] = future.result()
+    return results
+
+
+def render_flight(data_file, plots_dir="flight_plots", dpi=DPI, workers=None):
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    workers = min(workers or os.cpu_count() or 1, len(CHANNELS) + 1)
+    return render_flights([data_file], plots_dir, dpi, workers, [timestamp])[data_file]
+
+
+def render_directory(data_dir="flight_data", plots_dir="flight_plots", dpi=DPI, workers=None):
+    data_files = sorted(glob.glob(os.path.join(data_dir, '*.csv')) + glob.glob(os.path.join(data_dir, '*.bin')))
+    return render_flights(data_files, plots_dir, dpi, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Построение графиков по журналам полёта без окна")
+    parser.add_argument('paths', nargs='*', default=["flight_data"], help="журналы или папки с журналами")
+    parser.add_argument('--out', default="flight_plots")
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    results = {}
+    for path in args.paths:
+        if os.path.isdir(path):
+            results.update(render_directory(path, args.out, args.dpi, args.workers))
+        else:
+            results.update(render_flights([path], args.out, args.dpi, args.workers))
+    n_plots = sum(len(paths) for paths in results.values())
+    print(f"Журналов: {len(results)}, графиков: {n_plots}, {time.perf_counter() - started:.1f} с")
+    return results
+
+
+if __name__ == '__main__':
+    main()
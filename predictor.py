@@ -0,0 +1,212 @@
+import threading
+import time
+from math import exp, hypot, sqrt
+
+from batch_model import R
+from kepler import MU
+from latency import Histogram
+from maneuver import G0
+from mat_model import F_sopr, MODEL_PARAMS, g
+from vehicle import COMPILED
+
+# Жидкое топливо и окислитель KSP: 5 кг на единицу
+PROPELLANT_DENSITY = 5.0
+# Вторая ступень из vehicle.py: площадь миделя и удельный импульс; параметры линейного спада плотности из mat_model.py
+STAGE_2_AREA = COMPILED['stages'][-1]['area']
+STAGE_2_ISP = COMPILED['stages'][-1]['isp']
+PA = 1.225
+T_ATM = 75
+
+
+def apsides(r, vr, vt, mu=MU):
+    # Скалярный вариант kepler.apsides для горячего цикла прогноза: r от центра, vr радиальная, vt трансверсальная
+    energy = (vr * vr + vt * vt) / 2 - mu / r
+    hm = r * vt
+    e = sqrt(max(0.0, 1 + 2 * energy * hm * hm / (mu * mu)))
+    if e >= 1 or energy >= 0:
+        return float('inf'), hm * hm / mu / (1 + e)
+    a = -mu / (2 * energy)
+    return a * (1 + e), a * (1 - e)
+
+
+def velocity_from_orbit(altitude, apoapsis, periapsis, ascending=True, mu=MU, radius=R):
+    # Скорость по элементам орбиты: потоки телеметрии дают апсиды, а не вектор скорости
+    r = radius + altitude
+    r_a = radius + apoapsis
+    r_p = max(radius + periapsis, 0.0)
+    v2 = max(0.0, mu * (2 / r - 2 / (r_a + r_p)))
+    vt = min(sqrt(2 * mu * r_a * r_p / (r_a + r_p)) / r, sqrt(v2))
+    vr = sqrt(max(0.0, v2 - vt * vt))
+    return (vr if ascending else -vr), vt
+
+
+def state_from_snapshot(snap, mission_time):
+    return {
+        'time': mission_time,
+        'altitude': snap.mean_altitude,
+        'apoapsis': snap.apoapsis_altitude,
+        'periapsis': snap.periapsis_altitude,
+        'mass': snap.mass,
+        'thrust': snap.available_thrust,
+        'propellant': (snap.liquid_fuel + snap.oxidizer) * PROPELLANT_DENSITY,
+    }
+
+
+class AscentPredictor:
+    def __init__(self, target=150000, isp=STAGE_2_ISP, cf=MODEL_PARAMS['cf'], s=STAGE_2_AREA, dt=0.1, horizon=300.0,
+                 budget=0.01, mu=MU, radius=R, clock=time.perf_counter):
+        self.target = target
+        self.isp = isp
+        self.cf = cf
+        self.s = s
+        self.dt = dt
+        self.horizon = horizon
+        self.budget = budget
+        self.mu = mu
+        self.radius = radius
+        self.clock = clock
+
+    def circularization(self, r_a, r_p, mass, propellant):
+        mu = self.mu
+        dv = max(0.0, sqrt(mu / r_a) - sqrt(mu * (2 / r_a - 2 / (r_a + r_p))))
+        needed = mass * (1 - exp(-dv / (self.isp * G0)))
+        return dv, needed, propellant - needed
+
+    def predict(self, state):
+        started = self.clock()
+        mu, radius, target_r = self.mu, self.radius, self.radius + self.target
+        r = radius + state['altitude']
+        vr, vt = velocity_from_orbit(state['altitude'], state['apoapsis'], state['periapsis'], mu=mu, radius=radius)
+        m = state['mass']
+        propellant = state['propellant']
+        thrust = state['thrust']
+        flow = thrust / (self.isp * G0) if thrust > 0 else 0.0
+        t0 = state['time']
+
+        r_a, r_p = apsides(r, vr, vt, mu)
+        result = {
+            'time': t0,
+            'apoapsis_now': r_a - radius,
+            'cutoff_in': None,
+            'cutoff_at': None,
+            'apoapsis_max': r_a - radius,
+            'propellant_at_cutoff': None,
+            'circularization_dv': None,
+            'fuel_needed': None,
+            'fuel_margin': None,
+            'fuel_ok': None,
+            'complete': True,
+            'steps': 0,
+        }
+
+        # Полярные координаты в плоскости орбиты, тяга по местному горизонту (тангаж 0, как в автопилоте)
+        elapsed = 0.0
+        steps = 0
+        dt = self.dt
+        while r_a < target_r:
+            if flow <= 0 or propellant <= 0:
+                break
+            if elapsed >= self.horizon:
+                result['complete'] = False
+                break
+            if steps % 16 == 0 and self.clock() - started > self.budget:
+                result['complete'] = False
+                break
+            h = r - radius
+            v = hypot(vr, vt)
+            p = max(0.0, PA - (t0 + elapsed) * PA / T_ATM)
+            drag = F_sopr(h, v, self.cf, p, self.s) / m
+            step = min(dt, propellant / flow)
+            a_r = -g(h) + vt * vt / r - (drag * vr / v if v > 0 else 0.0)
+            a_t = thrust / m - vr * vt / r - (drag * vt / v if v > 0 else 0.0)
+            vr += a_r * step
+            vt += a_t * step
+            r += vr * step
+            m -= flow * step
+            propellant -= flow * step
+            elapsed += step
+            steps += 1
+
+            previous = r_a
+            r_a, r_p = apsides(r, vr, vt, mu)
+            result['apoapsis_max'] = r_a - radius
+            if r_a >= target_r:
+                # Линейная интерполяция момента, когда апоцентр проходит через цель внутри шага
+                back = step * (r_a - target_r) / (r_a - previous) if r_a > previous else 0.0
+                elapsed -= back
+                propellant += flow * back
+                m += flow * back
+                r_a = target_r
+
+        result['steps'] = steps
+        if r_a >= target_r:
+            dv, needed, margin = self.circularization(r_a, max(r_p, 0.0), m, propellant)
+            result.update(cutoff_in=elapsed, cutoff_at=t0 + elapsed, propellant_at_cutoff=propellant,
+                          circularization_dv=dv, fuel_needed=needed, fuel_margin=margin, fuel_ok=margin >= 0)
+        elif result['complete']:
+            # Топливо кончится раньше, чем апоцентр дойдёт до цели
+            result['fuel_ok'] = False
+        result['compute_time'] = self.clock() - started
+        return result
+
+
+class PredictorRunner:
+    # Прогноз в фоновом потоке: цикл управления отдаёт свежее состояние и читает последний готовый прогноз
+    def __init__(self, predictor, background=True):
+        self.predictor = predictor
+        self.background = background
+        self.latest = None
+        self.submitted = 0
+        self.computed = 0
+        self.replaced = 0
+        self.over_budget = 0
+        self.compute_times = Histogram()
+        self._pending = None
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread = None
+        if background:
+            self._thread = threading.Thread(target=self._run, name="predictor", daemon=True)
+            self._thread.start()
+
+    def _compute(self, state):
+        prediction = self.predictor.predict(state)
+        self.compute_times.record(prediction['compute_time'])
+        if prediction['compute_time'] > self.predictor.budget:
+            self.over_budget += 1
+        self.computed += 1
+        self.latest = prediction
+        return prediction
+
+    def submit(self, state):
+        self.submitted += 1
+        if not self.background:
+            return self._compute(state)
+        with self._condition:
+            # Необработанное состояние устаревает: считается только самое свежее
+            if self._pending is not None:
+                self.replaced += 1
+            self._pending = state
+            self._condition.notify()
+        return self.latest
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                state, self._pending = self._pending, None
+            self._compute(state)
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def stats(self):
+        return dict(self.compute_times.summary(), submitted=self.submitted, computed=self.computed,
+                    replaced=self.replaced, over_budget=self.over_budget, budget=self.predictor.budget)
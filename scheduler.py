@@ -0,0 +1,94 @@
+import asyncio
+import inspect
+import time
+
+
+class PeriodicTask:
+    def __init__(self, name, rate, func):
+        self.name = name
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.func = func
+        self.runs = 0
+        self.overruns = 0
+        self.missed = 0
+        self.max_lateness = 0.0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def stats(self):
+        return {
+            'rate': self.rate,
+            'runs': self.runs,
+            'overruns': self.overruns,
+            'missed': self.missed,
+            'max_lateness': self.max_lateness,
+            'mean_time': self.total_time / self.runs if self.runs else 0.0,
+            'max_time': self.max_time,
+        }
+
+
+class FlightScheduler:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.tasks = []
+        self._stop = None
+        self._error = None
+
+    def add(self, name, rate, func):
+        task = PeriodicTask(name, rate, func)
+        self.tasks.append(task)
+        return task
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    async def _run_task(self, task):
+        deadline = self.clock()
+        try:
+            while not self._stop.is_set():
+                started = self.clock()
+                task.max_lateness = max(task.max_lateness, started - deadline)
+                result = task.func()
+                if inspect.isawaitable(result):
+                    await result
+                finished = self.clock()
+                task.runs += 1
+                task.total_time += finished - started
+                task.max_time = max(task.max_time, finished - started)
+
+                deadline += task.period
+                if finished > deadline:
+                    # Пропущенные периоды не навёрстываются: следующий запуск по сетке после текущего момента
+                    task.overruns += 1
+                    skipped = int((finished - deadline) // task.period)
+                    task.missed += skipped
+                    deadline += skipped * task.period
+                await asyncio.sleep(max(0.0, deadline - self.clock()))
+        except Exception as e:
+            self._error = e
+            self._stop.set()
+
+    async def run(self, timeout=None):
+        self._stop = asyncio.Event()
+        self._error = None
+        runners = [asyncio.create_task(self._run_task(task)) for task in self.tasks]
+        try:
+            await asyncio.wait_for(self._stop.wait(), timeout)
+        finally:
+            self._stop.set()
+            for runner in runners:
+                runner.cancel()
+            await asyncio.gather(*runners, return_exceptions=True)
+        if self._error is not None:
+            raise self._error
+
+    def report(self):
+        return {task.name: task.stats() for task in self.tasks}
+
+    def print_report(self):
+        for name, s in self.report().items():
+            print(f"{name}: {s['rate']:.0f} Гц, запусков {s['runs']}, перегрузок {s['overruns']}, "
+                  f"пропущено {s['missed']}, макс. опоздание {s['max_lateness'] * 1000:.1f} мс, "
+                  f"макс. время {s['max_time'] * 1000:.1f} мс")
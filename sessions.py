@@ -0,0 +1,284 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from autopilot import FlightSession
+
+DEFAULT_ENDPOINT = {'address': '127.0.0.1', 'rpc_port': 50000, 'stream_port': 50001, 'flights': 1}
+SUMMARY_FIELDS = ['session', 'flight', 'address', 'rpc_port', 'ok', 'reused', 'apoapsis', 'periapsis', 'mass',
+                  'stage', 'flight_time', 'wall_time', 'loop_p99', 'data_file', 'error']
+
+
+def endpoint_key(endpoint):
+    return endpoint['address'], endpoint['rpc_port'], endpoint['stream_port']
+
+
+def load_config(path):
+    # {"sessions": [{"name": "ksp1", "address": "127.0.0.1", "rpc_port": 50000, "stream_port": 50001, "flights": 2}]}
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    endpoints = []
+    for i, entry in enumerate(config['sessions']):
+        endpoint = dict(DEFAULT_ENDPOINT, **entry)
+        endpoint.setdefault('name', f"ksp{i + 1}")
+        endpoints.append(endpoint)
+    keys = [endpoint_key(e) for e in endpoints]
+    if len(set(keys)) != len(keys):
+        raise ValueError("Один и тот же сервер kRPC указан в нескольких сеансах")
+    names = [e['name'] for e in endpoints]
+    if len(set(names)) != len(names):
+        raise ValueError("Имена сеансов должны быть уникальными")
+    return dict(config, sessions=endpoints)
+
+
+class ConnectionPool:
+    # Одно соединение на сервер: следующий полёт на том же сервере берёт его вместо нового подключения
+    def __init__(self, connect=None, client_name='varkt'):
+        self.connect = connect
+        self.client_name = client_name
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, endpoint):
+        key = endpoint_key(endpoint)
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                conn = idle.pop()
+                if not getattr(conn, 'closed', False):
+                    self.reused += 1
+                    return conn, True
+
+        connect = self.connect
+        if connect is None:
+            import krpc
+
+            connect = krpc.connect
+        conn = connect(name=f"{self.client_name}-{endpoint['name']}", address=endpoint['address'],
+                       rpc_port=endpoint['rpc_port'], stream_port=endpoint['stream_port'])
+        with self._lock:
+            self.created += 1
+        return conn, False
+
+    def release(self, endpoint, conn, broken=False):
+        if broken:
+            # После ошибки состояние соединения неизвестно, следующий полёт подключится заново
+            with self._lock:
+                self.discarded += 1
+            conn.close()
+            return
+        with self._lock:
+            self._idle.setdefault(endpoint_key(endpoint), []).append(conn)
+
+    def stats(self):
+        return {'created': self.created, 'reused': self.reused, 'discarded': self.discarded}
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+class SessionOutput:
+    # Подмена sys.stdout: print из потока сеанса попадает в журнал этого сеанса, остальное на консоль
+    def __init__(self, console):
+        self.console = console
+        self.streams = {}
+
+    def _target(self):
+        return self.streams.get(threading.get_ident(), self.console)
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    @contextmanager
+    def routed(self, stream):
+        ident = threading.get_ident()
+        self.streams[ident] = stream
+        try:
+            yield stream
+        finally:
+            self.streams.pop(ident, None)
+
+
+@contextmanager
+def session_output():
+    output = SessionOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        yield output
+    finally:
+        sys.stdout = output.console
+
+
+def fly_flight(endpoint, flight, pool, data_dir, scheduler=False, clock=time, prediction='thread'):
+    started = time.perf_counter()
+    result = {'session': endpoint['name'], 'flight': flight, 'address': endpoint['address'],
+              'rpc_port': endpoint['rpc_port'], 'ok': False, 'reused': False, 'data_file': None, 'error': None}
+    try:
+        conn, reused = pool.acquire(endpoint)
+    except Exception as e:
+        print(f"Ошибка подключения к KSP: {e}")
+        result['error'] = str(e)
+        return result
+    result['reused'] = reused
+
+    session = FlightSession(endpoint['name'], data_dir, clock, prediction)
+    flight_started = clock.monotonic()
+    broken = False
+    try:
+        if reused:
+            # Соединение уже летало: ракета возвращается на стартовый стол
+            conn.space_center.revert_to_launch()
+        if not session.setup_staging(lambda: conn):
+            raise RuntimeError("Не удалось инициализировать автопилот")
+        result['data_file'] = session.run(scheduler)
+        if session.error is not None:
+            raise session.error
+        snap = session.telemetry.snapshot()
+        result.update(ok=result['data_file'] is not None, apoapsis=snap.apoapsis_altitude,
+                      periapsis=snap.periapsis_altitude, mass=snap.mass, stage=snap.current_stage)
+    except Exception as e:
+        print(f"Ошибка во время выполнения: {e}")
+        result['error'] = str(e)
+        broken = True
+    finally:
+        try:
+            session.close()
+        except Exception:
+            broken = True
+        pool.release(endpoint, conn, broken)
+
+    loop = session.instruments.summary().get('loop.period')
+    result.update(flight_time=clock.monotonic() - flight_started, wall_time=time.perf_counter() - started,
+                  loop_p99=loop['p99'] if loop else None)
+    return result
+
+
+def fly_endpoint(endpoint, pool, out_dir, output, scheduler=False, clock=time, prediction='thread'):
+    # Полёты на одном сервере идут по очереди, разные серверы летают параллельно в своих потоках
+    data_dir = os.path.join(out_dir, endpoint['name'])
+    os.makedirs(data_dir, exist_ok=True)
+    results = []
+    with open(os.path.join(data_dir, 'session.log'), 'a', encoding='utf-8') as log, output.routed(log):
+        for flight in range(1, endpoint['flights'] + 1):
+            print(f"=== Сеанс {endpoint['name']}, полёт {flight}: {endpoint['address']}:{endpoint['rpc_port']} ===")
+            result = fly_flight(endpoint, flight, pool, data_dir, scheduler, clock, prediction)
+            result['log'] = log.name
+            results.append(result)
+            log.flush()
+    return results
+
+
+def sil_backend(endpoints, **options):
+    # Локальные модельные серверы вместо KSP: свой SilSimulation и свои часы на каждый адрес и порт
+    import sil
+
+    sims = {endpoint_key(e): sil.SilSimulation(**options) for e in endpoints}
+
+    def connect(name=None, address='127.0.0.1', rpc_port=50000, stream_port=50001):
+        return sims[(address, rpc_port, stream_port)].connect()
+
+    clocks = {e['name']: sims[endpoint_key(e)].clock for e in endpoints}
+    return connect, clocks
+
+
+def run_sessions(endpoints, out_dir='campaign', connect=None, pool=None, scheduler=False, clocks=None,
+                 prediction='thread'):
+    own_pool = pool is None
+    if own_pool:
+        pool = ConnectionPool(connect)
+    clocks = clocks or {}
+    os.makedirs(out_dir, exist_ok=True)
+    results = {}
+    started = time.perf_counter()
+
+    with session_output() as output:
+        def worker(endpoint):
+            try:
+                results[endpoint['name']] = fly_endpoint(endpoint, pool, out_dir, output, scheduler,
+                                                         clocks.get(endpoint['name'], time), prediction)
+            except Exception as e:
+                results[endpoint['name']] = [{'session': endpoint['name'], 'flight': 0, 'ok': False,
+                                              'error': str(e)}]
+
+        threads = [threading.Thread(target=worker, args=(e,), name=f"session-{e['name']}") for e in endpoints]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    flights = [r for e in endpoints for r in results[e['name']]]
+    report = {
+        'wall_time': time.perf_counter() - started,
+        'sessions': len(endpoints),
+        'flights': len(flights),
+        'ok': sum(r['ok'] for r in flights),
+        'pool': pool.stats(),
+        'results': flights,
+    }
+    if own_pool:
+        pool.close()
+    write_results(report, out_dir)
+    return report
+
+
+def write_results(report, out_dir):
+    with open(os.path.join(out_dir, 'results.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    with open(os.path.join(out_dir, 'results.csv'), 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, SUMMARY_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(report['results'])
+
+
+def print_results(report):
+    print(f"{'сеанс':<12}{'полёт':>6}{'апоцентр, км':>14}{'перицентр, км':>15}{'модель, с':>11}{'реально, с':>12}  итог")
+    for r in report['results']:
+        if r['ok']:
+            print(f"{r['session']:<12}{r['flight']:>6}{r['apoapsis'] / 1000:>14.1f}{r['periapsis'] / 1000:>15.1f}"
+                  f"{r['flight_time']:>11.1f}{r['wall_time']:>12.2f}  ok")
+        else:
+            print(f"{r['session']:<12}{r['flight']:>6}{'':>52}  ошибка: {r['error']}")
+    pool = report['pool']
+    print(f"Полётов {report['ok']}/{report['flights']} за {report['wall_time']:.1f} с, "
+          f"соединений создано {pool['created']}, повторно использовано {pool['reused']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Параллельные полёты автопилота на нескольких серверах kRPC")
+    parser.add_argument('config', help="JSON со списком серверов kRPC (sessions)")
+    parser.add_argument('--out', default='campaign', help="каталог журналов сеансов и сводки")
+    parser.add_argument('--scheduler', action='store_true', help="многочастотный планировщик asyncio")
+    parser.add_argument('--sil', action='store_true', help="локальные модельные серверы вместо KSP")
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    endpoints = config['sessions']
+    scheduler = args.scheduler or config.get('scheduler', False)
+    if args.sil and scheduler:
+        parser.error("--sil нельзя сочетать с планировщиком: он ждёт настоящее время, а модель идёт по своим часам")
+    connect, clocks = sil_backend(endpoints) if args.sil else (None, None)
+    # Модельные часы идут быстрее настоящих, поэтому с --sil прогноз считается в цикле управления
+    report = run_sessions(endpoints, args.out, connect, scheduler=scheduler, clocks=clocks,
+                          prediction='inline' if args.sil else 'thread')
+    print_results(report)
+    print(f"Сводка сохранена: {os.path.join(args.out, 'results.json')}, {os.path.join(args.out, 'results.csv')}")
+    return report
+
+
+if __name__ == '__main__':
+    main()
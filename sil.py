@@ -0,0 +1,295 @@
+import argparse
+import threading
+import time
+from math import cos, hypot, radians, sin
+
+import fake_krpc
+from batch_model import DEFAULT_PARAMS, R, g
+from kepler import MU, KeplerOrbit
+
+G0 = 9.80665
+# Плотности ресурсов KSP, кг на единицу; жидкое топливо и окислитель в объёмной пропорции 9:11
+SOLID_DENSITY = 7.5
+LIQUID_DENSITY = 5.0
+LIQUID_FUEL_SHARE = 0.45
+
+
+class SilTimeout(RuntimeError):
+    pass
+
+
+class SilVehicle:
+    def __init__(self, params=None, pitch_rate=10.0):
+        prm = dict(DEFAULT_PARAMS)
+        if params:
+            prm.update(params)
+        self.prm = prm
+        self.pitch_rate = pitch_rate
+        self.t = 0.0
+        # Плоская задача в инерциальных координатах, старт на поверхности в точке (0, R)
+        self.x, self.y = 0.0, float(R)
+        self.vx, self.vy = 0.0, 0.0
+        self.pitch = 90.0
+        self.mass = float(prm['Mr'])
+        self.solid = float(prm['Mr'] - prm['M0'])
+        self.liquid = float(prm['m2'] - prm['M2'])
+        self.solid_flow = (prm['Mr'] - prm['M0']) / prm['T1']
+        self.liquid_flow = (prm['m2'] - prm['M2']) / prm['T2']
+        self.srb_lit = False
+        self.srb_attached = True
+        self.engine_active = False
+
+    @property
+    def isp(self):
+        return self.prm['Ft2'] / (self.liquid_flow * G0)
+
+    def stage(self):
+        # Первое включение зажигает ускорители, второе сбрасывает их и запускает жидкостный двигатель
+        if not self.srb_lit:
+            self.srb_lit = True
+        elif self.srb_attached:
+            self.mass -= (self.prm['M0'] - self.prm['m2']) + self.solid
+            self.solid = 0.0
+            self.srb_attached = False
+            self.engine_active = True
+
+    def available_thrust(self):
+        thrust = 0.0
+        if self.srb_lit and self.srb_attached and self.solid > 0:
+            thrust += self.prm['Ft1']
+        if self.engine_active and self.liquid > 0:
+            thrust += self.prm['Ft2']
+        return thrust
+
+    def density(self):
+        # Линейный спад плотности по времени, как в мат. модели, но без отрицательных значений
+        return max(0.0, self.prm['pa'] - self.t * self.prm['pa'] / self.prm['T'])
+
+    def altitude(self):
+        return hypot(self.x, self.y) - R
+
+    def step(self, dt, throttle, target_pitch=None):
+        if target_pitch is not None:
+            delta = max(-self.pitch_rate * dt, min(self.pitch_rate * dt, target_pitch - self.pitch))
+            self.pitch += delta
+
+        r = hypot(self.x, self.y)
+        h = r - R
+        up_x, up_y = self.x / r, self.y / r
+        east_x, east_y = up_y, -up_x
+        v = hypot(self.vx, self.vy)
+
+        # Ускорители не дросселируются, жидкостный двигатель работает на заданной тяге
+        thrust = 0.0
+        if self.srb_lit and self.srb_attached and self.solid > 0:
+            thrust += self.prm['Ft1']
+            burned = min(self.solid, self.solid_flow * dt)
+            self.solid -= burned
+            self.mass -= burned
+        if self.engine_active and self.liquid > 0 and throttle > 0:
+            thrust += self.prm['Ft2'] * throttle
+            burned = min(self.liquid, self.liquid_flow * throttle * dt)
+            self.liquid -= burned
+            self.mass -= burned
+
+        p = self.density()
+        s = self.prm['s1'] if self.srb_attached else self.prm['s2']
+        drag = (self.prm['cf'] * (p * s) * v ** 2) / 2 if h < self.prm['h_atm'] else 0.0
+
+        rad = radians(self.pitch)
+        dir_x = cos(rad) * east_x + sin(rad) * up_x
+        dir_y = cos(rad) * east_y + sin(rad) * up_y
+        gh = g(h)
+        ax = thrust * dir_x / self.mass - gh * up_x
+        ay = thrust * dir_y / self.mass - gh * up_y
+        if v > 0:
+            ax -= drag * self.vx / v / self.mass
+            ay -= drag * self.vy / v / self.mass
+
+        if h <= 0 and ax * up_x + ay * up_y <= 0:
+            # Стоит на площадке или на поверхности после падения
+            self.vx, self.vy = 0.0, 0.0
+        else:
+            self.vx += ax * dt
+            self.vy += ay * dt
+            self.x += self.vx * dt
+            self.y += self.vy * dt
+        self.t += dt
+
+    def orbit(self):
+        r = hypot(self.x, self.y)
+        h = r - R
+        v_up = (self.vx * self.x + self.vy * self.y) / r
+        v_east = (self.vx * self.y - self.vy * self.x) / r
+        try:
+            orbit = KeplerOrbit(h, v_east, v_up)
+            return orbit.apoapsis_altitude, orbit.periapsis_altitude, orbit.time_to_apoapsis()
+        except ValueError:
+            # Вертикальный подъём: апоцентр по энергии, перицентр в центре тела
+            energy = v_up ** 2 / 2 - MU / r
+            apoapsis = -MU / energy - R if energy < 0 else float('inf')
+            return apoapsis, -R, max(0.0, v_up / g(h))
+
+    def telemetry(self):
+        h = self.altitude()
+        v = hypot(self.vx, self.vy)
+        apoapsis, periapsis, time_to_apoapsis = self.orbit()
+        liquid_units = self.liquid / LIQUID_DENSITY
+        return {
+            'mean_altitude': h,
+            'surface_altitude': h,
+            'dynamic_pressure': self.density() * v ** 2 / 2,
+            'speed': v,
+            'mass': self.mass,
+            'available_thrust': self.available_thrust(),
+            'apoapsis_altitude': apoapsis,
+            'periapsis_altitude': periapsis,
+            'time_to_apoapsis': time_to_apoapsis,
+            'specific_impulse': self.isp,
+        }, {
+            'SolidFuel': self.solid / SOLID_DENSITY if self.srb_attached else 0.0,
+            'LiquidFuel': liquid_units * LIQUID_FUEL_SHARE,
+            'Oxidizer': liquid_units * (1 - LIQUID_FUEL_SHARE),
+        }
+
+
+class VirtualClock:
+    def __init__(self, sim, epoch=None):
+        self.sim = sim
+        self.epoch = time.time() if epoch is None else epoch
+        # Модельное время прошлых полётов того же соединения, чтобы часы не шли назад после возврата на старт
+        self.offset = 0.0
+
+    def sleep(self, seconds):
+        self.sim.advance(seconds)
+
+    def monotonic(self):
+        return self.offset + self.sim.vehicle.t
+
+    perf_counter = monotonic
+
+    def time(self):
+        return self.epoch + self.monotonic()
+
+
+class SilSimulation:
+    def __init__(self, params=None, dt=0.02, frame=0.05, t_max=3600.0, pitch_rate=10.0):
+        self.params = params
+        self.pitch_rate = pitch_rate
+        self.vehicle = SilVehicle(params, pitch_rate)
+        self.dt = dt
+        self.frame = frame
+        self.t_max = t_max
+        self.frames = 0
+        self._next_frame = 0.0
+        self.conn = fake_krpc.FakeConnection()
+        self.vessel = self.conn.vessel
+        self.vessel.on_stage = lambda vessel: self.vehicle.stage()
+        self.vessel.on_revert = lambda vessel: self.revert()
+        self.clock = VirtualClock(self)
+        self.publish()
+
+    def revert(self):
+        # Аналог revert_to_launch в KSP: новая ракета на площадке, соединение и часы прежние
+        self.clock.offset += self.vehicle.t
+        self.vehicle = SilVehicle(self.params, self.pitch_rate)
+        self._next_frame = 0.0
+        self.publish()
+        self.conn.update()
+
+    def connect(self, *args, **kwargs):
+        return self.conn
+
+    def publish(self):
+        state, resources = self.vehicle.telemetry()
+        self.vessel.state.update(state)
+        self.vessel.state['resources'].update(resources)
+
+    def _controls(self):
+        with self.conn.server_side():
+            throttle = self.vessel.control.throttle
+            ap = self.vessel.auto_pilot
+            target = ap.target_pitch if ap.engaged else None
+        return throttle, target
+
+    def _frame(self):
+        self.publish()
+        running = set(threading.enumerate())
+        self.conn.update()
+        self.frames += 1
+        # Действия по событиям выполняются в своих потоках; ждём их, чтобы прогон был детерминированным.
+        # Только потоки, запущенные этим кадром: рядом могут лететь другие модели
+        for thread in threading.enumerate():
+            if thread.name.startswith('event-') and thread not in running and thread.is_alive():
+                thread.join()
+
+    def advance(self, seconds):
+        vehicle = self.vehicle
+        target = vehicle.t + max(0.0, seconds)
+        while vehicle.t < target - 1e-9:
+            throttle, pitch = self._controls()
+            vehicle.step(min(self.dt, target - vehicle.t), throttle, pitch)
+            if vehicle.t >= self._next_frame:
+                self._frame()
+                self._next_frame += self.frame
+            if vehicle.t > self.t_max:
+                raise SilTimeout(f"Полёт не завершён за {self.t_max:.0f} с модельного времени")
+        self._frame()
+
+
+def run_ascent(params=None, data_dir='flight_data', prediction='inline', live=False, **options):
+    from autopilot import FlightSession
+
+    sim = SilSimulation(params, **options)
+    started = time.perf_counter()
+    timed_out = False
+    # Автопилот получает модельные часы вместо модуля time: sleep двигает модель, а не ждёт
+    # Прогноз считается прямо в цикле: фоновый поток по настоящим часам отставал бы от модельного времени
+    session = FlightSession('sil', data_dir, sim.clock, prediction)
+    if not session.setup_staging(sim.connect):
+        return None
+    try:
+        data_file = session.launch_with_data_logging(live)
+    except SilTimeout as e:
+        print(e)
+        timed_out = True
+        data_file = session.data_logger.data_file if session.data_logger else None
+        if session.data_logger:
+            session.data_logger.close()
+    session.close()
+    wall = time.perf_counter() - started
+    state = sim.vessel.state
+    return {
+        'data_file': data_file,
+        'timed_out': timed_out,
+        'virtual_time': sim.vehicle.t,
+        'wall_time': wall,
+        'speedup': sim.vehicle.t / wall if wall > 0 else float('inf'),
+        'frames': sim.frames,
+        'apoapsis': state['apoapsis_altitude'],
+        'periapsis': state['periapsis_altitude'],
+        'mass': state['mass'],
+        'stage': state['current_stage'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Полёт автопилота против модели вместо KSP")
+    parser.add_argument('--dt', type=float, default=0.02, help="шаг интегрирования, с")
+    parser.add_argument('--frame', type=float, default=0.05, help="период обновления потоков kRPC, с")
+    parser.add_argument('--t-max', type=float, default=3600.0, help="предел модельного времени, с")
+    parser.add_argument('--live', action='store_true', help="живые графики по журналу во время полёта")
+    args = parser.parse_args(argv)
+
+    result = run_ascent(live=args.live, dt=args.dt, frame=args.frame, t_max=args.t_max)
+    if result is None:
+        return None
+    print(f"Модельное время {result['virtual_time']:.1f} с за {result['wall_time']:.2f} с "
+          f"(x{result['speedup']:.0f}), кадров {result['frames']}")
+    print(f"Апоцентр {result['apoapsis'] / 1000:.1f} км, перицентр {result['periapsis'] / 1000:.1f} км, "
+          f"масса {result['mass']:.0f} кг")
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch_model import DEFAULT_PARAMS, simulate_batch
+from kepler import apsides
+
+TARGET_ALTITUDE = 150000
+# Апоцентр в этих пределах от цели считается попаданием; перелёт так же плох, как недолёт
+TOLERANCE = 5000
+
+# Имена из autopilot.py -> параметры физической модели
+ALIASES = {
+    'TURN_START_ALT': 'h_turn_1',
+    'TURN_END_ALT': 'h_orbit',
+    'MAX_Q_THROTTLE': 'throttle',
+}
+
+DEFAULT_BOUNDS = {
+    'alpha1': (70.0, 90.0),
+    'tpov': (5.0, 60.0),
+    'throttle': (0.5, 1.0),
+}
+# Точек по каждому параметру в грубой сетке: перебор без аргументов и старты оптимизатора
+GRID_POINTS = 12
+
+
+def resolve_name(name):
+    name = ALIASES.get(name, name)
+    if name not in DEFAULT_PARAMS:
+        raise KeyError(f"Неизвестный параметр: {name}")
+    return name
+
+
+def with_windows(params):
+    # Окна начала поворотов сдвигаются вместе с порогом по высоте
+    params = dict(params)
+    if 'h_turn_1' in params:
+        params['h_window_1'] = np.asarray(params['h_turn_1']) + DEFAULT_PARAMS['h_window_1'] - DEFAULT_PARAMS['h_turn_1']
+    if 'h_turn_2' in params:
+        params['h_window_2'] = np.asarray(params['h_turn_2']) + DEFAULT_PARAMS['h_window_2'] - DEFAULT_PARAMS['h_turn_2']
+    return params
+
+
+def parse_range(text):
+    if ':' in text:
+        start, stop, num = text.split(':')
+        return np.linspace(float(start), float(stop), int(num))
+    return np.array([float(x) for x in text.split(',')])
+
+
+def make_grid(grid):
+    names = [resolve_name(name) for name in grid]
+    values = [np.atleast_1d(np.asarray(v, dtype=float)) for v in grid.values()]
+    mesh = np.meshgrid(*values, indexing='ij')
+    return {name: m.ravel() for name, m in zip(names, mesh)}
+
+
+def evaluate(params, target=TARGET_ALTITUDE, tolerance=TOLERANCE):
+    res = simulate_batch(with_windows(params), record=False)
+    apoapsis, periapsis = apsides(res['h'], res['vx'], res['vy'])
+    miss = np.abs(apoapsis - target)
+    return {
+        'apoapsis': apoapsis,
+        'periapsis': periapsis,
+        'v': res['v'],
+        'm': res['m'],
+        'h': res['h'],
+        'miss': miss,
+        'reached': miss <= tolerance,
+    }
+
+
+def _evaluate_chunk(args):
+    params, target = args
+    return evaluate(params, target)
+
+
+def rank(table):
+    # Сначала попавшие в целевой апоцентр по остатку массы, затем остальные по промаху
+    order = np.lexsort((table['miss'], -np.where(table['reached'], table['m'], -np.inf), ~table['reached']))
+    return {name: col[order] for name, col in table.items()}
+
+
+def sweep(grid, target=TARGET_ALTITUDE, workers=None, chunk_size=2000):
+    if not grid:
+        raise ValueError("Сетка перебора пуста")
+    candidates = make_grid(grid)
+    n = next(iter(candidates.values())).size
+    chunks = [({name: col[i:i + chunk_size] for name, col in candidates.items()}, target)
+              for i in range(0, n, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        results = [_evaluate_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_evaluate_chunk, chunks))
+    table = dict(candidates)
+    for name in results[0]:
+        table[name] = np.concatenate([r[name] for r in results])
+    return rank(table)
+
+
+def objective(x, names, bounds, target=TARGET_ALTITUDE, penalty=1.0):
+    lo = np.array([bounds[name][0] for name in names])
+    hi = np.array([bounds[name][1] for name in names])
+    clipped = np.clip(x, lo, hi)
+    res = evaluate(dict(zip(names, clipped)), target)
+    outside = float(np.sum(np.abs(x - clipped) / (hi - lo)))
+    return -float(res['m'][0]) + penalty * float(res['miss'][0]) + 1e4 * outside
+
+
+def _minimize(args):
+    from scipy.optimize import minimize
+
+    x0, names, bounds, target = args
+    res = minimize(objective, x0, args=(names, bounds, target), method='Nelder-Mead',
+                   options={'xatol': 1e-3, 'fatol': 1e-3, 'maxiter': 400})
+    return res.x, res.fun, res.nfev
+
+
+def optimize(bounds=None, target=TARGET_ALTITUDE, starts=8, workers=None, grid_points=GRID_POINTS):
+    bounds = {resolve_name(name): b for name, b in (bounds or DEFAULT_BOUNDS).items()}
+    names = list(bounds)
+    lo = np.array([bounds[name][0] for name in names])
+    hi = np.array([bounds[name][1] for name in names])
+    # Промах по апоцентру меняется ступеньками, поэтому старты берутся из лучших точек грубой сетки,
+    # а не случайно: из случайной точки симплекс застревает на ближайшей ступеньке
+    grid = sweep({name: np.linspace(bounds[name][0], bounds[name][1], grid_points) for name in names}, target, 1)
+    x0s = [np.array([grid[name][i] for name in names]) for i in range(min(starts, grid['m'].size))]
+    jobs = [(x0, names, bounds, target) for x0 in x0s]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [_minimize(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, starts)) as pool:
+            results = list(pool.map(_minimize, jobs))
+    x, fun, _ = min(results, key=lambda r: r[1])
+    best = dict(zip(names, np.clip(x, lo, hi)))
+    res = evaluate(best, target)
+    return {
+        'params': {name: float(v) for name, v in best.items()},
+        'apoapsis': float(res['apoapsis'][0]),
+        'reached': bool(res['reached'][0]),
+        'v': float(res['v'][0]),
+        'm': float(res['m'][0]),
+        'objective': fun,
+        'evaluations': sum(r[2] for r in results),
+    }
+
+
+def print_table(table, top=20):
+    names = [name for name in table if name not in ('apoapsis', 'periapsis', 'v', 'm', 'h', 'miss', 'reached')]
+    header = names + ['апоцентр, км', 'скорость, м/с', 'масса, кг']
+    print(' | '.join(f"{h:>14}" for h in header))
+    for i in range(min(top, table['m'].size)):
+        row = [f"{table[name][i]:>14.3f}" for name in names]
+        row += [f"{table['apoapsis'][i] / 1000:>14.1f}", f"{table['v'][i]:>14.1f}", f"{table['m'][i]:>14.1f}"]
+        print(' | '.join(row))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перебор и оптимизация программы тангажа")
+    parser.add_argument('grid', nargs='*', help="параметр=начало:конец:число или параметр=a,b,c")
+    parser.add_argument('--target', type=float, default=TARGET_ALTITUDE)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--optimize', action='store_true', help="поиск Нелдера-Мида из нескольких стартов")
+    parser.add_argument('--starts', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    if args.optimize:
+        bounds = None
+        if args.grid:
+            bounds = {}
+            for item in args.grid:
+                name, text = item.split('=')
+                values = parse_range(text)
+                bounds[name] = (float(values.min()), float(values.max()))
+        best = optimize(bounds, args.target, args.starts, args.workers)
+        print(f"Лучший профиль: {best['params']}")
+        print(f"Апоцентр {best['apoapsis'] / 1000:.1f} км, скорость {best['v']:.1f} м/с, "
+              f"масса {best['m']:.1f} кг ({best['evaluations']} вычислений модели)")
+        return best
+
+    if args.grid:
+        grid = {name: parse_range(text) for name, text in (item.split('=') for item in args.grid)}
+    else:
+        # Без аргументов перебираются параметры по умолчанию в их пределах
+        grid = {name: np.linspace(lo, hi, GRID_POINTS) for name, (lo, hi) in DEFAULT_BOUNDS.items()}
+    table = sweep(grid, args.target, args.workers)
+    print_table(table, args.top)
+    return table
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import threading
+import time
+
+
+class Snapshot:
+    __slots__ = ('_values', '_hub', 'time')
+
+    def __init__(self, hub, values, timestamp):
+        self._hub = hub
+        self._values = values
+        self.time = timestamp
+
+    def __getattr__(self, name):
+        try:
+            value = self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        # Каждое чтение из снимка раньше было отдельным RPC
+        self._hub.reads += 1
+        return value
+
+    def as_dict(self):
+        return dict(self._values)
+
+
+class TelemetryHub:
+    def __init__(self, conn, vessel, clock=time):
+        self.conn = conn
+        self.vessel = vessel
+        # Часы сеанса: в SIL снимки помечаются модельным временем, а не настенным
+        self.clock = clock
+        self.control = vessel.control
+        self.reads = 0
+        self.ticks = 0
+        self.setup_rpcs = 0
+        self._lock = threading.Lock()
+
+        rpc_before = getattr(conn, 'rpc_count', None)
+        flight = vessel.flight()
+        # Скорость в невращающейся системе тела - орбитальная, как в модели. Во вращающейся она меньше на
+        # скорость поверхности (около 175 м/с на экваторе Кербина), и апоцентр по журналу выходит заниженным
+        body_flight = vessel.flight(vessel.orbit.body.non_rotating_reference_frame)
+        orbit = vessel.orbit
+        resources = vessel.resources
+        self.streams = {
+            'mean_altitude': conn.add_stream(getattr, flight, 'mean_altitude'),
+            'surface_altitude': conn.add_stream(getattr, flight, 'surface_altitude'),
+            'dynamic_pressure': conn.add_stream(getattr, flight, 'dynamic_pressure'),
+            'speed': conn.add_stream(getattr, body_flight, 'speed'),
+            'apoapsis_altitude': conn.add_stream(getattr, orbit, 'apoapsis_altitude'),
+            'periapsis_altitude': conn.add_stream(getattr, orbit, 'periapsis_altitude'),
+            'time_to_apoapsis': conn.add_stream(getattr, orbit, 'time_to_apoapsis'),
+            'mass': conn.add_stream(getattr, vessel, 'mass'),
+            'available_thrust': conn.add_stream(getattr, vessel, 'available_thrust'),
+            'current_stage': conn.add_stream(getattr, self.control, 'current_stage'),
+            'solid_fuel': conn.add_stream(resources.amount, 'SolidFuel'),
+            'liquid_fuel': conn.add_stream(resources.amount, 'LiquidFuel'),
+            'oxidizer': conn.add_stream(resources.amount, 'Oxidizer'),
+        }
+        for stream in self.streams.values():
+            stream.start()
+        if rpc_before is not None:
+            self.setup_rpcs = conn.rpc_count - rpc_before
+
+        self._snapshot = None
+        self._refresh()
+        conn.add_stream_update_callback(self._refresh)
+
+    def _refresh(self):
+        # Вызывается после каждого сообщения StreamUpdate, поэтому все поля снимка из одного кадра
+        values = {name: stream() for name, stream in self.streams.items()}
+        with self._lock:
+            self._snapshot = Snapshot(self, values, self.clock.time())
+
+    def snapshot(self):
+        with self._lock:
+            self.ticks += 1
+            return self._snapshot
+
+    def rpcs_saved_per_tick(self):
+        return self.reads / self.ticks if self.ticks else 0.0
+
+    def report(self):
+        return {
+            'ticks': self.ticks,
+            'reads': self.reads,
+            'setup_rpcs': self.setup_rpcs,
+            'rpcs_saved_per_tick': self.rpcs_saved_per_tick(),
+        }
+
+    def close(self):
+        self.conn.remove_stream_update_callback(self._refresh)
+        for stream in self.streams.values():
+            stream.remove()
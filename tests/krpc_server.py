@@ -0,0 +1,116 @@
+import socket
+import threading
+
+from krpc.decoder import Decoder
+from krpc.encoder import Encoder
+from krpc.schema import KRPC_pb2 as KRPC
+
+
+def receive_message(sock, typ):
+    data = b''
+    while True:
+        byte = sock.recv(1)
+        if not byte:
+            raise ConnectionError("Соединение закрыто")
+        data += byte
+        try:
+            size = Decoder.decode_message_size(data)
+            break
+        except IndexError:
+            pass
+    body = b''
+    while len(body) < size:
+        chunk = sock.recv(size - len(body))
+        if not chunk:
+            raise ConnectionError("Соединение закрыто")
+        body += chunk
+    return Decoder.decode_message(body, typ)
+
+
+def send_message(sock, message):
+    sock.sendall(Encoder.encode_message_with_size(message))
+
+
+class MiniKrpcServer:
+    # Настоящие сокеты и протокол kRPC: рукопожатие RPC и потоков и ответ на KRPC.GetServices без сервисов.
+    # Этого хватает, чтобы krpc.connect вернул клиента, а ConnectionPool прошёл путь настоящего подключения
+    def __init__(self):
+        self.rpc = socket.create_server(('127.0.0.1', 0))
+        self.stream = socket.create_server(('127.0.0.1', 0))
+        self.rpc_port = self.rpc.getsockname()[1]
+        self.stream_port = self.stream.getsockname()[1]
+        self.clients = []
+        self.calls = []
+        self.connections = []
+        self._next_id = 0
+        self._lock = threading.Lock()
+        for sock, handler in ((self.rpc, self._serve_rpc), (self.stream, self._serve_stream)):
+            threading.Thread(target=self._accept, args=(sock, handler), daemon=True).start()
+
+    def _accept(self, sock, handler):
+        while True:
+            try:
+                conn, _ = sock.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections.append(conn)
+            threading.Thread(target=self._guard, args=(handler, conn), daemon=True).start()
+
+    @staticmethod
+    def _guard(handler, conn):
+        try:
+            handler(conn)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _handshake(self, conn, expected):
+        request = receive_message(conn, KRPC.ConnectionRequest)
+        response = KRPC.ConnectionResponse()
+        if request.type != expected:
+            response.status = KRPC.ConnectionResponse.WRONG_TYPE
+        else:
+            response.status = KRPC.ConnectionResponse.OK
+            with self._lock:
+                self._next_id += 1
+                response.client_identifier = self._next_id.to_bytes(16, 'little')
+        send_message(conn, response)
+        return request
+
+    def _serve_rpc(self, conn):
+        request = self._handshake(conn, KRPC.ConnectionRequest.RPC)
+        with self._lock:
+            self.clients.append(request.client_name)
+        while True:
+            request = receive_message(conn, KRPC.Request)
+            response = KRPC.Response()
+            for call in request.calls:
+                self.calls.append((call.service, call.procedure))
+                result = response.results.add()
+                if (call.service, call.procedure) == ('KRPC', 'GetServices'):
+                    result.value = KRPC.Services().SerializeToString()
+                else:
+                    result.error.service = call.service
+                    result.error.name = 'NotImplemented'
+                    result.error.description = f"{call.service}.{call.procedure} не поддерживается"
+            send_message(conn, response)
+
+    def _serve_stream(self, conn):
+        self._handshake(conn, KRPC.ConnectionRequest.STREAM)
+        # Обновлений потоков нет: соединение держится открытым, пока клиент его не закроет
+        while conn.recv(1024):
+            pass
+
+    def close(self):
+        self.rpc.close()
+        self.stream.close()
+        with self._lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
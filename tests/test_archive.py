@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+
+import archive
+import flightlog
+from kepler import MU, R
+
+
+def write_log(path, rows=300, append=False):
+    t = np.arange(rows) * 0.5
+    data = np.zeros(rows, dtype=flightlog.DTYPE)
+    data['time'] = t
+    data['altitude'] = 150_000.0
+    data['velocity'] = 2000.0
+    data['mass'] = 4000.0
+    data['stage'] = np.where(t < 50, 3, 2)
+    with open(path, 'ab' if append else 'wb') as f:
+        if not append:
+            f.write(flightlog.encode_header())
+        f.write(data.tobytes())
+
+
+def test_final_orbit_from_orbital_speed():
+    # Круговая орбита 150 км: журнал пишет орбитальную скорость, апоцентр и перицентр на высоте орбиты
+    t = np.arange(0.0, 10.0, 0.5)
+    h = np.full(t.size, 150_000.0)
+    v = np.full(t.size, np.sqrt(MU / (R + 150_000.0)))
+    apoapsis, periapsis = archive.final_orbit(t, h, v)
+    assert abs(apoapsis - 150_000) < 1 and abs(periapsis - 150_000) < 1
+
+
+def test_ingest_skips_archived_files(tmp_path):
+    data_dir = tmp_path / 'flight_data'
+    data_dir.mkdir()
+    for name in ('flight_data_20260901_100000.bin', 'flight_data_20260902_100000.bin'):
+        write_log(data_dir / name)
+    (data_dir / 'flight_data_20260901_100000_latency.json').write_text('{}')
+
+    with archive.FlightArchive(str(tmp_path / 'archive.sqlite')) as db:
+        assert db.ingest([str(data_dir)]) == {'added': 2, 'updated': 0, 'skipped': 0, 'failed': 0, 'removed': 0}
+        ids = {row['path']: row['id'] for row in db.query()}
+
+        # Повторный проход не перечитывает уже добавленные журналы
+        assert db.ingest([str(data_dir)]) == {'added': 0, 'updated': 0, 'skipped': 2, 'failed': 0, 'removed': 0}
+        assert {row['path']: row['id'] for row in db.query()} == ids
+
+        # Дописанный журнал пересчитывается, удалённый убирается из архива
+        write_log(data_dir / 'flight_data_20260902_100000.bin', rows=10, append=True)
+        os.remove(data_dir / 'flight_data_20260901_100000.bin')
+        assert db.ingest([str(data_dir)]) == {'added': 0, 'updated': 1, 'skipped': 0, 'failed': 0, 'removed': 1}
+        (flight,) = db.query()
+        assert flight['samples'] == 310 and flight['started'] == '2026-09-02 10:00:00'
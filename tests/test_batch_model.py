@@ -0,0 +1,22 @@
+import numpy as np
+
+from batch_model import simulate_batch
+from mat_model import run_model
+
+
+def test_batch_matches_mat_model():
+    # Наборы задевают все участки: сопротивление и угол первого поворота, поворот и тяга второй ступени
+    params = {
+        'cf': np.array([0.48, 0.3, 0.6, 0.48]),
+        'alpha1': np.array([80.0, 80.0, 75.0, 80.0]),
+        'tpov2': np.array([34.0, 30.0, 40.0, 50.0]),
+        'T2': np.array([75.0, 75.0, 75.0, 90.0]),
+    }
+    res = simulate_batch(params)
+    for i in range(len(params['cf'])):
+        model = run_model({name: float(values[i]) for name, values in params.items()})
+        steps = len(model['t_res'])
+        assert res['n_steps'][i] == steps
+        assert np.array_equal(res['t_res'][:steps], model['t_res'])
+        for key in ('h_res', 'v_res', 'm_res'):
+            assert np.allclose(res[key][i, :steps], model[key], rtol=1e-12, atol=1e-6)
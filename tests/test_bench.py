@@ -0,0 +1,43 @@
+import time
+
+import bench
+
+
+def report(**results):
+    return {'results': {name: dict(res, unit='шаг/с', higher_is_better=True) for name, res in results.items()}}
+
+
+def test_measure_skips_warmup_runs():
+    calls = []
+    runs = bench.measure(lambda: calls.append(1), repeat=4, warmup=2, min_time=0)
+    assert len(runs) == 4 and len(calls) == 6
+
+
+def test_short_calls_are_repeated_within_a_run():
+    calls = []
+
+    def call():
+        calls.append(1)
+        time.sleep(0.002)
+
+    runs = bench.measure(call, repeat=3, min_time=0.02)
+    # Каждый замер длится не меньше min_time, а в runs остаётся время одного вызова
+    assert len(runs) == 3 and len(calls) >= 1 + 3 * 5
+    assert all(0.002 <= r < 0.02 for r in runs)
+
+
+def test_limit_follows_measured_spread():
+    runs = [1.0, 1.1, 1.2, 1.04, 1.3]
+    res = bench.rate(100, runs, 'шаг/с')
+    assert res['value'] == 100.0
+    assert abs(res['spread'] - 0.3) < 1e-12
+
+    baseline = report(stable={'value': 100.0, 'spread': 0.01}, noisy={'value': 100.0, 'spread': 0.1})
+    # 12% хуже: для стабильного замера (допуск 5%) это регрессия, для шумного (2 × 10%) - нет
+    current = report(stable={'value': 88.0, 'spread': 0.01}, noisy={'value': 88.0, 'spread': 0.1})
+    regressions = bench.check_regressions(current, baseline)
+    assert [r[0] for r in regressions] == ['stable']
+    assert regressions[0][4] == bench.MIN_THRESHOLD
+    # Явный допуск заменяет рассчитанный
+    assert [r[0] for r in bench.check_regressions(current, baseline, threshold=0.1)] == ['stable', 'noisy']
+    assert bench.check_regressions(current, baseline, threshold=0.2) == []
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+
+from cache import ResultCache, make_key
+
+
+def result(seed):
+    # Случайные данные почти не сжимаются, и записи выходят одного размера
+    return {'h_res': np.random.default_rng(seed).random(2000)}
+
+
+def test_hits_and_misses(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return result(0)
+
+    first = cache.cached('model', 1, {'cf': 0.48}, compute)
+    # 0.48 и np.float64(0.48) - один ключ
+    again = cache.cached('model', 1, {'cf': np.float64(0.48)}, compute)
+    assert again is first and len(calls) == 1
+    assert cache.cached('model', 2, {'cf': 0.48}, compute) is not first and len(calls) == 2
+    stats = cache.stats()
+    assert (stats['misses'], stats['memory_hits'], stats['disk_hits'], stats['stores']) == (2, 1, 0, 2)
+
+    # Новый процесс находит запись на диске, дальше она отдаётся из памяти
+    reopened = ResultCache(str(tmp_path))
+    key = make_key('model', 1, {'cf': 0.48})
+    assert np.array_equal(reopened.get(key)['h_res'], first['h_res'])
+    assert reopened.get(key) is reopened.get(key)
+    assert reopened.get(make_key('model', 1, {'cf': 0.5})) is None
+    stats = reopened.stats()
+    assert (stats['disk_hits'], stats['memory_hits'], stats['misses']) == (1, 2, 1)
+
+
+def test_overwrite_counts_size_once(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put('aa', result(0))
+    for seed in range(5):
+        cache.put('ab', result(seed))
+    assert cache._disk_bytes == cache.disk_usage()[1]
+    assert cache.stats()['evictions'] == 0
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.put('aa', result(0))
+    size = cache.disk_usage()[1]
+    cache = ResultCache(str(tmp_path), max_bytes=int(size * 2.5))
+    cache.put('bb', result(1))
+    os.utime(cache._file('aa'), (1000, 1000))
+    os.utime(cache._file('bb'), (2000, 2000))
+
+    # Обращение с диска обновляет отметку: теперь самая давняя запись - bb
+    assert ResultCache(str(tmp_path)).get('aa') is not None
+    cache.put('cc', result(2))
+    assert cache.stats()['evictions'] == 1
+    assert os.path.exists(cache._file('aa')) and os.path.exists(cache._file('cc'))
+    assert not os.path.exists(cache._file('bb'))
+    assert cache.disk_usage()[1] <= cache.max_bytes
+
+
+def test_memory_tier_keeps_recent_items(tmp_path):
+    cache = ResultCache(str(tmp_path), memory_items=2)
+    for key in ('aa', 'bb'):
+        cache.put(key, result(0))
+    cache.get('aa')
+    cache.put('cc', result(0))
+    assert list(cache.memory) == ['aa', 'cc']
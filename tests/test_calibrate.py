@@ -0,0 +1,44 @@
+import numpy as np
+
+import calibrate
+from batch_model import simulate_batch
+from mat_model import run_model
+
+TRUTH = {'cf': 0.6, 'T1': 45.0}
+NOISE = {'altitude': 50.0, 'velocity': 2.0, 'mass': 20.0}
+
+
+def synthetic_flight(**params):
+    res = simulate_batch(params)
+    t = np.asarray(res['t_res'], dtype=float)
+    rng = np.random.default_rng(1)
+    flight = {'time': t}
+    for name, key in (('altitude', 'h_res'), ('velocity', 'v_res'), ('mass', 'm_res')):
+        flight[name] = res[key][0] + rng.normal(0, NOISE[name], t.size)
+    return flight
+
+
+def test_fit_recovers_parameters_inside_the_interval():
+    flight = synthetic_flight(**TRUTH)
+    fit = calibrate.calibrate([flight], bounds={'cf': (0.05, 2.0), 'T1': (20.0, 80.0)}, starts=1, workers=1)
+    for name, value in TRUTH.items():
+        lo, hi = fit['ci'][name]
+        assert lo <= value <= hi
+        assert 0 < hi - lo < 0.05 * value
+
+    # Подобранные значения подставляются в mat_model как есть и повторяют записанный полёт с точностью до шума
+    model = run_model(fit['params'])
+    for name, key in (('altitude', 'h_res'), ('velocity', 'v_res'), ('mass', 'm_res')):
+        predicted = np.interp(flight['time'], model['t_res'], model[key])
+        rmse = np.sqrt(np.mean((predicted - flight[name]) ** 2))
+        assert rmse < 1.2 * NOISE[name]
+
+
+def test_parameter_without_effect_is_not_determined():
+    # Высота начала поворота задана выше всего полёта: угол второго поворота на траекторию не влияет
+    fixed = {'h_turn_2': 1e9, 'h_window_2': 1e9}
+    problem = calibrate.FitProblem([synthetic_flight(cf=0.6, **fixed)], ['cf', 'alpha2'], fixed)
+    lo, hi = np.array([0.05, 0.0]), np.array([2.0, 90.0])
+    ci_lo, ci_hi, _ = calibrate.confidence_intervals(problem, np.array([0.6, 0.0]), lo, hi)
+    assert np.isfinite(ci_lo[0]) and ci_lo[0] < 0.6 < ci_hi[0]
+    assert ci_lo[1] == -np.inf and ci_hi[1] == np.inf
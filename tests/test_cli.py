@@ -0,0 +1,27 @@
+import pytest
+
+import cli
+import sil
+
+
+def test_fly_sil_passes_live_through(monkeypatch):
+    calls = []
+    monkeypatch.setattr(sil, 'main', lambda argv: calls.append(argv))
+    cli.main(['fly', '--sil', '--live', '--no-plot'])
+    cli.main(['fly', '--sil', '--no-plot'])
+    assert calls == [['--live'], []]
+
+
+def test_fly_sil_rejects_scheduler(capsys):
+    with pytest.raises(SystemExit):
+        cli.main(['fly', '--sil', '--scheduler'])
+    assert '--scheduler' in capsys.readouterr().err
+
+
+def test_forwarded_options_go_first(monkeypatch):
+    import cache
+
+    seen = []
+    monkeypatch.setattr(cache, 'main', lambda argv: seen.append(argv))
+    cli.main(['cache', '--max-mb', '5'])
+    assert seen == [['--max-mb', '5']]
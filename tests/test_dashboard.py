@@ -0,0 +1,44 @@
+import numpy as np
+
+import flightlog
+from dashboard import LogTail
+from test_flightlog import sample_rows, write_binary
+
+
+def test_log_tail_waits_for_partial_binary_records(tmp_path):
+    data = sample_rows(10)
+    raw = data.tobytes()
+    header = flightlog.encode_header()
+    path = tmp_path / 'log.bin'
+    tail = LogTail(str(path))
+
+    # Заголовок пишется по частям: пока он не дописан, записей нет
+    path.write_bytes(header[:20])
+    assert len(tail.poll()) == 0
+    with open(path, 'ab') as f:
+        f.write(header[20:] + raw[:3 * data.itemsize + 5])
+    assert np.array_equal(tail.poll(), data[:3])
+    with open(path, 'ab') as f:
+        f.write(raw[3 * data.itemsize + 5:7 * data.itemsize - 1])
+    assert np.array_equal(tail.poll(), data[3:6])
+    with open(path, 'ab') as f:
+        f.write(raw[7 * data.itemsize - 1:])
+    assert np.array_equal(tail.poll(), data[6:])
+    assert len(tail.poll()) == 0
+
+
+def test_log_tail_waits_for_partial_csv_lines(tmp_path):
+    data = sample_rows(6)
+    path = tmp_path / 'log.csv'
+    write_binary(tmp_path / 'src.bin', data)
+    text = open(flightlog.binary_to_csv(str(tmp_path / 'src.bin'), str(tmp_path / 'src.csv')), 'rb').read()
+    lines = text.splitlines(keepends=True)
+    tail = LogTail(str(path))
+
+    path.write_bytes(lines[0][:5])
+    assert len(tail.poll()) == 0
+    path.write_bytes(lines[0] + lines[1] + lines[2][:7])
+    assert np.array_equal(tail.poll(), data[:1])
+    with open(path, 'ab') as f:
+        f.write(b''.join(lines)[len(lines[0] + lines[1]) + 7:])
+    assert np.array_equal(tail.poll(), data[1:])
@@ -0,0 +1,71 @@
+import numpy as np
+
+import autopilot
+import fake_krpc
+import flightlog
+from telemetry import TelemetryHub
+
+
+class StepClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+def flight(clock):
+    conn = fake_krpc.connect()
+    vessel = conn.space_center.active_vessel
+    return conn, vessel, TelemetryHub(conn, vessel, clock)
+
+
+def fly(logger, conn, vessel, hub, clock, n):
+    for i in range(n):
+        clock.now = i * 0.5
+        conn.vessel.state['mean_altitude'] = 10.0 * i
+        conn.update()
+        logger.save_data(vessel, hub.snapshot())
+
+
+def test_buffered_logger_flushes_on_close(tmp_path):
+    clock = StepClock()
+    conn, vessel, hub = flight(clock)
+    for backend in ('csv', 'binary'):
+        clock.now = 0.0
+        # Пакет больше числа отсчётов, а период сброса длиннее теста: всё попадает на диск только при close
+        logger = autopilot.DataLogger(buffered=True, batch_size=1000, flush_interval=60, backend=backend,
+                                      data_dir=str(tmp_path / backend), clock=clock)
+        fly(logger, conn, vessel, hub, clock, 40)
+        assert len(flightlog.load_columns(logger.data_file)['time']) == 0
+        logger.close()
+
+        columns = flightlog.load_columns(logger.data_file)
+        assert logger.written == 40 and logger.dropped == 0
+        assert np.array_equal(columns['time'], np.arange(40) * 0.5)
+        assert np.array_equal(columns['altitude'], np.arange(40) * 10.0)
+
+
+def test_full_queue_drops_the_oldest_samples(tmp_path):
+    clock = StepClock()
+    conn, vessel, hub = flight(clock)
+    logger = autopilot.DataLogger(buffered=True, buffer_size=16, batch_size=1000, flush_interval=60,
+                                  data_dir=str(tmp_path), clock=clock)
+    fly(logger, conn, vessel, hub, clock, 50)
+    assert logger.dropped == 34 and logger.max_depth == 16
+    logger.close()
+
+    columns = flightlog.load_columns(logger.data_file)
+    assert logger.written == 16
+    assert np.array_equal(columns['altitude'], np.arange(34, 50) * 10.0)
+
+
+def test_save_after_close_is_ignored(tmp_path):
+    clock = StepClock()
+    conn, vessel, hub = flight(clock)
+    logger = autopilot.DataLogger(data_dir=str(tmp_path), clock=clock)
+    fly(logger, conn, vessel, hub, clock, 3)
+    logger.close()
+    logger.save_data(vessel, hub.snapshot())
+    assert logger.written == 3
+    assert len(flightlog.load_columns(logger.data_file)['time']) == 3
@@ -0,0 +1,48 @@
+import numpy as np
+
+import flightlog
+
+
+def sample_rows(n=50):
+    # Значения с двумя знаками после запятой, как их пишет DataLogger в CSV
+    data = np.zeros(n, dtype=flightlog.DTYPE)
+    t = np.arange(n) * 0.1
+    data['time'] = np.round(t, 2)
+    data['velocity'] = np.round(12.34 * t ** 1.5, 2)
+    data['mass'] = np.round(33165 - 90.5 * t, 2)
+    data['altitude'] = np.round(1.7 * t ** 2, 2)
+    data['thrust'] = np.where(t < 3, 825000.0, 253500.0)
+    data['stage'] = np.where(t < 3, 3, 2)
+    return data
+
+
+def write_binary(path, data):
+    writer = flightlog.BinaryLogWriter(str(path))
+    writer.append(data.tolist())
+    writer.close()
+
+
+def test_binary_csv_roundtrip_is_exact(tmp_path):
+    data = sample_rows()
+    binary = tmp_path / 'log.bin'
+    write_binary(binary, data)
+    assert flightlog.is_binary(str(binary))
+    assert np.array_equal(flightlog.read_binary(str(binary)), data)
+
+    csv_path = flightlog.binary_to_csv(str(binary), str(tmp_path / 'log.csv'))
+    assert not flightlog.is_binary(csv_path)
+    assert np.array_equal(flightlog.load_columns(csv_path)['mass'], data['mass'])
+    back = flightlog.csv_to_binary(csv_path, str(tmp_path / 'back.bin'))
+    assert open(back, 'rb').read() == binary.read_bytes()
+    # И обратно в CSV - байт в байт
+    again = flightlog.binary_to_csv(back, str(tmp_path / 'again.csv'))
+    assert open(again, 'rb').read() == open(csv_path, 'rb').read()
+
+
+def test_read_binary_drops_unfinished_record(tmp_path):
+    data = sample_rows(10)
+    path = tmp_path / 'log.bin'
+    write_binary(path, data)
+    with open(path, 'ab') as f:
+        f.write(data[:1].tobytes()[:13])
+    assert np.array_equal(flightlog.read_binary(str(path)), data)
@@ -0,0 +1,25 @@
+import pytest
+
+from maneuver import plan_circularization
+
+
+def test_circularization_matches_vis_viva():
+    # Кербин: mu = 3.5316e12, R = 600 км; апоцентр 150 км, перицентр -100 км.
+    # r_a = 750 км, a = 625 км: v_circ = sqrt(mu / r_a) = 2169.99 м/с, v_a = sqrt(mu (2 / r_a - 1 / a)) = 1940.90 м/с
+    plan = plan_circularization(150_000, -100_000, 60, 5000, 60_000, 345)
+
+    assert plan['v_circular'] == pytest.approx(2169.99, abs=0.01)
+    assert plan['v_apoapsis'] == pytest.approx(1940.90, abs=0.01)
+    assert plan['dv'] == pytest.approx(229.09, abs=0.01)
+    # Циолковский: m = 5000 exp(-229.09 / (345 * 9.80665)), расход 60000 / (345 * 9.80665) = 17.73 кг/с
+    assert plan['m_final'] == pytest.approx(4672.64, abs=0.01)
+    assert plan['burn_time'] == pytest.approx(18.46, abs=0.01)
+    # Импульс центрирован на апоцентре
+    assert plan['start_in'] == pytest.approx(60 - plan['burn_time'] / 2)
+    assert plan['main_burn_time'] < plan['burn_time'] < plan['main_burn_time'] + plan['trim_burn_time']
+
+
+def test_circular_orbit_needs_no_burn():
+    plan = plan_circularization(150_000, 150_000, 60, 5000, 60_000, 345)
+    assert plan['dv'] == pytest.approx(0.0, abs=1e-6)
+    assert plan['burn_time'] == pytest.approx(0.0, abs=1e-6)
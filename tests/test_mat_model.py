@@ -0,0 +1,23 @@
+from mat_model import PHASES, PhaseCheckpoints, run_model
+
+
+def test_resumed_run_equals_full_run():
+    checkpoints = PhaseCheckpoints()
+    run_model({'tpov2': 30.0}, checkpoints)
+    # Правка параметра второй ступени продолжает расчёт с начала её участка
+    resumed = run_model({'tpov2': 40.0}, checkpoints)
+    turn_2 = [name for name, _, _ in PHASES].index('turn_2')
+    assert checkpoints.resumed[turn_2] == 1
+    assert resumed == run_model({'tpov2': 40.0})
+
+    # Параметр первой ступени меняет ключ всех участков: расчёт идёт со старта
+    assert run_model({'tpov2': 40.0, 'cf': 0.5}, checkpoints) == run_model({'tpov2': 40.0, 'cf': 0.5})
+    assert checkpoints.resumed[0] == 2
+
+
+def test_checkpoints_do_not_leak_between_runs():
+    # Продолженный расчёт не должен менять сохранённое состояние для следующих
+    checkpoints = PhaseCheckpoints()
+    first = run_model({'tpov2': 30.0}, checkpoints)
+    run_model({'tpov2': 45.0}, checkpoints)
+    assert run_model({'tpov2': 30.0}, checkpoints) == first
@@ -0,0 +1,33 @@
+import numpy as np
+
+from plots import lttb
+
+
+def test_lttb_keeps_endpoints_and_target_count():
+    rng = np.random.default_rng(0)
+    for n, threshold in ((10_000, 500), (1000, 999), (1000, 3), (7, 5), (293, 100)):
+        x = np.cumsum(rng.random(n)) + 10
+        y = rng.normal(size=n)
+        xs, ys = lttb(x, y, threshold)
+        assert len(xs) == len(ys) == threshold
+        assert (xs[0], ys[0], xs[-1], ys[-1]) == (x[0], y[0], x[-1], y[-1])
+        # Точки берутся из исходного ряда по порядку, без повторов
+        idx = np.searchsorted(x, xs)
+        assert np.all(np.diff(idx) > 0) and np.array_equal(y[idx], ys)
+
+
+def test_lttb_keeps_peaks():
+    # Одиночный пик на ровном участке (смена ступени, максимум скоростного напора) не теряется
+    x = np.arange(100_000, dtype=float)
+    y = np.zeros_like(x)
+    y[31_337] = 5.0
+    _, ys = lttb(x, y, 1000)
+    assert ys.max() == 5.0
+
+
+def test_lttb_returns_short_series_unchanged():
+    x = np.arange(10.0)
+    y = x ** 2
+    for threshold in (10, 50, 2):
+        xs, ys = lttb(x, y, threshold)
+        assert xs is x and ys is y
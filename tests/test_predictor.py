@@ -0,0 +1,102 @@
+from math import exp, sqrt
+
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from kepler import MU, R, apsides
+from maneuver import G0
+from predictor import AscentPredictor, PredictorRunner, velocity_from_orbit
+
+# Разгон второй ступени за пределами атмосферы: без сопротивления траектория задаётся только тягой и тяготением
+STATE = {
+    'time': 95.0,
+    'altitude': 72_000.0,
+    'apoapsis': 110_000.0,
+    'periapsis': -350_000.0,
+    'mass': 5000.0,
+    'thrust': 60_000.0,
+    'propellant': 3000.0,
+}
+
+
+def frozen_clock():
+    return 0.0
+
+
+def reference_cutoff(state, predictor):
+    # Та же задача в декартовых координатах: тяга по местному горизонту, отсечка по событию апоцентра
+    r0 = R + state['altitude']
+    vr, vt = velocity_from_orbit(state['altitude'], state['apoapsis'], state['periapsis'])
+    flow = state['thrust'] / (predictor.isp * G0)
+
+    def radial_tangential(y):
+        r = np.hypot(y[0], y[1])
+        return r, (y[2] * y[0] + y[3] * y[1]) / r, (y[2] * y[1] - y[3] * y[0]) / r
+
+    def rhs(t, y):
+        r = np.hypot(y[0], y[1])
+        gr = -MU / r ** 3
+        a = state['thrust'] / y[4] / r
+        return [y[2], y[3], gr * y[0] + a * y[1], gr * y[1] - a * y[0], -flow]
+
+    def apoapsis_reached(t, y):
+        r, vr, vt = radial_tangential(y)
+        return float(apsides(r - R, vt, vr)[0]) - predictor.target
+    apoapsis_reached.terminal = True
+
+    sol = solve_ivp(rhs, (0, 300), [0.0, r0, vt, vr, state['mass']], events=apoapsis_reached,
+                    rtol=1e-10, atol=1e-8)
+    y = sol.y_events[0][0]
+    r, vr, vt = radial_tangential(y)
+    return sol.t_events[0][0], y[4], float(apsides(r - R, vt, vr)[1])
+
+
+def test_velocity_from_orbit_reproduces_apsides():
+    vr, vt = velocity_from_orbit(STATE['altitude'], STATE['apoapsis'], STATE['periapsis'])
+    apoapsis, periapsis = apsides(STATE['altitude'], vt, vr)
+    assert abs(apoapsis - STATE['apoapsis']) < 1e-3
+    assert abs(periapsis - STATE['periapsis']) < 1e-3
+
+
+def test_cutoff_matches_reference_trajectory():
+    predictor = AscentPredictor(cf=0.0, dt=0.01, clock=frozen_clock)
+    result = predictor.predict(STATE)
+    t_cut, m_cut, periapsis = reference_cutoff(STATE, predictor)
+
+    assert result['complete'] and result['fuel_ok']
+    assert abs(result['cutoff_in'] - t_cut) < 0.01
+    assert result['cutoff_at'] == STATE['time'] + result['cutoff_in']
+    burned = STATE['mass'] - m_cut
+    assert abs(result['propellant_at_cutoff'] - (STATE['propellant'] - burned)) < 0.2
+
+    # Довыведение в апоцентре: разность круговой скорости и скорости на эллипсе, топливо по Циолковскому
+    r_a, r_p = R + predictor.target, R + periapsis
+    dv = sqrt(MU / r_a) - sqrt(MU * (2 / r_a - 2 / (r_a + r_p)))
+    assert abs(result['circularization_dv'] - dv) < 0.5
+    needed = m_cut * (1 - exp(-dv / (predictor.isp * G0)))
+    assert abs(result['fuel_needed'] - needed) < 1.0
+    assert result['fuel_margin'] == result['propellant_at_cutoff'] - result['fuel_needed']
+
+
+def test_prediction_does_not_depend_on_the_runner_or_repeats():
+    predictor = AscentPredictor(cf=0.0, dt=0.01, clock=frozen_clock)
+    runner = PredictorRunner(predictor, background=False)
+    first = runner.submit(STATE)
+    assert runner.submit(dict(STATE)) == first == predictor.predict(STATE)
+    assert runner.stats()['computed'] == 2
+
+
+def test_not_enough_propellant():
+    predictor = AscentPredictor(cf=0.0, dt=0.01, clock=frozen_clock)
+    result = predictor.predict(dict(STATE, propellant=200.0))
+    assert result['complete'] and result['fuel_ok'] is False
+    assert result['cutoff_in'] is None
+    assert STATE['apoapsis'] < result['apoapsis_max'] < predictor.target
+
+
+def test_over_budget_prediction_is_incomplete():
+    ticks = iter(range(1000))
+    predictor = AscentPredictor(cf=0.0, dt=0.01, budget=0.5, clock=lambda: float(next(ticks)))
+    result = predictor.predict(STATE)
+    assert not result['complete'] and result['fuel_ok'] is None
+    assert result['cutoff_in'] is None and result['steps'] == 0
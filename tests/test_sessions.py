@@ -0,0 +1,82 @@
+import socket
+
+import pytest
+
+import sessions
+from krpc_server import MiniKrpcServer
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def endpoint(name, rpc_port, stream_port, flights=1):
+    return dict(sessions.DEFAULT_ENDPOINT, name=name, rpc_port=rpc_port, stream_port=stream_port, flights=flights)
+
+
+@pytest.fixture
+def server():
+    server = MiniKrpcServer()
+    yield server
+    server.close()
+
+
+def test_pool_connects_through_krpc_and_reuses_the_client(server):
+    ksp = endpoint('ksp1', server.rpc_port, server.stream_port)
+    pool = sessions.ConnectionPool()
+
+    conn, reused = pool.acquire(ksp)
+    assert not reused
+    pool.release(ksp, conn)
+    again, reused = pool.acquire(ksp)
+    assert reused and again is conn
+
+    # После ошибки соединение закрывается, следующий полёт подключается заново
+    pool.release(ksp, again, broken=True)
+    fresh, reused = pool.acquire(ksp)
+    assert not reused and fresh is not conn
+    pool.release(ksp, fresh)
+    pool.close()
+
+    assert pool.stats() == {'created': 2, 'reused': 1, 'discarded': 1}
+    assert server.clients == ['varkt-ksp1', 'varkt-ksp1']
+    assert server.calls.count(('KRPC', 'GetServices')) == 2
+
+
+def test_unreachable_server_fails_the_flight_without_hanging(tmp_path):
+    port = free_port()
+    report = sessions.run_sessions([endpoint('down', port, port)], str(tmp_path))
+
+    result, = report['results']
+    assert not result['ok'] and result['error']
+    assert report['pool']['created'] == 0
+    assert (tmp_path / 'results.csv').exists()
+
+
+def test_two_sil_sessions_share_a_pool(tmp_path):
+    endpoints = [endpoint('ksp1', 50000, 50001, flights=2), endpoint('ksp2', 50010, 50011)]
+    connect, clocks = sessions.sil_backend(endpoints)
+    report = sessions.run_sessions(endpoints, str(tmp_path), connect, clocks=clocks, prediction='inline')
+
+    assert report['flights'] == 3 and report['ok'] == 3
+    # Второй полёт ksp1 берёт соединение из пула и возвращает ракету на старт
+    assert report['pool'] == {'created': 2, 'reused': 1, 'discarded': 0}
+    assert [r['reused'] for r in report['results']] == [False, True, False]
+    for r in report['results']:
+        assert r['periapsis'] > 140_000
+        assert (tmp_path / r['session'] / 'session.log').exists()
+
+
+def test_scheduler_is_refused_on_virtual_clocks(tmp_path):
+    endpoints = [endpoint('ksp1', 50000, 50001)]
+    connect, clocks = sessions.sil_backend(endpoints)
+    report = sessions.run_sessions(endpoints, str(tmp_path), connect, scheduler=True, clocks=clocks,
+                                   prediction='inline')
+    assert report['ok'] == 0
+
+    config = tmp_path / 'cfg.json'
+    config.write_text('{"sessions": [{"name": "ksp1"}]}', encoding='utf-8')
+    with pytest.raises(SystemExit):
+        sessions.main([str(config), '--sil', '--scheduler', '--out', str(tmp_path / 'out')])
@@ -0,0 +1,22 @@
+import os
+
+import flightlog
+import sil
+
+
+def test_sil_ascent_reaches_orbit(tmp_path):
+    result = sil.run_ascent(data_dir=str(tmp_path))
+
+    assert not result['timed_out']
+    assert result['periapsis'] > 140_000
+    assert 140_000 < result['apoapsis'] < 160_000
+    # Обе ступени отделены, осталась третья
+    assert result['stage'] == 1
+    assert result['speedup'] > 1
+
+    assert os.path.dirname(result['data_file']) == str(tmp_path)
+    columns = flightlog.load_columns(result['data_file'])
+    assert columns['altitude'].max() > 140_000
+    # Время в журнале - модельное, а не настенное
+    assert columns['time'][0] >= 0
+    assert result['virtual_time'] - 5 < columns['time'][-1] <= result['virtual_time']
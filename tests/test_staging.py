@@ -0,0 +1,43 @@
+import fake_krpc
+from autopilot import RocketStager
+from events import FlightEvents
+from telemetry import TelemetryHub
+
+
+def test_event_driven_staging():
+    conn = fake_krpc.connect()
+    vessel = conn.space_center.active_vessel
+    hub = TelemetryHub(conn, vessel)
+    events = FlightEvents(conn, vessel, 150_000)
+    stager = RocketStager(vessel, blocking_settle=False, events=events)
+    resources = conn.vessel.state['resources']
+    assert list(events.events) == ['solid_fuel_low']
+
+    # Пока событие не сработало, кадры с остатком твёрдого топлива ускорители не отделяют
+    resources['SolidFuel'] = 300.0
+    conn.update()
+    assert not stager.manage_all_stages(hub.snapshot())
+    assert conn.vessel.state['current_stage'] == 3
+
+    # Порог ускорителей из описания ракеты: не больше 5 единиц
+    resources['SolidFuel'] = 4.0
+    conn.update()
+    assert events.fired('solid_fuel_low')
+    assert stager.manage_all_stages(hub.snapshot())
+    assert stager.current_stage == 2 and stager.separations == 1
+    assert conn.vessel.state['current_stage'] == 2
+    assert set(events.events) == {'solid_fuel_low', 'liquid_depleted', 'thrust_lost'}
+
+    conn.update()
+    assert not stager.manage_all_stages(hub.snapshot())
+
+    resources.update(LiquidFuel=0.0, Oxidizer=0.0)
+    conn.update()
+    assert events.fired('liquid_depleted')
+    assert stager.manage_all_stages(hub.snapshot())
+    assert vessel.control.throttle == 0.0
+    assert stager.stage_separated == [True, False, True]
+
+    events.close()
+    hub.close()
+    assert conn.events == []
@@ -0,0 +1,16 @@
+import pytest
+
+import sweep
+
+
+def test_main_without_grid_sweeps_default_bounds(capsys):
+    table = sweep.main(['--workers', '1', '--top', '1'])
+    assert table['m'].size == sweep.GRID_POINTS ** len(sweep.DEFAULT_BOUNDS)
+    for name, (lo, hi) in sweep.DEFAULT_BOUNDS.items():
+        assert table[name].min() == lo and table[name].max() == hi
+    assert 'апоцентр' in capsys.readouterr().out
+
+
+def test_empty_grid_is_an_error():
+    with pytest.raises(ValueError):
+        sweep.sweep({})
@@ -0,0 +1,63 @@
+import time
+
+import fake_krpc
+from telemetry import TelemetryHub
+
+
+class StepClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+def make_hub(clock=time):
+    conn = fake_krpc.connect()
+    return conn, TelemetryHub(conn, conn.space_center.active_vessel, clock)
+
+
+def test_snapshot_is_one_frame_without_rpcs():
+    conn, hub = make_hub()
+    assert conn.rpc_log['KRPC.AddStream'] == conn.rpc_log['KRPC.StartStream'] == len(hub.streams)
+
+    conn.vessel.state.update(mean_altitude=1000.0, speed=150.0, mass=30000.0)
+    conn.vessel.state['resources']['SolidFuel'] = 800.0
+    # До StreamUpdate снимок остаётся прежним
+    assert hub.snapshot().mean_altitude == 0.0
+    conn.update()
+
+    before = conn.rpc_count
+    snap = hub.snapshot()
+    assert (snap.mean_altitude, snap.speed, snap.mass, snap.solid_fuel) == (1000.0, 150.0, 30000.0, 800.0)
+    assert conn.rpc_count == before
+
+    # Следующий кадр не меняет уже выданный снимок
+    conn.vessel.state['mean_altitude'] = 2000.0
+    conn.update()
+    assert snap.mean_altitude == 1000.0
+    assert hub.snapshot().mean_altitude == 2000.0
+
+    assert hub.report()['ticks'] == 3
+    assert hub.reads == 7
+    assert hub.rpcs_saved_per_tick() == 7 / 3
+
+
+def test_snapshot_time_comes_from_the_session_clock():
+    clock = StepClock()
+    conn, hub = make_hub(clock)
+    assert hub.snapshot().time == 1000.0
+    clock.now = 1012.5
+    assert hub.snapshot().time == 1000.0
+    conn.update()
+    assert hub.snapshot().time == 1012.5
+
+
+def test_close_removes_streams():
+    conn, hub = make_hub()
+    hub.close()
+    assert conn.streams == []
+    assert conn.rpc_log['KRPC.RemoveStream'] == len(hub.streams)
+    conn.vessel.state['mean_altitude'] = 500.0
+    conn.update()
+    assert hub.snapshot().mean_altitude == 0.0
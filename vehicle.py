@@ -0,0 +1,111 @@
+import copy
+import json
+from math import pi
+
+G0 = 9.80665
+# Ресурсы KSP в условиях срабатывания и поля телеметрии, в которых они приходят
+RESOURCES = {'SolidFuel': 'solid_fuel', 'LiquidFuel': 'liquid_fuel', 'Oxidizer': 'oxidizer'}
+
+# Ступени в порядке работы; масса и топливо на один блок, тяга на один двигатель.
+# Срабатывание: ступень выработана, когда каждый ресурс не больше at_most или тяга ниже thrust_below
+VEHICLE = {
+    'name': 'varkt',
+    'stages': [
+        {
+            'name': "Твердотопливные ускорители",
+            'count': 3,
+            'mass': 7650,
+            'propellant': 4555,
+            'thrust': 275_000,
+            'burn_time': 42.2,
+            'radius': 2.1,
+            'trigger': {'resources': ['SolidFuel'], 'at_most': 5.0},
+        },
+        {
+            'name': "Вторая ступень",
+            'count': 1,
+            'mass': 8215,
+            'propellant': 8215,
+            'thrust': 253_500,
+            'burn_time': 75,
+            'radius': 0.21,
+            'trigger': {'resources': ['LiquidFuel', 'Oxidizer'], 'at_most': 0.1, 'thrust_below': 1.0},
+        },
+    ],
+    # Всё, что остаётся после выработки последней ступени
+    'payload': {'name': "Третья ступень", 'mass': 2000},
+}
+
+
+def compile_vehicle(spec=VEHICLE):
+    # Производные величины считаются один раз: стартовая и конечная масса, расход, удельный импульс, мидель
+    if not spec['stages']:
+        raise ValueError("В описании ракеты нет ни одной ступени")
+    mass = spec['payload']['mass'] + sum(stage['count'] * stage['mass'] for stage in spec['stages'])
+    stages = []
+    for stage in spec['stages']:
+        if not 0 < stage['propellant'] <= stage['mass']:
+            raise ValueError(f"{stage['name']}: топлива должно быть больше нуля и не больше массы блока")
+        if stage['burn_time'] <= 0:
+            raise ValueError(f"{stage['name']}: время работы должно быть больше нуля")
+        unknown = set(stage['trigger']['resources']) - set(RESOURCES)
+        if unknown:
+            raise ValueError(f"{stage['name']}: неизвестные ресурсы в условии отделения: {', '.join(sorted(unknown))}")
+        propellant = stage['count'] * stage['propellant']
+        thrust = stage['count'] * stage['thrust']
+        flow = propellant / stage['burn_time']
+        stages.append({
+            'name': stage['name'],
+            'm_start': mass,
+            'm_burnout': mass - propellant,
+            'propellant': propellant,
+            'thrust': thrust,
+            'burn_time': stage['burn_time'],
+            'flow': flow,
+            'isp': thrust / (flow * G0),
+            'area': stage['radius'] ** 2 * pi,
+            'trigger': dict(stage['trigger']),
+        })
+        mass -= stage['count'] * stage['mass']
+    return {'name': spec['name'], 'stages': stages, 'payload': dict(spec['payload']), 'dry_mass': mass}
+
+
+def model_params(spec=VEHICLE):
+    # Параметры ракеты в обозначениях batch_model.py: первая ступень — ускорители, вторая — последняя ступень
+    stages = compile_vehicle(spec)['stages']
+    if len(stages) != 2:
+        raise ValueError("Модели траектории описывают ракету ровно из двух ступеней")
+    first, second = stages
+    return {
+        'Mr': first['m_start'],
+        'M0': first['m_burnout'],
+        'T1': first['burn_time'],
+        's1': first['area'],
+        'Ft1': first['thrust'],
+        'm2': second['m_start'],
+        'M2': second['m_burnout'],
+        'T2': second['burn_time'],
+        's2': second['area'],
+        'Ft2': second['thrust'],
+    }
+
+
+def variant(spec=VEHICLE, stage=None, **changes):
+    # Вариант ракеты без правки исходников: variant(VEHICLE, 1, thrust=260_000)
+    spec = copy.deepcopy(spec)
+    target = spec if stage is None else spec['stages'][stage]
+    unknown = set(changes) - set(target)
+    if unknown:
+        raise KeyError(f"Неизвестные поля описания ракеты: {', '.join(sorted(unknown))}")
+    target.update(changes)
+    return spec
+
+
+def load_vehicle(path):
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+    compile_vehicle(spec)
+    return spec
+
+
+COMPILED = compile_vehicle(VEHICLE)